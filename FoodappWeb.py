@@ -6,306 +6,55 @@ import streamlit as st
 import requests
 import json
 from datetime import datetime, date
-from typing import Dict, List, Optional
-from dataclasses import dataclass, asdict
-import sqlite3
+from typing import Dict, List, Mapping, Optional
 from pathlib import Path
 import time
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+import numpy as np
 import pandas as pd
 
-
-# --- MODÈLE DE DONNÉES ---
-
-@dataclass
-class Product:
-    """Modèle de données produit"""
-    barcode: str
-    name: str
-    brands: str
-    nutriscore: Optional[str] = None
-    nova_group: Optional[int] = None
-    ecoscore: Optional[str] = None
-    energy_kcal: Optional[float] = None
-    proteins: Optional[float] = None
-    carbohydrates: Optional[float] = None
-    fat: Optional[float] = None
-    fiber: Optional[float] = None
-    salt: Optional[float] = None
-    ingredients: Optional[str] = None
-    allergens: Optional[List[str]] = None
-
-    def to_dict(self):
-        return asdict(self)
+import nutrient_engine
+from barcodes import display
+from consumption_tracker import ConsumptionTracker
+from openfoodfacts_client import ERROR, PROGRESS, WARNING, OpenFoodFactsClient
+from prefetch import ProductPrefetcher
+from product_model import Product, slim_search_result
+from rdi_profiles import DEFAULT_ACTIVITY, RDIProfiles, load_profiles
 
 
 # --- CLASSE API (Corrigée pour le cache) ---
 
-class OpenFoodFactsAPI:
+class OpenFoodFactsAPI(OpenFoodFactsClient):
     """Client API OpenFoodFacts (adapté pour Streamlit)"""
 
-    BASE_URL = "https://world.openfoodfacts.net/api/v2"
-    SEARCH_URL = "https://world.openfoodfacts.net"
     USER_AGENT = "NutritionAnalyzerStreamlit/1.0 (Educational Project)"
 
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({"User-Agent": self.USER_AGENT})
-
-        try:
-            retry_strategy = Retry(
-                total=3,
-                backoff_factor=1,
-                status_forcelist=[429, 500, 502, 503, 504]
-            )
-            adapter = HTTPAdapter(max_retries=retry_strategy)
-            self.session.mount("https://", adapter)
-            self.session.mount("http://", adapter)
-        except Exception as e:
-            st.warning(f"Impossible de configurer les 'retries' : {e}")
+    def report(self, message: str, level: str = PROGRESS):
+        """Avertissements et erreurs du client affichés par Streamlit (progression ignorée)"""
+        if level == WARNING:
+            st.warning(message)
+        elif level == ERROR:
+            st.error(message)
 
     @st.cache_data(ttl=3600)
-    def get_product(_self, barcode: str) -> Optional[Dict]:  # Renvoie un Dict
-        """Récupère les données d'un produit via son code-barre"""
-        url = f"{_self.BASE_URL}/product/{barcode}"
-        params = {
-            "fields": "product_name,brands,nutrition_grades,nova_group,"
-                      "ecoscore_grade,nutriments,ingredients_text,allergens_tags"
-        }
+    def _load_product(_self, barcode: str) -> Product:
+        """
+        Produit d'un code-barre canonique
 
-        try:
-            response = _self.session.get(url, params=params, timeout=20)
-            response.raise_for_status()
-            data = response.json()
-
-            if data.get("status") != 1:
-                st.error(f"❌ Produit {barcode} non trouvé dans la base OpenFoodFacts")
-                return None
-
-            product = _self._parse_product(barcode, data["product"])
-            return product.to_dict()  # Convertit en dictionnaire sérialisable
-
-        except requests.exceptions.Timeout:
-            st.error(f"⏱️ Timeout - Le serveur met trop de temps à répondre")
-            return None
-        except requests.exceptions.RequestException as e:
-            st.error(f"❌ Erreur API: {e}")
-            return None
+        Product est sérialisable par pickle (format binaire compact), donc
+        directement mis en cache par st.cache_data. Un échec lève
+        ProductUnavailable et n'est pas mis en cache : le cache négatif de
+        ProductCache décide seul du délai avant un nouvel essai.
+        """
+        return OpenFoodFactsClient._load_product(_self, barcode)
 
     def _parse_product(self, barcode: str, data: Dict) -> Product:
-        """Parse la réponse API vers objet Product (identique)"""
-        nutriments = data.get("nutriments", {})
-
-        return Product(
-            barcode=barcode,
-            name=data.get("product_name", "Inconnu"),
-            brands=data.get("brands", ""),
-            nutriscore=data.get("nutrition_grades", "").upper(),
-            nova_group=data.get("nova_group"),
-            ecoscore=data.get("ecoscore_grade", "").upper(),
-            energy_kcal=nutriments.get("energy-kcal_100g"),
-            proteins=nutriments.get("proteins_100g"),
-            carbohydrates=nutriments.get("carbohydrates_100g"),
-            fat=nutriments.get("fat_100g"),
-            fiber=nutriments.get("fiber_100g"),
-            salt=nutriments.get("salt_100g"),
-            ingredients=data.get("ingredients_text"),
-            allergens=data.get("allergens_tags", [])
-        )
+        """Parse la réponse API vers objet Product (code au format EAN)"""
+        return super()._parse_product(barcode, data).to_product()
 
     @st.cache_data(ttl=3600)
     def search_products(_self, query: str, page_size: int = 20) -> List[Dict]:
-        """Recherche produits par mots-clés (adapté)"""
-        url = f"{_self.SEARCH_URL}/cgi/search.pl"
-        params = {
-            "search_terms": query,
-            "search_simple": 1,
-            "action": "process",
-            "json": 1,
-            "page_size": min(page_size, 100)
-        }
-
-        try:
-            response = _self.session.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            products = data.get("products", [])
-
-            if products:
-                return products
-
-            return _self._search_alternative(query, page_size)
-
-        except requests.exceptions.Timeout:
-            st.warning(f"⏱️ Timeout - Essai avec méthode alternative...")
-            return _self.search_alternative(query, page_size)
-        except requests.exceptions.RequestException as e:
-            st.error(f"❌ Erreur réseau: {e}")
-            return _self._search_alternative(query, page_size)
-
-    def _search_alternative(self, query: str, page_size: int = 20) -> List[Dict]:
-        """Méthode alternative de recherche (identique)"""
-        try:
-            if query.isdigit() and len(query) >= 8:
-                url = f"{self.BASE_URL}/search"
-                params = {"code": query, "page_size": 1, "fields": "code,product_name,brands,nutrition_grades"}
-            else:
-                url = f"{self.BASE_URL}/search"
-                params = {"page_size": min(page_size, 50), "fields": "code,product_name,brands,nutrition_grades",
-                          "brands_tags": query.lower().replace(" ", "-")}
-
-            response = self.session.get(url, params=params, timeout=20)
-            response.raise_for_status()
-            data = response.json()
-            return data.get("products", [])
-        except:
-            return []
-
-
-# --- GESTION DE LA CONSOMMATION ---
-
-class ConsumptionTracker:
-    """Gestionnaire d'historique de consommation"""
-
-    def __init__(self, db_path: str = "nutrition_data.db"):
-        self.db_path = Path(db_path)
-        self._init_database()
-
-    def _init_database(self):
-        """Initialise la base de données SQLite"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS consumption (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                barcode TEXT NOT NULL,
-                product_name TEXT,
-                quantity REAL DEFAULT 100,
-                unit TEXT DEFAULT 'g',
-                timestamp TEXT NOT NULL,
-                nutriscore TEXT,
-                energy_kcal REAL,
-                proteins REAL,
-                carbohydrates REAL,
-                fat REAL
-            )
-        """)
-
-        conn.commit()
-        conn.close()
-
-    def add_consumption(self, product: Product, quantity: float = 100, unit: str = "g"):
-        """Enregistre une consommation"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT INTO consumption 
-            (barcode, product_name, quantity, unit, timestamp, nutriscore, 
-             energy_kcal, proteins, carbohydrates, fat)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            product.barcode,
-            product.name,
-            quantity,
-            unit,
-            datetime.now().isoformat(),
-            product.nutriscore,
-            product.energy_kcal,
-            product.proteins,
-            product.carbohydrates,
-            product.fat
-        ))
-
-        conn.commit()
-        conn.close()
-
-    def get_daily_summary(self, date_str: Optional[str] = None) -> Dict:
-        """Calcule le résumé nutritionnel d'une journée"""
-        if date_str is None:
-            date_str = datetime.now().strftime("%Y-%m-%d")
-
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT 
-                SUM(energy_kcal * quantity / 100) as total_kcal,
-                SUM(proteins * quantity / 100) as total_proteins,
-                SUM(carbohydrates * quantity / 100) as total_carbs,
-                SUM(fat * quantity / 100) as total_fat,
-                COUNT(*) as num_products
-            FROM consumption
-            WHERE DATE(timestamp) = ?
-        """, (date_str,))
-
-        result = cursor.fetchone()
-        conn.close()
-
-        return {
-            "date": date_str,
-            "total_kcal": round(result[0] or 0, 1),
-            "total_proteins": round(result[1] or 0, 1),
-            "total_carbs": round(result[2] or 0, 1),
-            "total_fat": round(result[3] or 0, 1),
-            "num_products": result[4]
-        }
-
-    def get_history(self, days: int = 7) -> List[Dict]:
-        """Récupère l'historique des N derniers jours"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        # NOUVEAU : On récupère aussi l'ID
-        cursor.execute("""
-            SELECT id, barcode, product_name, quantity, unit, timestamp, 
-                   nutriscore, energy_kcal
-            FROM consumption
-            WHERE timestamp >= datetime('now', '-' || ? || ' days')
-            ORDER BY timestamp DESC
-        """, (days,))
-
-        results = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-
-        return results
-
-    # --- NOUVELLES FONCTIONS DE SUPPRESSION ---
-
-    def delete_consumption_entry(self, entry_id: int):
-        """Supprime une entrée spécifique de la consommation par son ID"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM consumption WHERE id = ?", (entry_id,))
-        conn.commit()
-        conn.close()
-
-    def delete_daily_summary(self, date_str: str):
-        """Supprime toutes les entrées pour une date donnée"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM consumption WHERE DATE(timestamp) = ?", (date_str,))
-        conn.commit()
-        conn.close()
-
-    def get_daily_entries(self, date_str: str) -> List[Dict]:
-        """Récupère les entrées détaillées d'une journée"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, timestamp, product_name, quantity, unit, 
-                   (energy_kcal * quantity / 100) as consumed_kcal
-            FROM consumption
-            WHERE DATE(timestamp) = ?
-            ORDER BY timestamp DESC
-        """, (date_str,))
-        results = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return results
+        """Recherche produits par mots-clés (index local puis serveur)"""
+        return OpenFoodFactsClient.search_products(_self, query, page_size)
 
 
 # --- INITIALISATION GLOBALE (Mise en cache Streamlit) ---
@@ -324,44 +73,37 @@ api = get_api_client()
 tracker = get_tracker()
 
 
+@st.cache_resource
+def get_prefetcher():
+    # Un préchargeur par processus, lancé une fois au démarrage
+    prefetcher = ProductPrefetcher(api.cache, api._fetch_product, tracker, api.mirror)
+    prefetcher.warm()
+    return prefetcher
+
+
+prefetcher = get_prefetcher()
+
+# Nombre de lignes (ou de groupes) affichées par page d'historique
+HISTORY_PAGE_SIZE = 20
+
+# Nutriments comparés aux AJR dans le rapport journalier
+REPORT_NUTRIENTS = ("energy_kcal", "proteins", "carbohydrates", "fat")
+
+
 # --- GESTION DES AJR (Apports Journaliers Recommandés) ---
 
-def get_rdi(age: Optional[int], sex: Optional[str]) -> Dict:
+@st.cache_resource
+def get_rdi_profiles() -> RDIProfiles:
+    """Table des AJR, construite une seule fois (voir rdi_profiles.py)"""
+    return load_profiles()
+
+
+def get_rdi(age: Optional[int], sex: Optional[str], activity: str = DEFAULT_ACTIVITY) -> Mapping:
     """
     Estime les Apports Journaliers Recommandés (AJR)
     Source: Basé sur les moyennes des données ANSES (Agence nationale de sécurité sanitaire)
     """
-    # Valeurs par défaut (Femme, 40-60 ans, activité moyenne)
-    kcal = 2000.0
-
-    if sex == 'Homme':
-        if age and age < 40:
-            kcal = 2700.0
-        elif age and age <= 60:
-            kcal = 2500.0
-        elif age and age > 60:
-            kcal = 2200.0  # Approximation
-        else:
-            kcal = 2600.0  # Homme générique
-    elif sex == 'Femme':
-        if age and age < 40:
-            kcal = 2200.0
-        elif age and age <= 60:
-            kcal = 2000.0
-        elif age and age > 60:
-            kcal = 1800.0  # Approximation
-        else:
-            kcal = 2100.0  # Femme générique
-
-    rdi = {
-        'kcal': round(kcal, 0),
-        'proteins': round((kcal * 0.15) / 4, 1),  # 1g prot = 4 kcal
-        'fat': round((kcal * 0.375) / 9, 1),  # 1g lipide = 9 kcal
-        'carbs': round((kcal * 0.475) / 4, 1),  # 1g glucide = 4 kcal
-        'fiber': 30.0,
-        'salt': 5.0  # Limite max recommandée
-    }
-    return rdi
+    return get_rdi_profiles().get(age, sex, activity)
 
 
 # --- FONCTIONS D'AFFICHAGE ---
@@ -394,50 +136,16 @@ def display_product_details(product: Product):
         key=f"quantity_input_{product.barcode}"
     )
 
-    # --- Calcul dynamique pour le tableau ---
-    ratio = quantity / 100.0
-    rdi = get_rdi(st.session_state.user_age, st.session_state.user_sex)
-
-    def calculate_pct(nutrient_val, rdi_val):
-        if nutrient_val is None or rdi_val is None or rdi_val == 0:
-            return "N/A"
-        pct = (nutrient_val / rdi_val) * 100
-        return f"{pct:.1f}%"
-
-    energy_port = product.energy_kcal * ratio if product.energy_kcal else None
-    prot_port = product.proteins * ratio if product.proteins else None
-    carbs_port = product.carbohydrates * ratio if product.carbohydrates else None
-    fat_port = product.fat * ratio if product.fat else None
-    fiber_port = product.fiber * ratio if product.fiber else None
-    salt_port = product.salt * ratio if product.salt else None
+    # --- Calcul vectorisé pour le tableau ---
+    rdi = get_rdi(st.session_state.user_age, st.session_state.user_sex, st.session_state.user_activity)
+    analysis = nutrient_engine.analyze([product], [quantity], rdi)
 
     # --- Affichage en Tableau (avec % AJR) ---
     data = {
-        "Composant": ["Énergie (kcal)", "Protéines (g)", "Glucides (g)", "Lipides (g)", "Fibres (g)", "Sel (g)"],
-        "Pour 100g": [
-            f"{product.energy_kcal:.1f}" if product.energy_kcal else "N/A",
-            f"{product.proteins:.1f}" if product.proteins else "N/A",
-            f"{product.carbohydrates:.1f}" if product.carbohydrates else "N/A",
-            f"{product.fat:.1f}" if product.fat else "N/A",
-            f"{product.fiber:.1f}" if product.fiber else "N/A",
-            f"{product.salt:.1f}" if product.salt else "N/A",
-        ],
-        f"Pour {quantity}g (Portion)": [
-            f"{energy_port:.1f}" if energy_port is not None else "N/A",
-            f"{prot_port:.1f}" if prot_port is not None else "N/A",
-            f"{carbs_port:.1f}" if carbs_port is not None else "N/A",
-            f"{fat_port:.1f}" if fat_port is not None else "N/A",
-            f"{fiber_port:.1f}" if fiber_port is not None else "N/A",
-            f"{salt_port:.1f}" if salt_port is not None else "N/A",
-        ],
-        "% AJR (Portion)": [
-            calculate_pct(energy_port, rdi['kcal']),
-            calculate_pct(prot_port, rdi['proteins']),
-            calculate_pct(carbs_port, rdi['carbs']),
-            calculate_pct(fat_port, rdi['fat']),
-            calculate_pct(fiber_port, rdi['fiber']),
-            calculate_pct(salt_port, rdi['salt']),
-        ]
+        "Composant": [nutrient_engine.NUTRIENT_LABELS[name] for name in nutrient_engine.NUTRIENTS],
+        "Pour 100g": nutrient_engine.format_values(analysis.per_100g[0]),
+        f"Pour {quantity}g (Portion)": nutrient_engine.format_values(analysis.portions[0]),
+        "% AJR (Portion)": nutrient_engine.format_values(analysis.percent_rdi[0], "{:.1f}%"),
     }
 
     df = pd.DataFrame(data)
@@ -462,6 +170,7 @@ def display_product_details(product: Product):
         try:
             # Et 'quantity' est passée ici pour l'enregistrement
             tracker.add_consumption(product, quantity)
+            prefetcher.warm()
             st.success(f"✅ {product.name} ({quantity}g) ajouté à votre journal !")
             st.balloons()
         except Exception as e:
@@ -481,6 +190,8 @@ if 'user_age' not in st.session_state:
     st.session_state.user_age = None
 if 'user_sex' not in st.session_state:
     st.session_state.user_sex = None
+if 'user_activity' not in st.session_state:
+    st.session_state.user_activity = DEFAULT_ACTIVITY
 
 # --- BARRE LATÉRALE (Navigation) ---
 with st.sidebar:
@@ -519,6 +230,14 @@ with st.sidebar:
     )
     st.session_state.user_age = age_input if age_input > 0 else None
 
+    activity_options = list(get_rdi_profiles().activity_levels)
+    st.session_state.user_activity = st.selectbox(
+        "Niveau d'activité",
+        options=activity_options,
+        index=activity_options.index(st.session_state.user_activity),
+        format_func=str.capitalize
+    )
+
     st.divider()
 
     with st.expander("Test Connexion"):
@@ -544,13 +263,9 @@ if page == "🔍 Rechercher un produit":
             # Ce bloc n'est exécuté QUE au clic
             if submitted_barcode and barcode:
                 with st.spinner(f"Recherche du produit {barcode}..."):
-                    product_dict = api.get_product(barcode)
+                    product = api.get_product(barcode)
 
-                if product_dict:
-                    product = Product(**product_dict)
-                    st.session_state.current_product = product
-                else:
-                    st.session_state.current_product = None
+                st.session_state.current_product = product
                 st.session_state.search_results = []
 
     # --- Onglet 2: Recherche par Nom ---
@@ -563,7 +278,8 @@ if page == "🔍 Rechercher un produit":
             if submitted_name and query:
                 with st.spinner(f"Recherche de '{query}'..."):
                     results = api.search_products(query, page_size=15)
-                st.session_state.search_results = results
+                # Seuls les champs affichés dans la liste sont gardés en session
+                st.session_state.search_results = [slim_search_result(prod) for prod in results]
                 st.session_state.current_product = None
                 if not results:
                     st.warning("Aucun produit trouvé pour cette recherche.")
@@ -588,13 +304,7 @@ if page == "🔍 Rechercher un produit":
 
                         if st.button("Voir les détails", key=f"details_{barcode}_{i}"):
                             with st.spinner(f"Chargement de {name}..."):
-                                product_dict = api.get_product(barcode)
-
-                                if product_dict:
-                                    product = Product(**product_dict)
-                                    st.session_state.current_product = product
-                                else:
-                                    st.session_state.current_product = None
+                                st.session_state.current_product = api.get_product(barcode)
 
                                 st.session_state.search_results = []
                                 st.rerun()
@@ -627,31 +337,29 @@ elif page == "📅 Rapport Journalier":
         # --- Comparaison AJR (identique) ---
         age = st.session_state.user_age
         sex = st.session_state.user_sex
-        rdi = get_rdi(age, sex)
+        rdi = get_rdi(age, sex, st.session_state.user_activity)
         if age or sex:
             st.subheader(f"Comparaison avec vos AJR (estimés à {rdi['kcal']} kcal)")
         else:
             st.subheader(f"Comparaison avec les AJR par défaut ({rdi['kcal']} kcal)")
 
 
-        def get_percent(consumed, recommended):
-            if recommended > 0: return consumed / recommended
-            return 0.0
-
+        # Ratios consommé / AJR des quatre totaux en une opération
+        totals = np.array([summary['total_kcal'], summary['total_proteins'],
+                           summary['total_carbs'], summary['total_fat']])
+        kcal_percent, prot_percent, carbs_percent, fat_percent = np.nan_to_num(
+            nutrient_engine.percent_rdi(totals, rdi, REPORT_NUTRIENTS) / 100.0
+        )
 
-        kcal_percent = get_percent(summary['total_kcal'], rdi['kcal'])
         st.progress(min(kcal_percent, 1.0), text=f"⚡ **Énergie :** {summary['total_kcal']} / {rdi['kcal']} kcal")
         if kcal_percent > 1.0:
             st.warning(f"Dépassement de {(kcal_percent - 1.0) * 100 :.0f}% des AJR en calories.")
 
         cols_report = st.columns(3)
-        prot_percent = get_percent(summary['total_proteins'], rdi['proteins'])
         cols_report[0].progress(min(prot_percent, 1.0),
                                 text=f"💪 **Protéines :** {summary['total_proteins']} / {rdi['proteins']} g")
-        carbs_percent = get_percent(summary['total_carbs'], rdi['carbs'])
         cols_report[1].progress(min(carbs_percent, 1.0),
                                 text=f"🍚 **Glucides :** {summary['total_carbs']} / {rdi['carbs']} g")
-        fat_percent = get_percent(summary['total_fat'], rdi['fat'])
         cols_report[2].progress(min(fat_percent, 1.0), text=f"🥑 **Lipides :** {summary['total_fat']} / {rdi['fat']} g")
 
         st.divider()
@@ -690,33 +398,72 @@ elif page == "📜 Historique":
 
     days = st.number_input("Afficher les N derniers jours", min_value=1, max_value=90, value=7)
 
-    history = tracker.get_history(days)
-
-    if not history:
-        st.info(f"Aucune consommation enregistrée sur les {days} derniers jours.")
+    group_options = {"Aucun": None, "Jour": "day", "Produit": "product", "Repas": "meal"}
+    group_label = st.radio("Regrouper par", list(group_options), horizontal=True)
+    group_by = group_options[group_label]
+
+    # Pagination par curseur : pile des curseurs des pages déjà vues
+    history_key = (days, group_by)
+    if st.session_state.get('history_key') != history_key:
+        st.session_state.history_key = history_key
+        st.session_state.history_cursors = [None]
+    cursors = st.session_state.history_cursors
+
+    if group_by:
+        offset = (len(cursors) - 1) * HISTORY_PAGE_SIZE
+        groups = tracker.get_history_grouped(days, group_by, limit=HISTORY_PAGE_SIZE + 1, offset=offset)
+        has_next = len(groups) > HISTORY_PAGE_SIZE
+        groups = groups[:HISTORY_PAGE_SIZE]
+
+        if not groups:
+            st.info(f"Aucune consommation enregistrée sur les {days} derniers jours.")
+        else:
+            df_groups = pd.DataFrame([{
+                group_label: g['label'],
+                "Entrées": g['num_entries'],
+                "Quantité totale": f"{g['total_quantity']:.0f}",
+                "Énergie (kcal)": f"{g['total_kcal']:.0f}",
+            } for g in groups])
+            st.dataframe(df_groups, hide_index=True, use_container_width=True)
     else:
-        st.subheader(f"Affichage des {len(history)} dernières consommations")
+        entries, next_cursor = tracker.get_history_page(days, limit=HISTORY_PAGE_SIZE, cursor=cursors[-1])
+        has_next = next_cursor is not None
 
-        for entry in history:
-            timestamp = datetime.fromisoformat(entry['timestamp'])
+        if not entries:
+            st.info(f"Aucune consommation enregistrée sur les {days} derniers jours.")
+        else:
+            st.subheader(f"Page {len(cursors)} - {len(entries)} consommations")
+
+            for entry in entries:
+                timestamp = datetime.fromisoformat(entry['timestamp'])
+
+                with st.expander(f"**{timestamp.strftime('%d/%m/%Y %H:%M')}** - {entry['product_name']}"):
+                    st.write(f"**Produit :** {entry['product_name']}")
+                    st.write(f"**Quantité :** {entry['quantity']} {entry['unit']}")
 
-            with st.expander(f"**{timestamp.strftime('%d/%m/%Y %H:%M')}** - {entry['product_name']}"):
-                st.write(f"**Produit :** {entry['product_name']}")
-                st.write(f"**Quantité :** {entry['quantity']} {entry['unit']}")
+                    if entry['energy_kcal']:
+                        consumed_kcal = (entry['energy_kcal'] * entry['quantity']) / 100
+                        st.write(f"**Énergie (calculée) :** {consumed_kcal:.0f} kcal")
 
-                if entry['energy_kcal']:
-                    consumed_kcal = (entry['energy_kcal'] * entry['quantity']) / 100
-                    st.write(f"**Énergie (calculée) :** {consumed_kcal:.0f} kcal")
+                    st.caption(
+                        f"ID Entrée: {entry['id']} | Code-barre : {display(entry['barcode'])} | Nutri-Score : {entry['nutriscore'] or 'N/A'}")
 
-                st.caption(
-                    f"ID Entrée: {entry['id']} | Code-barre : {entry['barcode']} | Nutri-Score : {entry['nutriscore'] or 'N/A'}")
+                    # --- NOUVEAU : Bouton Supprimer ---
+                    if st.button("Supprimer cette entrée", key=f"del_{entry['id']}", type="primary"):
+                        tracker.delete_consumption_entry(entry['id'])
+                        st.success(f"Entrée {entry['id']} ({entry['product_name']}) supprimée.")
+                        time.sleep(1)  # Laisser le temps de lire le message
+                        st.rerun()
 
-                # --- NOUVEAU : Bouton Supprimer ---
-                if st.button("Supprimer cette entrée", key=f"del_{entry['id']}", type="primary"):
-                    tracker.delete_consumption_entry(entry['id'])
-                    st.success(f"Entrée {entry['id']} ({entry['product_name']}) supprimée.")
-                    time.sleep(1)  # Laisser le temps de lire le message
-                    st.rerun()
+    col_prev, col_next = st.columns(2)
+    with col_prev:
+        if len(cursors) > 1 and st.button("⬅️ Page précédente"):
+            cursors.pop()
+            st.rerun()
+    with col_next:
+        if has_next and st.button("Page suivante ➡️"):
+            cursors.append(next_cursor if not group_by else len(cursors))
+            st.rerun()
 
 # --- PAGE 4: À PROPOS DES SCORES ---
 elif page == "ℹ️ À propos des Scores":
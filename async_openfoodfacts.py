@@ -0,0 +1,388 @@
+"""
+Client OpenFoodFacts asynchrone (httpx)
+
+Équivalent coroutine de OpenFoodFactsAPI pour intégrer le backend
+nutritionnel dans un service asyncio : une seule connexion HTTP mutualisée,
+un sémaphore qui borne le nombre de requêtes simultanées, et la même
+politique de retry que la version synchrone (3 tentatives, backoff_factor=1,
+sur 429/500/502/503/504). Le même disjoncteur et le même budget de latence
+protègent le service pendant une panne d'OpenFoodFacts.
+
+INSTALLATION:
+pip install httpx
+
+UTILISATION:
+async with AsyncOpenFoodFactsAPI() as api:
+    product = await api.get_product("3017624010701")
+"""
+
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+try:
+    import httpx
+except ImportError:  # Dépendance optionnelle
+    httpx = None
+
+import openfoodfacts_common
+from barcodes import InvalidBarcodeError, display, normalize, to_ean
+from circuit_breaker import CircuitOpenError, LatencyBudgetExceeded
+from compression import ACCEPT_ENCODING
+from http_validators import NOT_MODIFIED, NOT_MODIFIED_STATUS, Fetched, Validators, unwrap
+from product_cache import MISS_ERROR, MISS_NOT_FOUND, ProductCache
+from product_model import ProductView
+from rate_limiter import THROTTLE_STATUSES, RateLimiter, parse_retry_after, shared_limiter
+from singleflight import AsyncSingleFlight
+
+
+class AsyncOpenFoodFactsAPI:
+    """Client API OpenFoodFacts asynchrone avec pool de connexions partagé"""
+
+    BASE_URL = openfoodfacts_common.BASE_URL
+    SEARCH_URL = openfoodfacts_common.SEARCH_URL
+    USER_AGENT = openfoodfacts_common.USER_AGENT
+    PRODUCT_FIELDS = openfoodfacts_common.PRODUCT_FIELDS
+    SEARCH_FIELDS = openfoodfacts_common.SEARCH_FIELDS
+
+    MAX_CONCURRENCY = 20
+    LATENCY_BUDGET = openfoodfacts_common.LATENCY_BUDGET
+
+    # Politique de retry identique à Retry(total=3, backoff_factor=1)
+    RETRY_TOTAL = 3
+    BACKOFF_FACTOR = 1
+    STATUS_FORCELIST = (429, 500, 502, 503, 504)
+
+    def __init__(self, base_url: Optional[str] = None, search_url: Optional[str] = None,
+                 max_concurrency: int = MAX_CONCURRENCY, cache: Optional[ProductCache] = None,
+                 latency_budget: Optional[float] = LATENCY_BUDGET,
+                 limiter: Optional[RateLimiter] = None):
+        """
+        Args:
+            base_url: URL de l'API v2 (serveur de test local par exemple)
+            search_url: URL du serveur de recherche cgi/search.pl
+            max_concurrency: Nombre maximal de requêtes simultanées
+            cache: Cache produits persistant optionnel
+            latency_budget: Attente maximale (s) d'un appel, retries compris
+            limiter: Limiteur de débit par hôte (par défaut celui du processus)
+        """
+        if httpx is None:
+            raise ImportError("httpx est requis pour le client asynchrone : pip install httpx")
+
+        self.base_url = base_url or self.BASE_URL
+        self.search_url = search_url or self.SEARCH_URL
+        self.cache = cache
+        self.breaker = openfoodfacts_common.circuit_breaker(latency_budget)
+        self.latency_budget = latency_budget
+        self.limiter = limiter if limiter is not None else shared_limiter()
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._inflight = AsyncSingleFlight()
+        self.client = httpx.AsyncClient(
+            headers={"User-Agent": self.USER_AGENT, "Accept-Encoding": ACCEPT_ENCODING},
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency
+            )
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Ferme le pool de connexions"""
+        await self.client.aclose()
+
+    async def _get(self, url: str, params: Dict, timeout: float,
+                   headers: Optional[Dict[str, str]] = None) -> "httpx.Response":
+        """
+        GET protégé par le disjoncteur et borné par le budget de latence
+
+        Le créneau du limiteur de débit est attendu avant de démarrer la
+        mesure (comme OpenFoodFactsClient._get). Seules les erreurs serveur
+        (5xx, timeouts, connexion) comptent comme des échecs du service.
+        """
+        self.breaker.before_call()
+        try:
+            wait = self.limiter.reserve(urlparse(url).hostname)
+            if wait > 0:
+                await asyncio.sleep(wait)
+        except BaseException:
+            self.breaker.cancel()
+            raise
+        start = time.monotonic()
+
+        try:
+            response = await asyncio.wait_for(
+                self._get_with_retry(url, params, timeout, headers), self.latency_budget
+            )
+        except asyncio.TimeoutError:
+            self.breaker.record(False, time.monotonic() - start)
+            raise LatencyBudgetExceeded(
+                f"Budget de latence dépassé ({self.latency_budget:.0f}s)"
+            ) from None
+        except httpx.HTTPStatusError as e:
+            self.breaker.record(e.response.status_code < 500, time.monotonic() - start)
+            raise
+        except BaseException:
+            self.breaker.record(False, time.monotonic() - start)
+            raise
+
+        self.breaker.record(True, time.monotonic() - start)
+        return response
+
+    async def _get_with_retry(self, url: str, params: Dict, timeout: float,
+                              headers: Optional[Dict[str, str]] = None) -> "httpx.Response":
+        """
+        GET avec retry et backoff exponentiel (hors sémaphore pendant l'attente)
+
+        Comme les retries de urllib3, chaque nouvelle tentative, déjà
+        espacée par le backoff, consomme un jeton du limiteur de débit.
+        """
+        host = urlparse(url).hostname
+        for attempt in range(self.RETRY_TOTAL + 1):
+            try:
+                if attempt:
+                    self.limiter.charge(host)
+
+                async with self._semaphore:
+                    response = await self.client.get(url, params=params, timeout=timeout,
+                                                     headers=headers)
+
+                if response.status_code in THROTTLE_STATUSES:
+                    self.limiter.penalize(host, parse_retry_after(response.headers.get("Retry-After")))
+
+                if response.status_code in self.STATUS_FORCELIST and attempt < self.RETRY_TOTAL:
+                    await asyncio.sleep(self._backoff(attempt, response))
+                    continue
+
+                # 304 : réponse attendue d'une requête conditionnelle
+                if response.status_code == NOT_MODIFIED_STATUS:
+                    return response
+
+                response.raise_for_status()
+                return response
+
+            except httpx.TransportError:
+                if attempt >= self.RETRY_TOTAL:
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+
+    def _backoff(self, attempt: int, response: Optional["httpx.Response"] = None) -> float:
+        """Délai avant la tentative suivante (Retry-After prioritaire, comme urllib3)"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return float(retry_after)
+
+        if attempt == 0:
+            return 0.0
+        return self.BACKOFF_FACTOR * (2 ** attempt)
+
+    async def get_product(self, barcode: str) -> Optional[ProductView]:
+        """Récupère les données d'un produit via son code-barre"""
+        try:
+            barcode = normalize(barcode)
+        except InvalidBarcodeError as e:
+            print(f"❌ {e}")
+            return None
+
+        if self.cache:
+            entry = self.cache.get(barcode)
+            if entry and not entry.stale:
+                return openfoodfacts_common.parse_product(barcode, entry.data)
+
+            miss = self.cache.get_miss(barcode)
+            if miss:
+                print(f"❌ Produit {display(barcode)} {miss.describe()}")
+                return None
+
+        try:
+            data = await self._fetch_product(barcode)
+
+            if data is None:
+                print(f"❌ Produit {display(barcode)} non trouvé dans la base OpenFoodFacts")
+                return None
+
+            return openfoodfacts_common.parse_product(barcode, data)
+
+        except CircuitOpenError as e:
+            print(f"🔌 OpenFoodFacts indisponible - {e}")
+            return None
+        except (httpx.TimeoutException, LatencyBudgetExceeded):
+            print(f"⏱️  Timeout - Le serveur met trop de temps à répondre")
+            return None
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"❌ Erreur API: {e}")
+            return None
+
+    async def get_products(self, barcodes: Iterable[str]) -> Tuple[List[Optional[ProductView]], Dict[str, str]]:
+        """
+        Récupère plusieurs produits simultanément
+
+        Les codes invalides sont écartés avant tout appel réseau ; les
+        saisies d'un même code sont regroupées.
+
+        Returns:
+            (produits dans l'ordre des codes fournis, None si échec,
+             dictionnaire code-barre fourni -> message d'erreur)
+        """
+        barcodes = list(barcodes)
+        keys: Dict[str, str] = {}  # code fourni -> clé canonique
+        failures: Dict[str, str] = {}
+
+        for barcode in dict.fromkeys(barcodes):
+            try:
+                keys[barcode] = normalize(barcode)
+            except InvalidBarcodeError as e:
+                failures[barcode] = str(e)
+
+        unique = list(dict.fromkeys(keys.values()))
+
+        async def _fetch(barcode: str) -> Optional[ProductView]:
+            if self.cache:
+                entry = self.cache.get(barcode)
+                if entry and not entry.stale:
+                    return openfoodfacts_common.parse_product(barcode, entry.data)
+
+                miss = self.cache.get_miss(barcode)
+                if miss:
+                    failures[barcode] = f"Produit {miss.describe()}"
+                    return None
+
+            try:
+                data = await self._fetch_product(barcode)
+            except CircuitOpenError as e:
+                failures[barcode] = str(e)
+                return None
+            except (httpx.TimeoutException, LatencyBudgetExceeded):
+                failures[barcode] = "Timeout"
+                return None
+            except (httpx.HTTPError, ValueError) as e:
+                failures[barcode] = f"Erreur API: {e}"
+                return None
+
+            if data is None:
+                failures[barcode] = "Produit non trouvé"
+                return None
+
+            return openfoodfacts_common.parse_product(barcode, data)
+
+        products = await asyncio.gather(*(_fetch(barcode) for barcode in unique))
+        results = dict(zip(unique, products))
+
+        errors = {barcode: failures[keys.get(barcode, barcode)] for barcode in dict.fromkeys(barcodes)
+                  if keys.get(barcode, barcode) in failures}
+        return [results.get(keys.get(barcode)) for barcode in barcodes], errors
+
+    async def _fetch_product(self, barcode: str) -> Optional[Dict]:
+        """Appel réseau regroupé entre les demandes simultanées du même code-barre"""
+        barcode = normalize(barcode)
+        return await self._inflight.do(("product", barcode), self._load_product, barcode)
+
+    async def _load_product(self, barcode: str) -> Optional[Dict]:
+        """
+        Appel réseau d'un regroupement ; son résultat ou son échec est
+        enregistré une seule fois dans le cache, quel que soit le nombre
+        de demandeurs
+
+        Une entrée périmée est revalidée par une requête conditionnelle.
+        """
+        validators = self.cache.get_validators(barcode) if self.cache else None
+        try:
+            result = await self._request_product(barcode, validators)
+        except (httpx.HTTPError, LatencyBudgetExceeded, ValueError):
+            if self.cache:
+                self.cache.put_miss(barcode, MISS_ERROR)
+            raise
+
+        if result is NOT_MODIFIED:
+            return self.cache.refresh(barcode)
+
+        data, validators = unwrap(result)
+        if self.cache:
+            if data is None:
+                self.cache.put_miss(barcode, MISS_NOT_FOUND)
+            else:
+                self.cache.put(barcode, data, validators)
+        return data
+
+    async def _request_product(self, barcode: str, validators: Optional[Validators] = None):
+        """
+        Interroge l'API pour un code-barre
+
+        Returns:
+            Fetched(données, validateurs), NOT_MODIFIED ou None (produit inconnu)
+        """
+        url = f"{self.base_url}/product/{to_ean(normalize(barcode))}"
+        headers = validators.request_headers() if validators else None
+        try:
+            response = await self._get(url, {"fields": self.PRODUCT_FIELDS}, timeout=20,
+                                       headers=headers)
+        except httpx.HTTPStatusError as e:
+            # API v2 : produit inconnu = 404 (avec status 0)
+            if e.response.status_code == openfoodfacts_common.PRODUCT_NOT_FOUND_STATUS:
+                return None
+            raise
+        if response.status_code == NOT_MODIFIED_STATUS:
+            return NOT_MODIFIED
+        data = response.json()
+
+        if data.get("status") != 1:
+            return None
+
+        return Fetched(data["product"], Validators.from_headers(response.headers))
+
+    async def search_products(self, query: str, page_size: int = 20) -> List[Dict]:
+        """Recherche produits par mots-clés"""
+        try:
+            products = await self._inflight.do(
+                ("search", query, page_size), self._request_search, query, page_size
+            )
+
+            if products:
+                return products
+
+            return await self._search_alternative(query, page_size)
+
+        except CircuitOpenError:
+            return []
+        except (httpx.HTTPError, LatencyBudgetExceeded, ValueError):
+            return await self._search_alternative(query, page_size)
+
+    async def _request_search(self, query: str, page_size: int) -> List[Dict]:
+        """Interroge cgi/search.pl"""
+        url = f"{self.search_url}/cgi/search.pl"
+        params = {
+            "search_terms": query,
+            "search_simple": 1,
+            "action": "process",
+            "json": 1,
+            "page_size": min(page_size, 100),
+            "fields": self.SEARCH_FIELDS
+        }
+
+        response = await self._get(url, params, timeout=30)
+        return response.json().get("products", [])
+
+    async def _search_alternative(self, query: str, page_size: int = 20) -> List[Dict]:
+        """Méthode alternative de recherche"""
+        url = f"{self.base_url}/search"
+        if query.isdigit() and len(query) >= 8:
+            params = {"code": query, "page_size": 1, "fields": self.SEARCH_FIELDS}
+        else:
+            params = {
+                "page_size": min(page_size, 50),
+                "fields": self.SEARCH_FIELDS,
+                "brands_tags": query.lower().replace(" ", "-")
+            }
+
+        try:
+            response = await self._get(url, params, timeout=20)
+            return response.json().get("products", [])
+        except Exception:
+            return []
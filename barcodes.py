@@ -0,0 +1,105 @@
+"""
+Codes-barres : normalisation, validation et forme canonique (GTIN-14)
+
+Les codes saisis arrivent sous plusieurs formes pour un même produit :
+EAN-8, EAN-13, UPC-A avec ou sans zéro initial, espaces ou tirets. Ils sont
+ramenés à une clé canonique unique, le GTIN-14 (complété par des zéros à
+gauche), utilisée par le cache produits, le miroir local et le journal de
+consommation :
+
+    "3017620422003"      -> "03017620422003"  (EAN-13)
+    "0 12345 67890 5"    -> "00012345678905"  (UPC-A)
+    "012345678905"       -> "00012345678905"  (même UPC-A, zéro initial)
+    "96385074"           -> "00000096385074"  (EAN-8)
+
+La clé de contrôle (modulo 10, poids 3/1) est vérifiée : un code invalide
+lève InvalidBarcodeError avant tout appel réseau. Les URL de l'API et
+l'affichage utilisent la forme EAN-13 / EAN-8 (to_ean).
+
+Un code de 8 chiffres est toujours lu comme un EAN-8 (les UPC-E compressés
+ne sont pas développés).
+"""
+
+import re
+from typing import Optional
+
+# Longueurs GTIN acceptées : EAN-8, UPC-A, EAN-13, GTIN-14
+GTIN_LENGTHS = (8, 12, 13, 14)
+GTIN14_LENGTH = 14
+
+# Séparateurs tolérés dans la saisie
+_SEPARATORS = re.compile(r"[\s\-]+")
+
+
+class InvalidBarcodeError(ValueError):
+    """Code-barre mal formé ou clé de contrôle incorrecte"""
+
+    def __init__(self, barcode, reason: str):
+        super().__init__(f"Code-barre invalide ({reason}) : {barcode!r}")
+        self.barcode = barcode
+        self.reason = reason
+
+
+def check_digit(body: str) -> str:
+    """Clé de contrôle GTIN des chiffres qui la précèdent"""
+    total = sum(int(digit) * (3 if i % 2 == 0 else 1)
+                for i, digit in enumerate(reversed(body)))
+    return str(-total % 10)
+
+
+def normalize(barcode) -> str:
+    """
+    Forme canonique GTIN-14 d'un code-barre saisi
+
+    Raises:
+        InvalidBarcodeError: caractères non numériques, longueur inconnue
+            ou clé de contrôle incorrecte
+    """
+    code = barcode if isinstance(barcode, str) else str(barcode)
+
+    # Chemin rapide : clé déjà canonique (appels internes)
+    if not (len(code) == GTIN14_LENGTH and code.isdigit()):
+        code = _SEPARATORS.sub("", code)
+        if not (code.isascii() and code.isdigit()):
+            raise InvalidBarcodeError(barcode, "caractères non numériques")
+        if len(code) not in GTIN_LENGTHS:
+            raise InvalidBarcodeError(barcode, f"{len(code)} chiffres")
+        code = code.zfill(GTIN14_LENGTH)
+
+    if not code.isascii():
+        raise InvalidBarcodeError(barcode, "caractères non numériques")
+    if check_digit(code[:-1]) != code[-1]:
+        raise InvalidBarcodeError(barcode, "clé de contrôle incorrecte")
+    return code
+
+
+def canonical_or_none(barcode) -> Optional[str]:
+    """Forme canonique, ou None si le code est invalide"""
+    if barcode is None:
+        return None
+    try:
+        return normalize(barcode)
+    except InvalidBarcodeError:
+        return None
+
+
+def is_valid(barcode) -> bool:
+    return canonical_or_none(barcode) is not None
+
+
+def to_ean(canonical: str) -> str:
+    """
+    Forme courte d'une clé GTIN-14 : EAN-8, EAN-13 (UPC-A précédé d'un
+    zéro, comme OpenFoodFacts) ou GTIN-14 si l'indicateur n'est pas nul
+    """
+    if canonical.startswith("000000"):
+        return canonical[6:]
+    if canonical.startswith("0"):
+        return canonical[1:]
+    return canonical
+
+
+def display(barcode) -> str:
+    """Forme d'affichage (EAN) d'un code valide, le code tel quel sinon"""
+    canonical = canonical_or_none(barcode)
+    return to_ean(canonical) if canonical else str(barcode)
@@ -0,0 +1,187 @@
+"""
+Disjoncteur (circuit breaker) et budget de latence pour les appels réseau
+
+Lors d'une panne d'OpenFoodFacts, chaque action bloquait jusqu'au timeout
+(20 à 30 s) plus les tentatives de retry. Le disjoncteur observe les derniers
+appels (taux d'erreur et latence p95) :
+- fermé : les appels passent normalement
+- ouvert : trop d'échecs ou d'appels lents, les appels échouent
+  immédiatement (CircuitOpenError) et l'application se rabat sur le cache
+  ou le miroir local
+- semi-ouvert : après reset_timeout, un seul appel de test est autorisé ;
+  son succès referme le circuit, son échec le rouvre
+
+Le budget de latence borne l'attente d'un appel interactif : l'appel est
+exécuté dans un thread et abandonné (LatencyBudgetExceeded) au-delà du délai.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional
+
+
+class CircuitOpenError(RuntimeError):
+    """Appel refusé : le circuit est ouvert"""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"Service indisponible, nouvel essai dans {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+class LatencyBudgetExceeded(TimeoutError):
+    """L'appel a dépassé son budget de latence"""
+
+
+class CircuitBreaker:
+    """Disjoncteur sur fenêtre glissante des derniers appels"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    MAX_WORKERS = 16
+
+    def __init__(self, window: int = 20, min_calls: int = 5,
+                 error_threshold: float = 0.5, latency_threshold: float = 10.0,
+                 reset_timeout: float = 30.0):
+        """
+        Args:
+            window: Nombre de derniers appels observés
+            min_calls: Appels nécessaires avant de pouvoir ouvrir le circuit
+            error_threshold: Taux d'erreur (0-1) qui ouvre le circuit
+            latency_threshold: Latence p95 (s) qui ouvre le circuit
+            reset_timeout: Durée (s) d'ouverture avant l'appel de test
+        """
+        self.min_calls = min_calls
+        self.error_threshold = error_threshold
+        self.latency_threshold = latency_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._calls = deque(maxlen=window)  # (succès, latence)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def before_call(self):
+        """Vérifie qu'un appel est autorisé (CircuitOpenError sinon)"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+
+            elapsed = time.monotonic() - self._opened_at
+            if self._state == self.OPEN and elapsed >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+
+            raise CircuitOpenError(max(self.reset_timeout - elapsed, 0))
+
+    def cancel(self):
+        """Appel autorisé par before_call mais finalement pas effectué"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record(self, success: bool, latency: float):
+        """Enregistre le résultat d'un appel et met à jour l'état"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                if success and latency < self.latency_threshold:
+                    self._state = self.CLOSED
+                    self._calls.clear()
+                else:
+                    self._open()
+                return
+
+            self._calls.append((success, latency))
+            if self._state == self.CLOSED and self._should_open():
+                self._open()
+
+    def _should_open(self) -> bool:
+        if len(self._calls) < self.min_calls:
+            return False
+        return (self._error_rate() >= self.error_threshold
+                or self._p95() >= self.latency_threshold)
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+
+    def _error_rate(self) -> float:
+        if not self._calls:
+            return 0.0
+        return sum(1 for success, _ in self._calls if not success) / len(self._calls)
+
+    def _p95(self) -> float:
+        if not self._calls:
+            return 0.0
+        latencies = sorted(latency for _, latency in self._calls)
+        return latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+
+    def stats(self) -> Dict[str, Any]:
+        """État, taux d'erreur et latence p95 de la fenêtre courante"""
+        with self._lock:
+            return {
+                "state": self._state,
+                "calls": len(self._calls),
+                "error_rate": round(self._error_rate(), 3),
+                "p95_latency": round(self._p95(), 3),
+            }
+
+    def call(self, fn: Callable, *args, budget: Optional[float] = None,
+             acquire: Optional[Callable[[], Any]] = None, **kwargs) -> Any:
+        """
+        Exécute fn(*args, **kwargs) sous la protection du disjoncteur
+
+        Args:
+            budget: Attente maximale (s) ; au-delà LatencyBudgetExceeded est
+                levée (l'appel en cours se termine en arrière-plan)
+            acquire: Attente préalable d'un créneau (limiteur de débit),
+                une fois l'appel autorisé ; exclue de la latence mesurée et
+                du budget, qui ne concernent que le service appelé
+        """
+        self.before_call()
+        if acquire is not None:
+            try:
+                acquire()
+            except BaseException:
+                self.cancel()
+                raise
+        start = time.monotonic()
+
+        try:
+            if budget is None:
+                result = fn(*args, **kwargs)
+            else:
+                future = self._get_executor().submit(fn, *args, **kwargs)
+                try:
+                    result = future.result(timeout=budget)
+                except FutureTimeout:
+                    raise LatencyBudgetExceeded(
+                        f"Budget de latence dépassé ({budget:.0f}s)"
+                    ) from None
+        except BaseException:
+            self.record(False, time.monotonic() - start)
+            raise
+
+        self.record(True, time.monotonic() - start)
+        return result
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.MAX_WORKERS, thread_name_prefix="circuit-breaker"
+                )
+            return self._executor
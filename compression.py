@@ -0,0 +1,221 @@
+"""
+Compression : négociation HTTP et encodage compact des caches
+
+HTTP : ACCEPT_ENCODING annonce gzip et deflate, plus br et zstd lorsque les
+modules brotli / zstandard sont installés (urllib3 ne propose que ce qu'il
+sait décoder). Les réponses sont décompressées de façon transparente.
+
+Caches : les charges JSON (produits, résultats de recherche) sont stockées
+compressées, précédées d'un octet indiquant le codec :
+- "d" + identifiant (4 octets) : zstd avec dictionnaire entraîné sur les
+  produits OpenFoodFacts ; une fiche produit ne fait que quelques centaines
+  d'octets, trop peu pour que la compression seule soit efficace, mais ses
+  clés et valeurs se répètent d'un produit à l'autre
+- "s" : zstd sans dictionnaire
+- "z" : zlib (module zstandard absent)
+Les anciennes entrées JSON en clair (TEXT) restent lisibles.
+
+Les dictionnaires sont conservés dans la table `dictionaries` de chaque base,
+afin que tous les processus qui la partagent puissent décoder ses entrées.
+
+INSTALLATION (optionnelle):
+pip install zstandard brotli
+"""
+
+import json
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from urllib3.util import make_headers
+
+try:
+    import zstandard
+except ImportError:  # Dépendance optionnelle : repli sur zlib
+    zstandard = None
+
+# Encodages acceptés par les sessions HTTP (ceux que urllib3 sait décoder)
+ACCEPT_ENCODING = make_headers(accept_encoding=True)["accept-encoding"]
+
+CODEC_ZSTD_DICT = b"d"
+CODEC_ZSTD = b"s"
+CODEC_ZLIB = b"z"
+
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+
+DICTIONARY_SIZE = 32 * 1024
+# Échantillons nécessaires à l'entraînement d'un dictionnaire
+MIN_TRAINING_SAMPLES = 500
+MAX_TRAINING_SAMPLES = 5000
+
+_DICT_ID = struct.Struct("<I")
+
+
+def dumps(obj: Any) -> bytes:
+    """JSON compact en UTF-8"""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def train_dictionary(samples: List[bytes], size: int = DICTIONARY_SIZE) -> Optional[bytes]:
+    """Dictionnaire zstd entraîné sur des charges JSON (None si impossible)"""
+    if zstandard is None or len(samples) < MIN_TRAINING_SAMPLES:
+        return None
+    try:
+        return zstandard.train_dictionary(size, samples).as_bytes()
+    except zstandard.ZstdError:
+        return None
+
+
+class PayloadCodec:
+    """Compresse et décompresse les charges JSON d'un cache"""
+
+    def __init__(self, loader: Optional[Callable[[int], Optional[bytes]]] = None):
+        """
+        Args:
+            loader: Lit un dictionnaire par identifiant ; appelé pour une
+                entrée écrite avec un dictionnaire entraîné par un autre
+                processus
+        """
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._dictionaries: Dict[int, Any] = {}
+        self._current: Optional[int] = None
+
+    @property
+    def has_dictionary(self) -> bool:
+        return self._current is not None
+
+    def add_dictionary(self, dict_id: int, data: bytes, current: bool = True):
+        """Enregistre un dictionnaire (utilisé à l'écriture si current)"""
+        if zstandard is None:
+            return
+        dictionary = zstandard.ZstdCompressionDict(data)
+        dictionary.precompute_compress(level=ZSTD_LEVEL)
+        with self._lock:
+            self._dictionaries[dict_id] = dictionary
+            if current:
+                self._current = dict_id
+
+    def _dictionary(self, dict_id: int):
+        with self._lock:
+            dictionary = self._dictionaries.get(dict_id)
+        if dictionary is None and self.loader is not None:
+            data = self.loader(dict_id)
+            if data is not None:
+                self.add_dictionary(dict_id, data, current=False)
+                with self._lock:
+                    dictionary = self._dictionaries.get(dict_id)
+        if dictionary is None:
+            raise ValueError(f"Dictionnaire de compression inconnu : {dict_id}")
+        return dictionary
+
+    def encode(self, obj: Any) -> bytes:
+        """Charge JSON compressée, précédée de son codec"""
+        raw = dumps(obj)
+
+        if zstandard is None:
+            return CODEC_ZLIB + zlib.compress(raw, ZLIB_LEVEL)
+
+        with self._lock:
+            dict_id = self._current
+            dictionary = self._dictionaries.get(dict_id) if dict_id is not None else None
+
+        # Compresseurs créés à chaque appel : ils ne sont pas thread-safe
+        if dictionary is not None:
+            compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dictionary,
+                                                  write_dict_id=False)
+            return CODEC_ZSTD_DICT + _DICT_ID.pack(dict_id) + compressor.compress(raw)
+
+        return CODEC_ZSTD + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+
+    def decode(self, payload) -> Any:
+        """
+        Décode une charge écrite par encode (ou du JSON en clair)
+
+        Raises:
+            ValueError: codec inconnu ou indisponible (entrée zstd lue sans
+                le module zstandard)
+        """
+        if isinstance(payload, str):
+            return json.loads(payload)
+
+        payload = bytes(payload)
+        codec, body = payload[:1], payload[1:]
+
+        try:
+            if codec == CODEC_ZLIB:
+                return json.loads(zlib.decompress(body))
+        except zlib.error as e:
+            raise ValueError(f"Entrée de cache corrompue : {e}") from None
+
+        if zstandard is None:
+            raise ValueError("Entrée compressée avec zstd : pip install zstandard")
+
+        try:
+            if codec == CODEC_ZSTD:
+                return json.loads(zstandard.ZstdDecompressor().decompress(body))
+
+            if codec == CODEC_ZSTD_DICT:
+                (dict_id,) = _DICT_ID.unpack_from(body)
+                decompressor = zstandard.ZstdDecompressor(dict_data=self._dictionary(dict_id))
+                return json.loads(decompressor.decompress(body[_DICT_ID.size:]))
+        except (zstandard.ZstdError, struct.error) as e:
+            raise ValueError(f"Entrée de cache corrompue : {e}") from None
+
+        raise ValueError(f"Codec de cache inconnu : {codec!r}")
+
+
+def init_dictionaries(conn: sqlite3.Connection):
+    """Crée la table des dictionnaires d'une base de cache"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS dictionaries (
+            id INTEGER PRIMARY KEY,
+            data BLOB NOT NULL,
+            created_at REAL NOT NULL
+        )
+    """)
+
+
+def load_codec(conn: sqlite3.Connection, lock: threading.Lock) -> PayloadCodec:
+    """Codec d'une base ; le dictionnaire le plus récent sert à l'écriture"""
+    def loader(dict_id: int) -> Optional[bytes]:
+        with lock:
+            row = conn.execute(
+                "SELECT data FROM dictionaries WHERE id = ?", (dict_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    codec = PayloadCodec(loader)
+    with lock:
+        row = conn.execute(
+            "SELECT id, data FROM dictionaries ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+    if row:
+        codec.add_dictionary(*row)
+    return codec
+
+
+def save_dictionary(conn: sqlite3.Connection, data: bytes) -> int:
+    """Enregistre un dictionnaire (dans la transaction courante) ; retourne son id"""
+    cursor = conn.execute(
+        "INSERT INTO dictionaries (data, created_at) VALUES (?, ?)", (data, time.time())
+    )
+    return cursor.lastrowid
+
+
+def training_samples(payloads: Iterable, codec: PayloadCodec,
+                     limit: int = MAX_TRAINING_SAMPLES) -> List[bytes]:
+    """JSON brut d'au plus `limit` entrées existantes, pour l'entraînement"""
+    samples = []
+    for payload in payloads:
+        try:
+            samples.append(dumps(codec.decode(payload)))
+        except ValueError:
+            continue
+        if len(samples) >= limit:
+            break
+    return samples
@@ -0,0 +1,110 @@
+"""
+Fixtures partagées : serveur OpenFoodFacts local (bouchon), cache produits,
+client synchrone branché sur le bouchon
+"""
+
+import json
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from nutrition_app_python_final import OpenFoodFactsAPI
+from product_cache import ProductCache
+from product_search import ProductSearchIndex
+from rate_limiter import RateLimiter
+
+NUTELLA = "3017620422003"
+NUTELLA_DATA = {
+    "product_name": "Nutella",
+    "brands": "Ferrero",
+    "nutrition_grades": "e",
+    "nutriments": {"energy-kcal_100g": 539},
+}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """
+    Répond comme /api/v2/product/<code> à partir de server.products, avec
+    ETag et requêtes conditionnelles
+    """
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        path = url.path
+        with server.lock:
+            server.requests.append(path)
+            server.fields.append(parse_qs(url.query).get("fields", [None])[0])
+            server.conditional.append(self.headers.get("If-None-Match"))
+            status = server.failures.pop(0) if server.failures else None
+
+        if status is not None:
+            return self._send(status, {"status": 0})
+
+        code = path.rsplit("/", 1)[-1]
+        product = server.products.get(code)
+        if product is None:
+            return self._send(server.not_found_status,
+                              {"code": code, "status": 0, "status_verbose": "product not found"})
+
+        # ETag dérivé du contenu : 304 si le client a déjà cette version
+        etag = f'"{zlib.crc32(json.dumps(product, sort_keys=True).encode()):x}"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, None, etag)
+        return self._send(200, {"code": code, "status": 1, "product": product}, etag)
+
+    def _send(self, status: int, body: Optional[dict], etag: Optional[str] = None):
+        payload = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        if body is not None:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.conditional = []  # If-None-Match de chaque requête
+    server.fields = []  # projection (paramètre fields) de chaque requête
+    server.failures = []  # statuts renvoyés avant les réponses normales
+    server.products = {NUTELLA: NUTELLA_DATA}
+    server.not_found_status = 404  # API v2 ; 200 pour l'ancienne API
+    server.base_url = f"http://127.0.0.1:{server.server_port}/api/v2"
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ProductCache(str(tmp_path / "cache.db"))
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def api(stub, cache, tmp_path):
+    # Limiteur sans budget : les tests ne doivent pas attendre
+    search_index = ProductSearchIndex(str(tmp_path / "search.db"))
+    api = OpenFoodFactsAPI(cache=cache, search_index=search_index,
+                           limiter=RateLimiter(budgets={}, default=None))
+    api.BASE_URL = stub.base_url
+    yield api
+    api.executor.shutdown()
+    search_index.close()
@@ -0,0 +1,219 @@
+"""
+Export analytique du journal de consommation - Apache Arrow / Parquet
+
+Transfère la table `consumption` vers un fichier colonnaire sans passer par
+des dictionnaires Python : le curseur SQLite est lu par blocs (fetchmany)
+convertis en RecordBatch Arrow de taille fixe, écrits au fil de l'eau.
+La mémoire utilisée reste bornée par la taille d'un bloc, quelle que soit
+la longueur du journal.
+
+Le chargement relit le fichier par mmap et produit un DataFrame pandas
+adossé directement aux tampons Arrow (types pd.ArrowDtype, sans copie).
+
+Formats (selon l'extension du fichier de sortie):
+- .parquet : compressé, pour l'archivage et l'échange
+- .arrow / .feather / .ipc : Arrow IPC non compressé, relu sans copie
+
+INSTALLATION:
+pip install pyarrow pandas
+
+UTILISATION:
+python consumption_export.py journal.parquet
+python consumption_export.py journal.arrow --db nutrition_data.db --start 2024-01-01
+
+Dans un notebook :
+    from consumption_export import load_consumption
+    df = load_consumption("journal.arrow")
+"""
+
+import argparse
+import sqlite3
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Dépendance optionnelle
+    pa = None
+    pq = None
+
+
+# Colonnes exportées (dans l'ordre du SELECT) et type Arrow correspondant
+COLUMNS = [
+    ("id", "int64"),
+    ("barcode", "string"),
+    ("product_name", "string"),
+    ("quantity", "float64"),
+    ("unit", "string"),
+    ("timestamp", "string"),
+    ("day", "string"),
+    ("nutriscore", "string"),
+    ("energy_kcal", "float64"),
+    ("proteins", "float64"),
+    ("carbohydrates", "float64"),
+    ("fat", "float64"),
+    ("nova_group", "int8"),
+]
+
+BATCH_SIZE = 65536
+IPC_SUFFIXES = (".arrow", ".feather", ".ipc")
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow est requis pour l'export analytique : pip install pyarrow pandas")
+
+
+def _schema() -> "pa.Schema":
+    """Schéma Arrow du journal (horodatage et jour typés)"""
+    fields = []
+    for name, type_name in COLUMNS:
+        if name == "timestamp":
+            fields.append(pa.field(name, pa.timestamp("us")))
+        elif name == "day":
+            fields.append(pa.field(name, pa.date32()))
+        else:
+            fields.append(pa.field(name, getattr(pa, type_name)()))
+    return pa.schema(fields)
+
+
+def iter_record_batches(db_path: str = "nutrition_data.db", batch_size: int = BATCH_SIZE,
+                        start_date: Optional[str] = None,
+                        end_date: Optional[str] = None) -> Iterator["pa.RecordBatch"]:
+    """
+    Lit la table consumption par blocs de batch_size lignes
+
+    Args:
+        db_path: Base SQLite du journal (ouverte en lecture seule)
+        start_date / end_date: Bornes incluses YYYY-MM-DD (index sur day)
+    """
+    _require_pyarrow()
+    schema = _schema()
+
+    conditions, params = [], []
+    if start_date:
+        conditions.append("day >= ?")
+        params.append(start_date)
+    if end_date:
+        conditions.append("day <= ?")
+        params.append(end_date)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    conn = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        cursor = conn.execute(f"""
+            SELECT {', '.join(name for name, _ in COLUMNS)}
+            FROM consumption
+            {where}
+            ORDER BY day, timestamp, id
+        """, params)
+
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+
+            # Transposition lignes -> colonnes, puis conversion vectorisée
+            # des dates ISO par Arrow
+            arrays = []
+            for (name, type_name), values in zip(COLUMNS, zip(*rows)):
+                array = pa.array(values, type=getattr(pa, type_name)())
+                arrays.append(array.cast(schema.field(name).type))
+
+            yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+    finally:
+        conn.close()
+
+
+def export_consumption(output_path: str, db_path: str = "nutrition_data.db",
+                       batch_size: int = BATCH_SIZE, start_date: Optional[str] = None,
+                       end_date: Optional[str] = None, compression: str = "zstd") -> int:
+    """
+    Exporte le journal vers Parquet ou Arrow IPC (selon l'extension)
+
+    Chaque bloc devient un row group Parquet (ou un batch IPC).
+
+    Returns:
+        Nombre de lignes exportées
+    """
+    _require_pyarrow()
+    schema = _schema()
+    output_path = Path(output_path)
+    rows = 0
+
+    batches = iter_record_batches(db_path, batch_size, start_date, end_date)
+
+    if output_path.suffix.lower() in IPC_SUFFIXES:
+        # Non compressé : le chargement peut projeter le fichier en mémoire
+        with pa.OSFile(str(output_path), "wb") as sink:
+            with pa.ipc.new_file(sink, schema) as writer:
+                for batch in batches:
+                    writer.write_batch(batch)
+                    rows += batch.num_rows
+    else:
+        with pq.ParquetWriter(str(output_path), schema, compression=compression) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+
+    return rows
+
+
+def load_consumption(path: str, columns: Optional[List[str]] = None,
+                     arrow_dtypes: bool = True):
+    """
+    Charge un export dans un DataFrame pandas
+
+    Args:
+        columns: Sous-ensemble de colonnes à lire (lecture colonnaire)
+        arrow_dtypes: True pour des colonnes pd.ArrowDtype adossées aux
+            tampons Arrow (sans copie), False pour des types NumPy classiques
+    """
+    _require_pyarrow()
+    import pandas as pd
+
+    path = Path(path)
+
+    if path.suffix.lower() in IPC_SUFFIXES:
+        source = pa.memory_map(str(path), "r")
+        table = pa.ipc.open_file(source).read_all()
+        if columns:
+            table = table.select(columns)
+    else:
+        table = pq.read_table(str(path), columns=columns, memory_map=True)
+
+    if arrow_dtypes:
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+    return table.to_pandas(split_blocks=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Exporte le journal de consommation en Parquet ou Arrow IPC"
+    )
+    parser.add_argument("output", help="Fichier de sortie (.parquet, .arrow, .feather)")
+    parser.add_argument("--db", default="nutrition_data.db", help="Base SQLite du journal")
+    parser.add_argument("--start", help="Premier jour inclus (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Dernier jour inclus (YYYY-MM-DD)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help="Lignes par bloc Arrow / row group Parquet")
+    parser.add_argument("--compression", default="zstd",
+                        help="Compression Parquet (zstd, snappy, gzip, none)")
+
+    args = parser.parse_args()
+
+    print(f"📤 Export de {args.db} vers {args.output}...")
+    rows = export_consumption(
+        args.output,
+        db_path=args.db,
+        batch_size=args.batch_size,
+        start_date=args.start,
+        end_date=args.end,
+        compression=args.compression
+    )
+    print(f"✅ {rows} consommations exportées")
+
+
+if __name__ == "__main__":
+    main()
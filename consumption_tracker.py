@@ -0,0 +1,700 @@
+"""
+Journal de consommation - Stockage SQLite
+
+Gestionnaire d'historique partagé par l'application en ligne de commande
+(nutrition_app_python_final.py) et l'interface Streamlit (FoodappWeb.py).
+Les connexions sont ouvertes une fois par thread (voir sqlite_pool.py) au
+lieu d'un sqlite3.connect par appel.
+
+Le schéma évolue par migrations numérotées (PRAGMA user_version) appliquées
+à l'ouverture : une base nutrition_data.db existante est mise à niveau en
+place.
+
+Les codes-barres sont enregistrés sous leur forme canonique GTIN-14 (voir
+barcodes.py) : les agrégations par produit regroupent toutes les saisies
+d'un même code. Les codes invalides des saisies anciennes ou importées
+(codes internes de magasin) sont conservés tels quels.
+
+Statistiques par période (tableaux de bord « ce que vous mangez le plus ») :
+get_product_stats (classement par énergie, fréquence, quantité ou portion
+moyenne) et get_score_distribution (répartition Nutri-Score / NOVA), calculés
+en SQL sur un index couvrant, sans charger l'historique.
+
+IMPORT EN MASSE (CSV ou JSONL, une consommation par ligne):
+python consumption_tracker.py import journal.csv
+"""
+
+import argparse
+import csv
+import json
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from barcodes import canonical_or_none, normalize
+from sqlite_pool import SQLiteConnectionPool
+
+
+class ConsumptionTracker:
+    """Gestionnaire d'historique de consommation"""
+
+    INSERT_SQL = """
+        INSERT INTO consumption
+        (barcode, product_name, quantity, unit, timestamp, day, nutriscore,
+         energy_kcal, proteins, carbohydrates, fat, nova_group)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    def __init__(self, db_path: str = "nutrition_data.db"):
+        self.pool = SQLiteConnectionPool(db_path)
+        self.db_path = self.pool.db_path
+        self._init_database()
+
+    def _init_database(self):
+        """Initialise la base de données SQLite et applique les migrations"""
+        with self.pool.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS consumption (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    barcode TEXT NOT NULL,
+                    product_name TEXT,
+                    quantity REAL DEFAULT 100,
+                    unit TEXT DEFAULT 'g',
+                    timestamp TEXT NOT NULL,
+                    nutriscore TEXT,
+                    energy_kcal REAL,
+                    proteins REAL,
+                    carbohydrates REAL,
+                    fat REAL
+                )
+            """)
+
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for number, migration in enumerate(self.MIGRATIONS[version:], version + 1):
+                migration(conn)
+                conn.execute(f"PRAGMA user_version = {number}")
+
+    # --- MIGRATIONS DU SCHÉMA ---
+
+    @staticmethod
+    def _migrate_day_column(conn: sqlite3.Connection):
+        """
+        v1 : colonne `day` (AAAA-MM-JJ) indexée
+
+        Remplace les filtres WHERE DATE(timestamp) = ?, qui imposaient un
+        parcours complet de la table, par une recherche dans l'index.
+        """
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(consumption)")}
+        if "day" not in columns:
+            conn.execute("ALTER TABLE consumption ADD COLUMN day TEXT")
+
+        conn.execute("UPDATE consumption SET day = DATE(timestamp) WHERE day IS NULL")
+
+        # Lignes insérées sans `day` (anciennes versions de l'application)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS consumption_fill_day
+            AFTER INSERT ON consumption WHEN new.day IS NULL
+            BEGIN
+                UPDATE consumption SET day = DATE(new.timestamp) WHERE id = new.id;
+            END
+        """)
+
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_consumption_day ON consumption(day, timestamp)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_consumption_timestamp ON consumption(timestamp)")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_consumption_barcode_ts ON consumption(barcode, timestamp)"
+        )
+
+    @staticmethod
+    def _migrate_daily_totals(conn: sqlite3.Connection):
+        """
+        v2 : totaux journaliers matérialisés (table daily_totals)
+
+        Maintenus par triggers dans la même transaction que chaque insertion,
+        suppression ou modification de `consumption` : le rapport d'une
+        journée lit une seule ligne au lieu de sommer toutes les entrées.
+        """
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS daily_totals (
+                day TEXT PRIMARY KEY,
+                total_kcal REAL NOT NULL DEFAULT 0,
+                total_proteins REAL NOT NULL DEFAULT 0,
+                total_carbs REAL NOT NULL DEFAULT 0,
+                total_fat REAL NOT NULL DEFAULT 0,
+                num_products INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+
+        conn.execute("DELETE FROM daily_totals")
+        conn.execute("""
+            INSERT INTO daily_totals
+            (day, total_kcal, total_proteins, total_carbs, total_fat, num_products)
+            SELECT day,
+                   COALESCE(SUM(energy_kcal * quantity / 100), 0),
+                   COALESCE(SUM(proteins * quantity / 100), 0),
+                   COALESCE(SUM(carbohydrates * quantity / 100), 0),
+                   COALESCE(SUM(fat * quantity / 100), 0),
+                   COUNT(*)
+            FROM consumption
+            GROUP BY day
+        """)
+
+        # `day` peut encore être NULL au moment du trigger (trigger consumption_fill_day)
+        add_row = """
+            INSERT INTO daily_totals
+            (day, total_kcal, total_proteins, total_carbs, total_fat, num_products)
+            VALUES (
+                COALESCE(new.day, DATE(new.timestamp)),
+                COALESCE(new.energy_kcal * new.quantity / 100, 0),
+                COALESCE(new.proteins * new.quantity / 100, 0),
+                COALESCE(new.carbohydrates * new.quantity / 100, 0),
+                COALESCE(new.fat * new.quantity / 100, 0),
+                1
+            )
+            ON CONFLICT(day) DO UPDATE SET
+                total_kcal = total_kcal + excluded.total_kcal,
+                total_proteins = total_proteins + excluded.total_proteins,
+                total_carbs = total_carbs + excluded.total_carbs,
+                total_fat = total_fat + excluded.total_fat,
+                num_products = num_products + 1;
+        """
+        remove_row = """
+            UPDATE daily_totals SET
+                total_kcal = total_kcal - COALESCE(old.energy_kcal * old.quantity / 100, 0),
+                total_proteins = total_proteins - COALESCE(old.proteins * old.quantity / 100, 0),
+                total_carbs = total_carbs - COALESCE(old.carbohydrates * old.quantity / 100, 0),
+                total_fat = total_fat - COALESCE(old.fat * old.quantity / 100, 0),
+                num_products = num_products - 1
+            WHERE day = COALESCE(old.day, DATE(old.timestamp));
+            DELETE FROM daily_totals
+            WHERE day = COALESCE(old.day, DATE(old.timestamp)) AND num_products <= 0;
+        """
+
+        conn.executescript(f"""
+            CREATE TRIGGER IF NOT EXISTS daily_totals_insert
+            AFTER INSERT ON consumption BEGIN {add_row} END;
+
+            CREATE TRIGGER IF NOT EXISTS daily_totals_delete
+            AFTER DELETE ON consumption BEGIN {remove_row} END;
+
+            CREATE TRIGGER IF NOT EXISTS daily_totals_update
+            AFTER UPDATE OF day, timestamp, quantity, energy_kcal, proteins, carbohydrates, fat
+            ON consumption BEGIN {remove_row} {add_row} END;
+        """)
+
+    @staticmethod
+    def _migrate_canonical_barcodes(conn: sqlite3.Connection):
+        """
+        v3 : codes-barres ramenés à leur forme canonique GTIN-14
+
+        Un même produit saisi en EAN-13 et en UPC-A n'apparaît plus que sous
+        une clé (index idx_consumption_barcode_ts). Les codes invalides des
+        anciennes saisies sont conservés tels quels.
+        """
+        conn.create_function("gtin14", 1, canonical_or_none, deterministic=True)
+        conn.execute("""
+            UPDATE consumption SET barcode = gtin14(barcode)
+            WHERE gtin14(barcode) IS NOT NULL AND barcode <> gtin14(barcode)
+        """)
+
+    @staticmethod
+    def _migrate_product_stats(conn: sqlite3.Connection):
+        """
+        v4 : colonne `nova_group` et index des statistiques par produit
+
+        L'index couvre toutes les colonnes lues par get_product_stats et
+        get_score_distribution : une période se lit dans l'index seul, sans
+        accès aux lignes de la table. Les anciennes saisies n'ont pas de
+        groupe NOVA (NULL, compté comme « non renseigné »).
+        """
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(consumption)")}
+        if "nova_group" not in columns:
+            conn.execute("ALTER TABLE consumption ADD COLUMN nova_group INTEGER")
+
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_consumption_day_stats
+            ON consumption(day, barcode, quantity, energy_kcal, nutriscore, nova_group)
+        """)
+
+    @staticmethod
+    def _migrate_local_timestamps(conn: sqlite3.Connection):
+        """
+        v5 : horodatages importés avec un décalage horaire ramenés à l'heure
+        locale naïve, format de toutes les autres saisies
+
+        Les comparaisons de chaînes (historique, plages de dates) et l'export
+        Arrow supposent un format unique.
+        """
+        def convert(value):
+            try:
+                return local_timestamp(value)
+            except (TypeError, ValueError):
+                return value
+
+        conn.create_function("local_timestamp", 1, convert, deterministic=True)
+        conn.execute("""
+            UPDATE consumption
+            SET timestamp = local_timestamp(timestamp),
+                day = substr(local_timestamp(timestamp), 1, 10)
+            WHERE length(timestamp) > 19 AND local_timestamp(timestamp) <> timestamp
+        """)
+
+    MIGRATIONS = (
+        _migrate_day_column,
+        _migrate_daily_totals,
+        _migrate_canonical_barcodes,
+        _migrate_product_stats,
+        _migrate_local_timestamps,
+    )
+
+    def add_consumption(self, product, quantity: float = 100, unit: str = "g"):
+        """
+        Enregistre une consommation
+
+        Raises:
+            InvalidBarcodeError: code-barre du produit invalide
+        """
+        timestamp = datetime.now().isoformat()
+        barcode = normalize(product.barcode)
+
+        with self.pool.transaction() as conn:
+            conn.execute(self.INSERT_SQL, (
+                barcode,
+                product.name,
+                quantity,
+                unit,
+                timestamp,
+                timestamp[:10],
+                product.nutriscore or None,
+                product.energy_kcal,
+                product.proteins,
+                product.carbohydrates,
+                product.fat,
+                _nova(getattr(product, "nova_group", None))
+            ))
+
+    def add_consumptions(self, entries: Iterable[Dict], chunk_size: Optional[int] = None) -> int:
+        """
+        Enregistre plusieurs consommations (import d'un autre journal)
+
+        Args:
+            entries: Dictionnaires avec au minimum `barcode` (ramené à sa forme
+                canonique s'il est valide, conservé tel quel sinon), et optionnellement
+                product_name, quantity, unit, timestamp (ISO), nutriscore,
+                energy_kcal, proteins, carbohydrates, fat, nova_group
+            chunk_size: Nombre de lignes par transaction (None = une seule
+                transaction pour tout l'import)
+
+        Returns:
+            Nombre de consommations enregistrées
+        """
+        conn = self.pool.connection()
+        inserted = 0
+        chunk = []
+
+        for entry in entries:
+            chunk.append(self._entry_row(entry))
+
+            if chunk_size and len(chunk) >= chunk_size:
+                with conn:
+                    conn.executemany(self.INSERT_SQL, chunk)
+                inserted += len(chunk)
+                chunk = []
+
+        if chunk:
+            with conn:
+                conn.executemany(self.INSERT_SQL, chunk)
+            inserted += len(chunk)
+
+        return inserted
+
+    @staticmethod
+    def _entry_row(entry: Dict) -> tuple:
+        """Convertit une entrée d'import en ligne de la table consumption"""
+        barcode = str(entry.get("barcode") or "").strip()
+        if not barcode:
+            raise ValueError(f"Entrée sans code-barre : {entry}")
+        # Codes invalides (codes internes de magasin...) conservés tels quels,
+        # comme lors de la migration v3 : la ligne n'est pas perdue
+        barcode = canonical_or_none(barcode) or barcode
+
+        timestamp = local_timestamp(entry.get("timestamp") or datetime.now())
+
+        def _number(key: str, default: Optional[float] = None) -> Optional[float]:
+            value = entry.get(key)
+            return float(value) if value not in (None, "") else default
+
+        return (
+            barcode,
+            entry.get("product_name") or None,
+            _number("quantity", 100.0),
+            entry.get("unit") or "g",
+            timestamp,
+            timestamp[:10],
+            entry.get("nutriscore") or None,
+            _number("energy_kcal"),
+            _number("proteins"),
+            _number("carbohydrates"),
+            _number("fat"),
+            _nova(entry.get("nova_group"))
+        )
+
+    def get_daily_summary(self, date: Optional[str] = None) -> Dict:
+        """Calcule le résumé nutritionnel d'une journée"""
+        if date is None:
+            date = datetime.now().strftime("%Y-%m-%d")
+
+        row = self.pool.connection().execute("""
+            SELECT day, total_kcal, total_proteins, total_carbs, total_fat, num_products
+            FROM daily_totals
+            WHERE day = ?
+        """, (date,)).fetchone()
+
+        if row is None:
+            return self._format_summary(date, 0, 0, 0, 0, 0)
+        return self._format_summary(*row)
+
+    def get_daily_summaries(self, start_date: str, end_date: str) -> List[Dict]:
+        """Résumés des journées (avec consommations) entre deux dates incluses"""
+        rows = self.pool.connection().execute("""
+            SELECT day, total_kcal, total_proteins, total_carbs, total_fat, num_products
+            FROM daily_totals
+            WHERE day BETWEEN ? AND ?
+            ORDER BY day
+        """, (start_date, end_date)).fetchall()
+
+        return [self._format_summary(*row) for row in rows]
+
+    @staticmethod
+    def _format_summary(day: str, kcal: float, proteins: float, carbs: float,
+                        fat: float, num_products: int) -> Dict:
+        """Met en forme une ligne de daily_totals"""
+        return {
+            "date": day,
+            "total_kcal": round(kcal or 0, 1),
+            "total_proteins": round(proteins or 0, 1),
+            "total_carbs": round(carbs or 0, 1),
+            "total_fat": round(fat or 0, 1),
+            "num_products": num_products
+        }
+
+    def get_history(self, days: int = 7) -> List[Dict]:
+        """Récupère l'historique des N derniers jours"""
+        since = (datetime.now() - timedelta(days=days)).isoformat()
+
+        rows = self.pool.connection().execute("""
+            SELECT id, barcode, product_name, quantity, unit, timestamp,
+                   nutriscore, energy_kcal
+            FROM consumption
+            WHERE timestamp >= ?
+            ORDER BY timestamp DESC
+        """, (since,)).fetchall()
+
+        return [dict(row) for row in rows]
+
+    def get_history_page(self, days: int = 7, limit: int = 50,
+                         cursor: Optional[Tuple[str, int]] = None) -> Tuple[List[Dict], Optional[Tuple[str, int]]]:
+        """
+        Récupère une page de l'historique des N derniers jours (plus récent d'abord)
+
+        Pagination par curseur (timestamp, id) de la dernière ligne : chaque
+        page est une lecture bornée de l'index, quelle que soit sa position.
+
+        Returns:
+            (entrées de la page, curseur de la page suivante ou None)
+        """
+        since = (datetime.now() - timedelta(days=days)).isoformat()
+        # Sans curseur : borne supérieure à toute date ISO
+        last_timestamp, last_id = cursor or ("\uffff", 0)
+
+        rows = self.pool.connection().execute("""
+            SELECT id, barcode, product_name, quantity, unit, timestamp,
+                   nutriscore, energy_kcal
+            FROM consumption
+            WHERE timestamp >= ?
+              AND (timestamp, id) < (?, ?)
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+        """, (since, last_timestamp, last_id, limit + 1)).fetchall()
+
+        entries = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = (entries[-1]["timestamp"], entries[-1]["id"])
+
+        return entries, next_cursor
+
+    # Tranches horaires des repas pour le regroupement par repas
+    MEAL_CASE = """
+        CASE
+            WHEN CAST(substr(timestamp, 12, 2) AS INTEGER) < 11 THEN 'Petit-déjeuner'
+            WHEN CAST(substr(timestamp, 12, 2) AS INTEGER) < 15 THEN 'Déjeuner'
+            WHEN CAST(substr(timestamp, 12, 2) AS INTEGER) < 18 THEN 'Goûter'
+            ELSE 'Dîner'
+        END
+    """
+
+    def get_history_grouped(self, days: int = 7, group_by: str = "day",
+                            limit: int = 50, offset: int = 0) -> List[Dict]:
+        """
+        Historique agrégé côté SQL sur les N derniers jours
+
+        Args:
+            group_by: "day" (jour), "product" (code-barre) ou "meal" (repas)
+
+        Returns:
+            Groupes avec nombre d'entrées, quantité totale et énergie totale
+        """
+        keys = {
+            "day": ("day", "day", "day DESC"),
+            "product": ("barcode", "MAX(product_name)", "total_kcal DESC, barcode"),
+            "meal": (self.MEAL_CASE, self.MEAL_CASE, "MIN(substr(timestamp, 12, 5))"),
+        }
+        if group_by not in keys:
+            raise ValueError(f"Regroupement inconnu : {group_by}")
+
+        key, label, order = keys[group_by]
+        since = (datetime.now() - timedelta(days=days)).isoformat()
+
+        rows = self.pool.connection().execute(f"""
+            SELECT {key} AS grp,
+                   {label} AS label,
+                   COUNT(*) AS num_entries,
+                   SUM(quantity) AS total_quantity,
+                   COALESCE(SUM(energy_kcal * quantity / 100), 0) AS total_kcal
+            FROM consumption
+            WHERE timestamp >= ?
+            GROUP BY grp
+            ORDER BY {order}
+            LIMIT ? OFFSET ?
+        """, (since, limit, offset)).fetchall()
+
+        return [dict(row) for row in rows]
+
+    def get_likely_barcodes(self, limit: int = 20, days: int = 60,
+                            now: Optional[datetime] = None) -> List[str]:
+        """
+        Codes-barres les plus susceptibles d'être scannés prochainement
+
+        Chaque consommation des N derniers jours compte pour 1 / (1 + âge en
+        jours), doublé si elle a eu lieu à une heure proche (± 1 h) de
+        l'heure actuelle : produits fréquents, récents et habituels à ce
+        moment de la journée en tête.
+        """
+        now = now or datetime.now()
+        since = (now - timedelta(days=days)).isoformat()
+
+        rows = self.pool.connection().execute("""
+            SELECT barcode,
+                   SUM(
+                       (1.0 + (MIN(ABS(hour - :hour), 24 - ABS(hour - :hour)) <= 1))
+                       / (1.0 + julianday(:now) - julianday(timestamp))
+                   ) AS score
+            FROM (
+                SELECT barcode, timestamp,
+                       CAST(substr(timestamp, 12, 2) AS INTEGER) AS hour
+                FROM consumption
+                WHERE timestamp >= :since
+            )
+            GROUP BY barcode
+            ORDER BY score DESC
+            LIMIT :limit
+        """, {"hour": now.hour, "now": now.isoformat(), "since": since, "limit": limit}).fetchall()
+
+        return [row["barcode"] for row in rows]
+
+    # --- STATISTIQUES PAR PRODUIT ---
+
+    # Critères de classement de get_product_stats
+    PRODUCT_STATS_ORDER = {
+        "kcal": "total_kcal DESC, barcode",
+        "frequency": "num_entries DESC, total_kcal DESC, barcode",
+        "quantity": "total_quantity DESC, barcode",
+        "portion": "avg_quantity DESC, barcode",
+    }
+
+    def get_product_stats(self, start_date: str, end_date: str, order_by: str = "kcal",
+                          limit: int = 10) -> List[Dict]:
+        """
+        Statistiques par produit entre deux dates (AAAA-MM-JJ) incluses
+
+        Agrégation SQL sur l'index idx_consumption_day_stats ; seul le nom
+        des produits retenus est lu dans la table (saisie la plus récente).
+
+        Args:
+            order_by: "kcal" (énergie totale), "frequency" (nombre de
+                consommations), "quantity" (quantité totale) ou "portion"
+                (portion moyenne)
+            limit: Nombre de produits retournés
+
+        Returns:
+            Produits avec barcode, product_name, num_entries, total_quantity,
+            avg_quantity et total_kcal
+        """
+        if order_by not in self.PRODUCT_STATS_ORDER:
+            raise ValueError(f"Classement inconnu : {order_by}")
+
+        rows = self.pool.connection().execute(f"""
+            SELECT stats.*,
+                   (SELECT product_name FROM consumption AS c
+                    WHERE c.barcode = stats.barcode
+                    ORDER BY c.timestamp DESC LIMIT 1) AS product_name
+            FROM (
+                SELECT barcode,
+                       COUNT(*) AS num_entries,
+                       SUM(quantity) AS total_quantity,
+                       AVG(quantity) AS avg_quantity,
+                       COALESCE(SUM(energy_kcal * quantity / 100), 0) AS total_kcal
+                FROM consumption
+                WHERE day BETWEEN ? AND ?
+                GROUP BY barcode
+                ORDER BY {self.PRODUCT_STATS_ORDER[order_by]}
+                LIMIT ?
+            ) AS stats
+        """, (start_date, end_date, limit)).fetchall()
+
+        return [
+            {
+                "barcode": row["barcode"],
+                "product_name": row["product_name"],
+                "num_entries": row["num_entries"],
+                "total_quantity": round(row["total_quantity"] or 0, 1),
+                "avg_quantity": round(row["avg_quantity"] or 0, 1),
+                "total_kcal": round(row["total_kcal"], 1),
+            }
+            for row in rows
+        ]
+
+    def get_score_distribution(self, start_date: str, end_date: str) -> Dict[str, List[Dict]]:
+        """
+        Répartition des consommations par Nutri-Score et par groupe NOVA
+        entre deux dates (AAAA-MM-JJ) incluses
+
+        Une seule agrégation SQL (une ligne par couple de scores) sur l'index
+        idx_consumption_day_stats, ventilée ensuite par score.
+
+        Returns:
+            {"nutriscore": [...], "nova_group": [...]} ; chaque groupe
+            (None = non renseigné ou vide) avec num_entries, total_kcal et
+            kcal_share (part de l'énergie de la période, en %)
+        """
+        rows = self.pool.connection().execute("""
+            SELECT NULLIF(UPPER(nutriscore), '') AS nutriscore,
+                   nova_group,
+                   COUNT(*) AS num_entries,
+                   COALESCE(SUM(energy_kcal * quantity / 100), 0) AS total_kcal
+            FROM consumption
+            WHERE day BETWEEN ? AND ?
+            GROUP BY 1, 2
+        """, (start_date, end_date)).fetchall()
+
+        total_kcal = sum(row["total_kcal"] for row in rows)
+        distribution = {}
+        for key in ("nutriscore", "nova_group"):
+            groups: Dict = {}
+            for row in rows:
+                group = groups.setdefault(row[key], [0, 0.0])
+                group[0] += row["num_entries"]
+                group[1] += row["total_kcal"]
+
+            # Scores dans l'ordre (A -> E, 1 -> 4), non renseigné en dernier
+            scores = sorted(score for score in groups if score is not None)
+            if None in groups:
+                scores.append(None)
+
+            distribution[key] = [
+                {
+                    key: score,
+                    "num_entries": groups[score][0],
+                    "total_kcal": round(groups[score][1], 1),
+                    "kcal_share": round(100 * groups[score][1] / total_kcal, 1) if total_kcal else 0.0,
+                }
+                for score in scores
+            ]
+        return distribution
+
+    def delete_consumption_entry(self, entry_id: int):
+        """Supprime une entrée spécifique de la consommation par son ID"""
+        with self.pool.transaction() as conn:
+            conn.execute("DELETE FROM consumption WHERE id = ?", (entry_id,))
+
+    def delete_daily_summary(self, date_str: str):
+        """Supprime toutes les entrées pour une date donnée"""
+        with self.pool.transaction() as conn:
+            conn.execute("DELETE FROM consumption WHERE day = ?", (date_str,))
+
+    def get_daily_entries(self, date_str: str) -> List[Dict]:
+        """Récupère les entrées détaillées d'une journée"""
+        rows = self.pool.connection().execute("""
+            SELECT id, timestamp, product_name, quantity, unit,
+                   (energy_kcal * quantity / 100) as consumed_kcal
+            FROM consumption
+            WHERE day = ?
+            ORDER BY timestamp DESC
+        """, (date_str,)).fetchall()
+
+        return [dict(row) for row in rows]
+
+    def close(self):
+        """Ferme les connexions à la base"""
+        self.pool.close()
+
+
+def local_timestamp(value) -> str:
+    """
+    Horodatage ISO en heure locale naïve (format de la colonne timestamp)
+
+    Un horodatage avec décalage horaire ("2024-05-01T08:00:00+02:00") est
+    converti dans le fuseau local, puis son décalage retiré.
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value.isoformat()
+
+
+def _nova(value) -> Optional[int]:
+    """Groupe NOVA (1 à 4) ou None"""
+    try:
+        group = int(value)
+    except (TypeError, ValueError):
+        return None
+    return group if 1 <= group <= 4 else None
+
+
+# --- IMPORT EN LIGNE DE COMMANDE ---
+
+def iter_entries_file(path: str) -> Iterator[Dict]:
+    """Lit un fichier d'import : CSV avec en-têtes, ou JSONL (un objet par ligne)"""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if str(path).endswith((".jsonl", ".json")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Journal de consommation")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Importer des consommations (CSV ou JSONL)")
+    import_parser.add_argument("file", help="Fichier .csv (avec en-têtes) ou .jsonl")
+    import_parser.add_argument("--db", default="nutrition_data.db", help="Base SQLite du journal")
+    import_parser.add_argument("--chunk-size", type=int, default=None,
+                               help="Lignes par transaction (défaut : une seule transaction)")
+
+    args = parser.parse_args()
+
+    if args.command == "import":
+        tracker = ConsumptionTracker(args.db)
+        print(f"📥 Import de {args.file}...")
+        imported = tracker.add_consumptions(iter_entries_file(args.file), chunk_size=args.chunk_size)
+        print(f"✅ {imported} consommations importées")
+        tracker.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Requêtes HTTP conditionnelles (ETag / Last-Modified)
+
+Les validateurs renvoyés par le serveur avec une réponse complète sont
+conservés (cache produits, fichier compagnon d'une image téléchargée). Lors
+de la revalidation ils sont renvoyés dans If-None-Match / If-Modified-Since :
+si la ressource n'a pas changé, le serveur répond 304 sans corps et seule la
+date de fraîcheur de la copie locale est mise à jour.
+
+Une fonction de récupération conditionnelle retourne :
+- Fetched(data, validators) : réponse complète et ses validateurs
+- NOT_MODIFIED : la copie locale est toujours valide
+- None : ressource inconnue
+"""
+
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Tuple
+
+NOT_MODIFIED_STATUS = 304
+
+
+class Validators(NamedTuple):
+    """Validateurs HTTP d'une ressource"""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @classmethod
+    def from_headers(cls, headers: Mapping[str, str]) -> "Validators":
+        """Validateurs d'une réponse (en-têtes insensibles à la casse)"""
+        return cls(headers.get("ETag"), headers.get("Last-Modified"))
+
+    @property
+    def empty(self) -> bool:
+        return not (self.etag or self.last_modified)
+
+    def request_headers(self) -> Dict[str, str]:
+        """En-têtes d'une requête conditionnelle"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class Fetched(NamedTuple):
+    """Réponse complète accompagnée de ses validateurs"""
+    data: Any
+    validators: Validators
+
+
+class _NotModified:
+    """La ressource n'a pas changé depuis la copie locale (304)"""
+
+    def __repr__(self):
+        return "NOT_MODIFIED"
+
+
+NOT_MODIFIED = _NotModified()
+
+
+def unwrap(result) -> Tuple[Any, Optional[Validators]]:
+    """(données, validateurs) d'un résultat Fetched ou de données brutes"""
+    if isinstance(result, Fetched):
+        return result.data, result.validators
+    return result, None
@@ -0,0 +1,119 @@
+"""
+Moteur de calcul nutritionnel vectorisé (NumPy)
+
+Les valeurs nutritionnelles d'un ensemble de produits sont rangées dans une
+matrice produits × nutriments (NaN pour une valeur non renseignée). Portions,
+totaux et % AJR d'un repas, d'une journée ou d'un plan alimentaire complet
+sont alors calculés en une seule opération matricielle, au lieu d'une
+boucle Python nutriment par nutriment.
+
+Utilisé par l'interface Streamlit (FoodappWeb.py) et l'application en ligne
+de commande (nutrition_app_python_final.py).
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from product_model import NUTRIENT_FIELDS, Product
+
+
+# Ordre des colonnes de la matrice (attributs de Product, valeurs pour 100g)
+NUTRIENTS = NUTRIENT_FIELDS
+
+NUTRIENT_LABELS = {
+    "energy_kcal": "Énergie (kcal)",
+    "proteins": "Protéines (g)",
+    "carbohydrates": "Glucides (g)",
+    "fat": "Lipides (g)",
+    "fiber": "Fibres (g)",
+    "salt": "Sel (g)",
+}
+
+# Clé correspondante dans le dictionnaire d'AJR (voir get_rdi)
+RDI_KEYS = {
+    "energy_kcal": "kcal",
+    "proteins": "proteins",
+    "carbohydrates": "carbs",
+    "fat": "fat",
+    "fiber": "fiber",
+    "salt": "salt",
+}
+
+
+class NutrientAnalysis(NamedTuple):
+    """Résultat d'un calcul sur n produits (lignes) et k nutriments (colonnes)"""
+    per_100g: np.ndarray        # (n, k)
+    portions: np.ndarray        # (n, k) valeurs pour la quantité consommée
+    totals: np.ndarray          # (k,) somme des portions
+    percent_rdi: np.ndarray     # (n, k) % AJR de chaque portion
+    total_percent_rdi: np.ndarray  # (k,) % AJR du total
+
+
+def nutrient_matrix(items: Sequence, nutrients: Sequence[str] = NUTRIENTS) -> np.ndarray:
+    """
+    Construit la matrice produits × nutriments
+
+    Args:
+        items: Objets Product ou dictionnaires (lignes du journal par exemple)
+    """
+    packed = tuple(nutrients) == NUTRIENT_FIELDS
+    rows = []
+    for item in items:
+        if packed and isinstance(item, Product):
+            # Tableau de nutriments déjà au bon format : copie directe
+            rows.append(item.nutrients)
+            continue
+        get = item.get if isinstance(item, dict) else lambda name: getattr(item, name, None)
+        rows.append([get(name) for name in nutrients])
+
+    # dtype float : None devient NaN
+    return np.array(rows, dtype=float).reshape(len(rows), len(nutrients))
+
+
+def rdi_vector(rdi: Dict, nutrients: Sequence[str] = NUTRIENTS) -> np.ndarray:
+    """Vecteur d'AJR aligné sur les nutriments (NaN si absent ou nul)"""
+    values = np.array([rdi.get(RDI_KEYS[name]) for name in nutrients], dtype=float)
+    values[values == 0] = np.nan
+    return values
+
+
+def portions(matrix: np.ndarray, quantities: Sequence[float]) -> np.ndarray:
+    """Valeurs pour les quantités consommées (en grammes)"""
+    return matrix * (np.asarray(quantities, dtype=float)[:, np.newaxis] / 100.0)
+
+
+def percent_rdi(values: np.ndarray, rdi: Dict, nutrients: Sequence[str] = NUTRIENTS) -> np.ndarray:
+    """% AJR de valeurs (vecteur ou matrice dont la dernière dimension suit nutrients)"""
+    return np.asarray(values, dtype=float) / rdi_vector(rdi, nutrients) * 100.0
+
+
+def analyze(items: Sequence, quantities: Sequence[float], rdi: Optional[Dict] = None,
+            nutrients: Sequence[str] = NUTRIENTS) -> NutrientAnalysis:
+    """
+    Calcule portions, totaux et % AJR d'un ensemble de produits en une passe
+
+    Les valeurs manquantes n'entrent pas dans les totaux.
+    """
+    matrix = nutrient_matrix(items, nutrients)
+    portion_matrix = portions(matrix, quantities)
+    totals = np.nansum(portion_matrix, axis=0)
+
+    if rdi is None:
+        empty = np.full(len(nutrients), np.nan)
+        return NutrientAnalysis(matrix, portion_matrix, totals,
+                                np.full_like(portion_matrix, np.nan), empty)
+
+    rdi_values = rdi_vector(rdi, nutrients)
+    return NutrientAnalysis(
+        matrix,
+        portion_matrix,
+        totals,
+        portion_matrix / rdi_values * 100.0,
+        totals / rdi_values * 100.0
+    )
+
+
+def format_values(values: np.ndarray, fmt: str = "{:.1f}", missing: str = "N/A") -> List[str]:
+    """Formate un vecteur pour l'affichage (missing pour NaN)"""
+    return [missing if np.isnan(value) else fmt.format(value) for value in values]
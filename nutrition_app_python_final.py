@@ -3,7 +3,7 @@ Application d'Analyse Nutritionnelle - OpenFoodFacts
 Version Finale avec toutes les corrections
 
 INSTALLATION:
-pip install requests
+pip install requests numpy
 
 UTILISATION:
 python nutrition_app.py
@@ -12,271 +12,23 @@ python nutrition_app.py
 import requests
 import json
 from datetime import datetime
-from typing import Dict, List, Optional
-from dataclasses import dataclass, asdict
-import sqlite3
+from typing import Optional
 from pathlib import Path
 import time
 
-
-@dataclass
-class Product:
-    """Modèle de données produit"""
-    barcode: str
-    name: str
-    brands: str
-    nutriscore: Optional[str] = None
-    nova_group: Optional[int] = None
-    ecoscore: Optional[str] = None
-    energy_kcal: Optional[float] = None
-    proteins: Optional[float] = None
-    carbohydrates: Optional[float] = None
-    fat: Optional[float] = None
-    fiber: Optional[float] = None
-    salt: Optional[float] = None
-    ingredients: Optional[str] = None
-    allergens: Optional[List[str]] = None
-    
-    def to_dict(self):
-        return asdict(self)
-
-
-class OpenFoodFactsAPI:
-    """Client API OpenFoodFacts avec gestion robuste"""
-    
-    BASE_URL = "https://world.openfoodfacts.net/api/v2"
-    SEARCH_URL = "https://world.openfoodfacts.net"
-    USER_AGENT = "NutritionAnalyzer/1.0 (Educational Project)"
-    
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({"User-Agent": self.USER_AGENT})
-        
-        # Configuration de retry automatique
-        try:
-            from requests.adapters import HTTPAdapter
-            from requests.packages.urllib3.util.retry import Retry
-            
-            retry_strategy = Retry(
-                total=3,
-                backoff_factor=1,
-                status_forcelist=[429, 500, 502, 503, 504]
-            )
-            adapter = HTTPAdapter(max_retries=retry_strategy)
-            self.session.mount("https://", adapter)
-            self.session.mount("http://", adapter)
-        except:
-            pass
-    
-    def get_product(self, barcode: str) -> Optional[Product]:
-        """Récupère les données d'un produit via son code-barre"""
-        url = f"{self.BASE_URL}/product/{barcode}"
-        params = {
-            "fields": "product_name,brands,nutrition_grades,nova_group,"
-                     "ecoscore_grade,nutriments,ingredients_text,allergens_tags"
-        }
-        
-        try:
-            response = self.session.get(url, params=params, timeout=20)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get("status") != 1:
-                print(f"❌ Produit {barcode} non trouvé dans la base OpenFoodFacts")
-                return None
-            
-            return self._parse_product(barcode, data["product"])
-            
-        except requests.exceptions.Timeout:
-            print(f"⏱️  Timeout - Le serveur met trop de temps à répondre")
-            return None
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Erreur API: {e}")
-            return None
-    
-    def _parse_product(self, barcode: str, data: Dict) -> Product:
-        """Parse la réponse API vers objet Product"""
-        nutriments = data.get("nutriments", {})
-        
-        return Product(
-            barcode=barcode,
-            name=data.get("product_name", "Inconnu"),
-            brands=data.get("brands", ""),
-            nutriscore=data.get("nutrition_grades", "").upper(),
-            nova_group=data.get("nova_group"),
-            ecoscore=data.get("ecoscore_grade", "").upper(),
-            energy_kcal=nutriments.get("energy-kcal_100g"),
-            proteins=nutriments.get("proteins_100g"),
-            carbohydrates=nutriments.get("carbohydrates_100g"),
-            fat=nutriments.get("fat_100g"),
-            fiber=nutriments.get("fiber_100g"),
-            salt=nutriments.get("salt_100g"),
-            ingredients=data.get("ingredients_text"),
-            allergens=data.get("allergens_tags", [])
-        )
-    
-    def search_products(self, query: str, page_size: int = 20) -> List[Dict]:
-        """Recherche produits par mots-clés"""
-        url = f"{self.SEARCH_URL}/cgi/search.pl"
-        params = {
-            "search_terms": query,
-            "search_simple": 1,
-            "action": "process",
-            "json": 1,
-            "page_size": min(page_size, 100)
-        }
-        
-        try:
-            print(f"   Interrogation du serveur (timeout 30s)...")
-            response = self.session.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            products = data.get("products", [])
-            
-            if products:
-                return products
-            
-            print(f"   Aucun résultat, essai méthode alternative...")
-            return self._search_alternative(query, page_size)
-            
-        except requests.exceptions.Timeout:
-            print(f"⏱️  Timeout - Essai avec méthode alternative...")
-            return self._search_alternative(query, page_size)
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Erreur réseau: {e}")
-            return self._search_alternative(query, page_size)
-    
-    def _search_alternative(self, query: str, page_size: int = 20) -> List[Dict]:
-        """Méthode alternative de recherche"""
-        try:
-            if query.isdigit() and len(query) >= 8:
-                url = f"{self.BASE_URL}/search"
-                params = {
-                    "code": query,
-                    "page_size": 1,
-                    "fields": "code,product_name,brands,nutrition_grades"
-                }
-            else:
-                url = f"{self.BASE_URL}/search"
-                params = {
-                    "page_size": min(page_size, 50),
-                    "fields": "code,product_name,brands,nutrition_grades",
-                    "brands_tags": query.lower().replace(" ", "-")
-                }
-            
-            response = self.session.get(url, params=params, timeout=20)
-            response.raise_for_status()
-            data = response.json()
-            return data.get("products", [])
-        except:
-            return []
+import nutrient_engine
+from consumption_tracker import ConsumptionTracker
+from openfoodfacts_client import PROGRESS, OpenFoodFactsClient
+from prefetch import ProductPrefetcher
+from product_model import ProductView
 
 
-class ConsumptionTracker:
-    """Gestionnaire d'historique de consommation"""
+class OpenFoodFactsAPI(OpenFoodFactsClient):
+    """Client API OpenFoodFacts avec gestion robuste (messages en console)"""
     
-    def __init__(self, db_path: str = "nutrition_data.db"):
-        self.db_path = Path(db_path)
-        self._init_database()
-    
-    def _init_database(self):
-        """Initialise la base de données SQLite"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS consumption (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                barcode TEXT NOT NULL,
-                product_name TEXT,
-                quantity REAL DEFAULT 100,
-                unit TEXT DEFAULT 'g',
-                timestamp TEXT NOT NULL,
-                nutriscore TEXT,
-                energy_kcal REAL,
-                proteins REAL,
-                carbohydrates REAL,
-                fat REAL
-            )
-        """)
-        
-        conn.commit()
-        conn.close()
-    
-    def add_consumption(self, product: Product, quantity: float = 100, unit: str = "g"):
-        """Enregistre une consommation"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO consumption 
-            (barcode, product_name, quantity, unit, timestamp, nutriscore, 
-             energy_kcal, proteins, carbohydrates, fat)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            product.barcode,
-            product.name,
-            quantity,
-            unit,
-            datetime.now().isoformat(),
-            product.nutriscore,
-            product.energy_kcal,
-            product.proteins,
-            product.carbohydrates,
-            product.fat
-        ))
-        
-        conn.commit()
-        conn.close()
-        print(f"\n✅ Consommation enregistrée: {product.name} ({quantity}{unit})")
-    
-    def get_daily_summary(self, date: Optional[str] = None) -> Dict:
-        """Calcule le résumé nutritionnel d'une journée"""
-        if date is None:
-            date = datetime.now().strftime("%Y-%m-%d")
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                SUM(energy_kcal * quantity / 100) as total_kcal,
-                SUM(proteins * quantity / 100) as total_proteins,
-                SUM(carbohydrates * quantity / 100) as total_carbs,
-                SUM(fat * quantity / 100) as total_fat,
-                COUNT(*) as num_products
-            FROM consumption
-            WHERE DATE(timestamp) = ?
-        """, (date,))
-        
-        result = cursor.fetchone()
-        conn.close()
-        
-        return {
-            "date": date,
-            "total_kcal": round(result[0] or 0, 1),
-            "total_proteins": round(result[1] or 0, 1),
-            "total_carbs": round(result[2] or 0, 1),
-            "total_fat": round(result[3] or 0, 1),
-            "num_products": result[4]
-        }
-    
-    def get_history(self, days: int = 7) -> List[Dict]:
-        """Récupère l'historique des N derniers jours"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT * FROM consumption
-            WHERE timestamp >= datetime('now', '-' || ? || ' days')
-            ORDER BY timestamp DESC
-        """, (days,))
-        
-        results = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        
-        return results
+    def report(self, message: str, level: str = PROGRESS):
+        """Affiche les messages du client dans la console"""
+        print(message)
 
 
 class NutritionAnalyzer:
@@ -285,8 +37,14 @@ class NutritionAnalyzer:
     def __init__(self):
         self.api = OpenFoodFactsAPI()
         self.tracker = ConsumptionTracker()
+        
+        # Produits habituels préchargés en arrière-plan dès le démarrage
+        self.prefetcher = ProductPrefetcher(
+            self.api.cache, self.api._fetch_product, self.tracker, self.api.mirror
+        )
+        self.prefetcher.warm()
     
-    def analyze_product(self, barcode: str) -> Optional[Product]:
+    def analyze_product(self, barcode: str) -> Optional[ProductView]:
         """Analyse un produit et affiche ses informations"""
         print(f"\n🔍 Recherche du produit {barcode}...")
         product = self.api.get_product(barcode)
@@ -345,14 +103,22 @@ class NutritionAnalyzer:
         print(f"📜 HISTORIQUE ({days} derniers jours)")
         print(f"{'='*60}")
         
-        for entry in history[:20]:
+        # Énergie consommée de toutes les entrées en une opération
+        analysis = nutrient_engine.analyze(
+            history, [entry['quantity'] for entry in history], nutrients=("energy_kcal",)
+        )
+        consumed_kcal = analysis.portions[:, 0]
+        
+        for entry, kcal in zip(history[:20], consumed_kcal):
             timestamp = datetime.fromisoformat(entry['timestamp'])
             print(f"\n🕐 {timestamp.strftime('%d/%m/%Y %H:%M')}")
             print(f"   {entry['product_name']}")
             print(f"   Quantité: {entry['quantity']}{entry['unit']}")
             if entry['energy_kcal']:
-                consumed_kcal = (entry['energy_kcal'] * entry['quantity']) / 100
-                print(f"   Énergie: {consumed_kcal:.0f} kcal")
+                print(f"   Énergie: {kcal:.0f} kcal")
+        
+        print(f"\n{'='*60}")
+        print(f"⚡ Énergie totale sur la période: {analysis.totals[0]:.0f} kcal")
 
 
 class InteractiveMenu:
@@ -557,10 +323,14 @@ class InteractiveMenu:
         
         try:
             quantity = float(quantity_input) if quantity_input else 100.0
-            self.analyzer.tracker.add_consumption(product, quantity)
         except ValueError:
             print("❌ Quantité invalide, utilisation de 100g")
-            self.analyzer.tracker.add_consumption(product, 100.0)
+            quantity = 100.0
+        
+        try:
+            self.analyzer.tracker.add_consumption(product, quantity)
+            print(f"\n✅ Consommation enregistrée: {product.name} ({quantity}g)")
+            self.analyzer.prefetcher.warm()
         except Exception as e:
             print(f"❌ Erreur: {e}")
         
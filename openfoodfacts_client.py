@@ -0,0 +1,394 @@
+"""
+Client OpenFoodFacts synchrone (requests) commun aux applications
+
+Logique partagée par l'application en ligne de commande et l'application
+Streamlit : cache persistant, miroir local, cache négatif, coalescence des
+requêtes, disjoncteur, limiteur de débit, requêtes conditionnelles et index
+de recherche locale.
+
+Chaque application ne fournit que l'affichage : les échecs d'un produit
+sont levés (ProductUnavailable) ou transmis à report(), que l'application
+en ligne de commande imprime et que Streamlit affiche (st.warning...).
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from urllib3.util.retry import Retry
+
+import openfoodfacts_common
+from barcodes import InvalidBarcodeError, display, normalize, to_ean
+from circuit_breaker import CircuitOpenError, LatencyBudgetExceeded
+from compression import ACCEPT_ENCODING
+from http_validators import NOT_MODIFIED, NOT_MODIFIED_STATUS, Fetched, Validators
+from product_cache import ProductCache
+from product_mirror import ProductMirror
+from product_model import ProductView
+from product_search import ProductSearchIndex
+from rate_limiter import RateLimitedAdapter, RateLimiter, shared_limiter
+from singleflight import SingleFlight
+
+# Niveaux de report()
+PROGRESS = "progress"
+WARNING = "warning"
+ERROR = "error"
+
+
+class ProductUnavailable(Exception):
+    """Produit non obtenu (inconnu, en échec récent ou serveur injoignable)"""
+
+    def __init__(self, message: str, transient: bool = False):
+        super().__init__(message)
+        self.transient = transient  # panne passagère : simple avertissement
+
+
+class OpenFoodFactsClient:
+    """Client API OpenFoodFacts avec cache, miroir local et protections réseau"""
+
+    BASE_URL = openfoodfacts_common.BASE_URL
+    SEARCH_URL = openfoodfacts_common.SEARCH_URL
+    USER_AGENT = openfoodfacts_common.USER_AGENT
+    MAX_WORKERS = 8  # Requêtes simultanées pour get_products
+    LATENCY_BUDGET = openfoodfacts_common.LATENCY_BUDGET
+    PRODUCT_FIELDS = openfoodfacts_common.PRODUCT_FIELDS
+    SEARCH_FIELDS = openfoodfacts_common.SEARCH_FIELDS
+
+    def __init__(self, cache: Optional[ProductCache] = None,
+                 mirror: Optional[ProductMirror] = None,
+                 search_index: Optional[ProductSearchIndex] = None,
+                 latency_budget: Optional[float] = LATENCY_BUDGET,
+                 limiter: Optional[RateLimiter] = None):
+        """
+        Args:
+            cache: Cache produits persistant (défaut : ProductCache(), partagé
+                entre processus via PRODUCT_CACHE_PATH)
+            mirror: Miroir local (défaut : openfoodfacts_mirror.db s'il existe)
+            search_index: Index de recherche locale
+            latency_budget: Attente maximale (s) d'un appel, retries compris
+            limiter: Limiteur de débit (défaut : celui du processus)
+        """
+        self.session = requests.Session()
+        # Réponses compressées (gzip/deflate, br et zstd si installés)
+        self.session.headers.update({
+            "User-Agent": self.USER_AGENT,
+            "Accept-Encoding": ACCEPT_ENCODING
+        })
+
+        # Disjoncteur : en cas de panne du serveur, les appels échouent
+        # immédiatement et le cache ou le miroir local prennent le relais
+        self.breaker = openfoodfacts_common.circuit_breaker(latency_budget)
+        self.latency_budget = latency_budget
+
+        self.cache = cache if cache is not None else ProductCache()
+
+        # Miroir local de l'export OpenFoodFacts (premier niveau, hors réseau)
+        if mirror is None and Path(ProductMirror.DEFAULT_PATH).exists():
+            mirror = ProductMirror()
+        self.mirror = mirror
+
+        # Requêtes identiques simultanées regroupées en un seul appel réseau
+        self._inflight = SingleFlight()
+
+        # Index de recherche locale, alimenté au départ par le cache existant
+        self.search_index = search_index if search_index is not None else ProductSearchIndex()
+        if self.search_index.is_empty():
+            self.search_index.add_many(self.cache.iter_products())
+
+        # Pool de threads borné pour les recherches groupées
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.MAX_WORKERS,
+            thread_name_prefix="openfoodfacts"
+        )
+
+        # Limiteur de débit par hôte, partagé avec les autres sessions du processus
+        self.limiter = limiter if limiter is not None else shared_limiter()
+
+        # Une connexion persistante par worker du pool ; le créneau de chaque
+        # requête est attendu par _get, les retries consomment un jeton
+        adapter = RateLimitedAdapter(
+            self.limiter,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=1,
+                status_forcelist=[429, 500, 502, 503, 504]
+            ),
+            pool_maxsize=self.MAX_WORKERS,
+            acquire_on_send=False
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def report(self, message: str, level: str = PROGRESS):
+        """Affiche un message à l'utilisateur (PROGRESS, WARNING ou ERROR)"""
+
+    # --- PRODUITS ---
+
+    def get_product(self, barcode: str) -> Optional[ProductView]:
+        """Récupère les données d'un produit via son code-barre (None si échec, signalé)"""
+        try:
+            return self._load_product(normalize(barcode))
+        except InvalidBarcodeError as e:
+            self.report(f"❌ {e}", ERROR)
+        except ProductUnavailable as e:
+            self.report(str(e), WARNING if e.transient else ERROR)
+        return None
+
+    def _load_product(self, barcode: str) -> ProductView:
+        """
+        Produit d'un code-barre canonique
+
+        Raises:
+            ProductUnavailable: produit inconnu, en échec récent ou injoignable
+        """
+        data = self._local_product(barcode)
+        if data is None:
+            miss = self.cache.get_miss(barcode)
+            if miss:
+                raise ProductUnavailable(f"❌ Produit {display(barcode)} {miss.describe()}")
+            data = self._fetch_or_raise(barcode)
+        return self._parse_product(barcode, data)
+
+    def get_products(self, barcodes: Iterable[str]) -> Tuple[List[Optional[ProductView]], Dict[str, str]]:
+        """
+        Récupère plusieurs produits en parallèle
+
+        Les produits en cache ou dans le miroir local sont servis
+        directement, les autres sont demandés simultanément via le pool
+        de threads (MAX_WORKERS). Les codes invalides sont écartés avant
+        tout appel réseau ; les saisies d'un même code sont regroupées.
+
+        Returns:
+            (produits dans l'ordre des codes fournis, None si échec,
+             dictionnaire code-barre fourni -> message d'erreur)
+        """
+        barcodes = list(barcodes)
+        keys: Dict[str, str] = {}  # code fourni -> clé canonique
+        results: Dict[str, Optional[ProductView]] = {}
+        failures: Dict[str, str] = {}
+        to_fetch = []
+
+        for barcode in dict.fromkeys(barcodes):
+            try:
+                keys[barcode] = normalize(barcode)
+            except InvalidBarcodeError as e:
+                failures[barcode] = str(e)
+
+        for barcode in dict.fromkeys(keys.values()):
+            data = self._local_product(barcode)
+            if data is not None:
+                results[barcode] = self._parse_product(barcode, data)
+                continue
+
+            miss = self.cache.get_miss(barcode)
+            if miss:
+                results[barcode] = None
+                failures[barcode] = f"Produit {miss.describe()}"
+            else:
+                to_fetch.append(barcode)
+
+        futures = {self.executor.submit(self._fetch_or_raise, barcode): barcode
+                   for barcode in to_fetch}
+
+        for future in as_completed(futures):
+            barcode = futures[future]
+            try:
+                results[barcode] = self._parse_product(barcode, future.result())
+            except ProductUnavailable as e:
+                results[barcode] = None
+                failures[barcode] = str(e)
+
+        errors = {barcode: failures[keys.get(barcode, barcode)] for barcode in dict.fromkeys(barcodes)
+                  if keys.get(barcode, barcode) in failures}
+        return [results.get(keys.get(barcode)) for barcode in barcodes], errors
+
+    def _local_product(self, barcode: str) -> Optional[Dict]:
+        """
+        Produit servi sans appel réseau : cache (une entrée périmée est
+        revalidée en arrière-plan), puis miroir local
+        """
+        entry = self.cache.get(barcode)
+        if entry:
+            if entry.stale:
+                self.cache.revalidate(barcode, self._request_product)
+            return entry.data
+
+        return self.mirror.get(barcode) if self.mirror else None
+
+    def _fetch_or_raise(self, barcode: str) -> Dict:
+        """
+        Récupère un produit sur le serveur et l'ajoute à l'index local
+
+        Raises:
+            ProductUnavailable: produit inconnu ou erreur réseau
+        """
+        try:
+            data = self._fetch_product(barcode)
+        except CircuitOpenError as e:
+            raise ProductUnavailable(f"🔌 OpenFoodFacts indisponible - {e}", transient=True) from None
+        except (requests.exceptions.Timeout, LatencyBudgetExceeded):
+            raise ProductUnavailable("⏱️ Timeout - Le serveur met trop de temps à répondre") from None
+        except requests.exceptions.RequestException as e:
+            raise ProductUnavailable(f"❌ Erreur API: {e}") from None
+
+        if data is None:
+            raise ProductUnavailable(f"❌ Produit {display(barcode)} non trouvé dans la base OpenFoodFacts")
+
+        self.search_index.add(barcode, data)
+        return data
+
+    def _fetch_product(self, barcode: str) -> Optional[Dict]:
+        """
+        Appel réseau partagé entre les demandes simultanées du même code-barre
+        (threads de ce processus, puis autres processus via le cache partagé)
+
+        Raises:
+            InvalidBarcodeError: code invalide (aucun appel réseau)
+        """
+        barcode = normalize(barcode)
+        return self._inflight.do(
+            ("product", barcode), self.cache.load, barcode, self._request_product
+        )
+
+    def _request_product(self, barcode: str, validators: Optional[Validators] = None):
+        """
+        Interroge l'API pour un code-barre
+
+        Avec les validateurs de l'entrée en cache la requête est
+        conditionnelle : NOT_MODIFIED si le produit n'a pas changé.
+
+        Returns:
+            Fetched(données, validateurs), NOT_MODIFIED ou None (produit inconnu)
+        """
+        url = f"{self.BASE_URL}/product/{to_ean(normalize(barcode))}"
+        params = {"fields": self.PRODUCT_FIELDS}
+        headers = validators.request_headers() if validators else None
+
+        try:
+            response = self._get(url, params, timeout=20, headers=headers)
+        except requests.exceptions.HTTPError as e:
+            # API v2 : produit inconnu = 404 (avec status 0)
+            if e.response is not None and e.response.status_code == openfoodfacts_common.PRODUCT_NOT_FOUND_STATUS:
+                return None
+            raise
+        if response.status_code == NOT_MODIFIED_STATUS:
+            return NOT_MODIFIED
+        data = response.json()
+
+        if data.get("status") != 1:
+            return None
+
+        return Fetched(data["product"], Validators.from_headers(response.headers))
+
+    def _get(self, url: str, params: Dict, timeout: float,
+             headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """
+        GET protégé par le disjoncteur et borné par le budget de latence
+
+        Le créneau du limiteur de débit est attendu avant de démarrer la
+        mesure : un client qui se limite lui-même n'est pas pris pour un
+        serveur lent. Seules les erreurs serveur (5xx, timeouts, connexion)
+        comptent comme des échecs du service ; une erreur 4xx est levée
+        après coup.
+        """
+        host = urlparse(url).hostname
+
+        def get():
+            response = self.session.get(url, params=params, timeout=timeout, headers=headers)
+            if response.status_code >= 500:
+                response.raise_for_status()
+            return response
+
+        response = self.breaker.call(get, budget=self.latency_budget,
+                                     acquire=lambda: self.limiter.acquire(host))
+        response.raise_for_status()
+        return response
+
+    def _parse_product(self, barcode: str, data: Dict) -> ProductView:
+        """Vue produit sur la réponse API (champs lus à l'accès, code au format EAN)"""
+        return openfoodfacts_common.parse_product(barcode, data)
+
+    # --- RECHERCHE ---
+
+    def search_products(self, query: str, page_size: int = 20) -> List[Dict]:
+        """Recherche produits par mots-clés (index local puis serveur)"""
+        local_results = self.search_index.search(query, page_size)
+
+        # Avec le miroir complet l'index local fait autorité ; sinon il ne
+        # contient que les produits déjà consultés
+        if local_results and (self.mirror or len(local_results) >= page_size):
+            return local_results
+
+        try:
+            self.report("   Interrogation du serveur...")
+            products = self._inflight.do(
+                ("search", query, page_size), self.cache.load_search, query, page_size,
+                self._request_search
+            )
+
+            if products:
+                self._index_results(products)
+                return products
+
+            if local_results:
+                return local_results
+
+            self.report("   Aucun résultat, essai méthode alternative...")
+            return self._search_alternative(query, page_size)
+
+        except CircuitOpenError as e:
+            self.report(f"🔌 OpenFoodFacts indisponible - {e}", WARNING)
+            return local_results
+        except (requests.exceptions.Timeout, LatencyBudgetExceeded):
+            self.report("⏱️ Timeout - Essai avec méthode alternative...", WARNING)
+            return local_results or self._search_alternative(query, page_size)
+        except requests.exceptions.RequestException as e:
+            self.report(f"❌ Erreur réseau: {e}", ERROR)
+            return local_results or self._search_alternative(query, page_size)
+
+    def _request_search(self, query: str, page_size: int) -> List[Dict]:
+        """Interroge cgi/search.pl"""
+        url = f"{self.SEARCH_URL}/cgi/search.pl"
+        params = {
+            "search_terms": query,
+            "search_simple": 1,
+            "action": "process",
+            "json": 1,
+            "page_size": min(page_size, 100),
+            "fields": self.SEARCH_FIELDS
+        }
+
+        return self._get(url, params, timeout=30).json().get("products", [])
+
+    def _search_alternative(self, query: str, page_size: int = 20) -> List[Dict]:
+        """Méthode alternative de recherche"""
+        try:
+            if query.isdigit() and len(query) >= 8:
+                url = f"{self.BASE_URL}/search"
+                params = {
+                    "code": query,
+                    "page_size": 1,
+                    "fields": self.SEARCH_FIELDS
+                }
+            else:
+                url = f"{self.BASE_URL}/search"
+                params = {
+                    "page_size": min(page_size, 50),
+                    "fields": self.SEARCH_FIELDS,
+                    "brands_tags": query.lower().replace(" ", "-")
+                }
+
+            data = self._get(url, params, timeout=20).json()
+            products = data.get("products", [])
+            self._index_results(products)
+            return products
+        except:
+            return []
+
+    def _index_results(self, products: List[Dict]):
+        """Ajoute des résultats de recherche à l'index local"""
+        self.search_index.add_many(
+            (product.get("code"), product) for product in products if product.get("code")
+        )
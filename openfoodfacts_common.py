@@ -0,0 +1,44 @@
+"""
+Paramètres et conversions communs aux clients OpenFoodFacts
+
+Partagés par OpenFoodFactsClient (requests, utilisé par l'application en
+ligne de commande et Streamlit) et AsyncOpenFoodFactsAPI (httpx). Ce module
+ne dépend d'aucun client HTTP : le client asynchrone n'a pas à importer
+requests ni les applications.
+"""
+
+from typing import Dict, Optional
+
+from barcodes import display
+from circuit_breaker import CircuitBreaker
+from product_model import SEARCH_RESULT_FIELDS, ProductView
+
+BASE_URL = "https://world.openfoodfacts.net/api/v2"
+SEARCH_URL = "https://world.openfoodfacts.net"
+USER_AGENT = "NutritionAnalyzer/1.0 (Educational Project)"
+
+# API v2 : statut HTTP d'un produit inconnu (corps avec "status": 0)
+PRODUCT_NOT_FOUND_STATUS = 404
+
+# Attente maximale (s) d'un appel, retries compris
+LATENCY_BUDGET = 8.0
+# Latence p95, en part du budget, qui ouvre le disjoncteur : strictement
+# inférieure au budget, qu'un appel abandonné ne dépasse jamais
+SLOW_CALL_RATIO = 0.75
+
+PRODUCT_FIELDS = ("product_name,brands,nutrition_grades,nova_group,"
+                  "ecoscore_grade,nutriments,ingredients_text,allergens_tags")
+# Projection minimale pour les listes de résultats
+SEARCH_FIELDS = ",".join(SEARCH_RESULT_FIELDS)
+
+
+def parse_product(barcode: str, data: Dict) -> ProductView:
+    """Vue produit sur la réponse API (champs lus à l'accès, code au format EAN)"""
+    return ProductView(display(barcode), data)
+
+
+def circuit_breaker(latency_budget: Optional[float]) -> CircuitBreaker:
+    """Disjoncteur dont le seuil de latence est calé sur le budget de latence"""
+    if latency_budget is None:
+        return CircuitBreaker()
+    return CircuitBreaker(latency_threshold=SLOW_CALL_RATIO * latency_budget)
@@ -0,0 +1,118 @@
+"""
+Préchargement des produits probables dans le cache
+
+À partir du journal de consommation (produits fréquents, récents, habituels
+à cette heure de la journée) et des produits consultés récemment, les
+fiches absentes ou périmées du cache sont récupérées en arrière-plan. Un
+produit racheté régulièrement est ainsi déjà en cache au moment du scan.
+
+Le préchargement est lancé au démarrage de l'application et après chaque
+consommation enregistrée.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from barcodes import canonical_or_none
+from consumption_tracker import ConsumptionTracker
+from product_cache import ProductCache
+from product_mirror import ProductMirror
+
+
+class ProductPrefetcher:
+    """Réchauffe le cache produits dans un thread d'arrière-plan"""
+
+    LIMIT = 20
+    LOOKBACK_DAYS = 60
+    MAX_WORKERS = 4
+
+    def __init__(self, cache: ProductCache, fetch: Callable[[str], Optional[Dict]],
+                 tracker: ConsumptionTracker, mirror: Optional[ProductMirror] = None,
+                 limit: int = LIMIT, max_workers: int = MAX_WORKERS):
+        """
+        Args:
+            cache: Cache produits à réchauffer
+            fetch: Récupère un produit et l'enregistre en cache
+                (OpenFoodFactsAPI._fetch_product)
+            tracker: Journal de consommation servant à la prédiction
+            mirror: Miroir local ; ses produits n'ont pas besoin d'être préchargés
+            limit: Nombre maximal de produits prédits par passe
+        """
+        self.cache = cache
+        self.fetch = fetch
+        self.tracker = tracker
+        self.mirror = mirror
+        self.limit = limit
+        self.max_workers = max_workers
+
+        self._lock = threading.Lock()
+        self._running = False
+        self._pending = False
+
+    def predict(self) -> List[str]:
+        """
+        Codes-barres probables : journal de consommation puis consultations récentes
+
+        Les codes invalides conservés dans le journal (saisies anciennes ou
+        importées) sont ignorés.
+        """
+        candidates = self.tracker.get_likely_barcodes(self.limit, self.LOOKBACK_DAYS)
+        candidates += self.cache.recent_barcodes(self.limit)
+        canonical = (canonical_or_none(barcode) for barcode in candidates)
+        return list(dict.fromkeys(barcode for barcode in canonical if barcode))
+
+    def warm(self):
+        """
+        Lance une passe de préchargement en arrière-plan
+
+        Un appel pendant une passe en cours en programme une seule autre.
+        """
+        with self._lock:
+            if self._running:
+                self._pending = True
+                return
+            self._running = True
+
+        threading.Thread(target=self._run, name="prefetch", daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                self.warm_now()
+            except Exception:
+                pass
+
+            with self._lock:
+                if not self._pending:
+                    self._running = False
+                    return
+                self._pending = False
+
+    def warm_now(self) -> int:
+        """
+        Précharge immédiatement les produits prédits absents ou périmés
+
+        Returns:
+            Nombre de produits demandés au serveur
+        """
+        to_fetch = [barcode for barcode in self.predict() if self._needs_fetch(barcode)]
+
+        if to_fetch:
+            with ThreadPoolExecutor(max_workers=self.max_workers,
+                                    thread_name_prefix="prefetch") as executor:
+                list(executor.map(self._fetch_quietly, to_fetch))
+
+        return len(to_fetch)
+
+    def _needs_fetch(self, barcode: str) -> bool:
+        if self.cache.is_fresh(barcode):
+            return False
+        return not (self.mirror and self.mirror.get(barcode) is not None)
+
+    def _fetch_quietly(self, barcode: str):
+        """Les échecs sont ignorés : le scan refera la demande"""
+        try:
+            self.fetch(barcode)
+        except Exception:
+            pass
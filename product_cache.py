@@ -0,0 +1,653 @@
+"""
+Cache produits persistant - OpenFoodFacts
+
+Conserve sur disque (SQLite) les réponses produit de l'API, indexées par
+code-barre, afin que les scans répétés ne repassent pas par le réseau et
+survivent aux redémarrages de l'application.
+
+- Durée de vie configurable (ttl)
+- Éviction LRU bornée en nombre d'entrées (max_entries)
+- Stale-while-revalidate : une entrée périmée est servie immédiatement
+  pendant qu'un thread en arrière-plan la rafraîchit
+- Cache négatif : un produit inconnu ou une erreur réseau sont mémorisés,
+  avec un délai de nouvelle tentative propre à chaque catégorie qui double
+  à chaque échec
+- Revalidation conditionnelle : les validateurs HTTP (ETag, Last-Modified)
+  sont conservés avec chaque produit ; une réponse 304 prolonge la
+  fraîcheur de l'entrée sans retransférer le produit
+- Clés canoniques : les codes-barres sont ramenés à leur forme GTIN-14
+  (voir barcodes.py), un même produit n'a qu'une entrée quelle que soit la
+  saisie ; un code invalide lève InvalidBarcodeError
+- Stockage compressé (voir compression.py) : zstd avec un dictionnaire
+  entraîné sur les produits du cache dès TRAIN_AFTER entrées, zlib sans
+  le module zstandard
+
+PARTAGE ENTRE PROCESSUS:
+Plusieurs workers Streamlit (ou instances CLI) peuvent pointer vers le même
+fichier (variable d'environnement PRODUCT_CACHE_PATH). Produits et résultats
+de recherche sont alors partagés. Chaque écriture est une transaction SQLite
+atomique, et une table de baux (leases) garantit qu'un seul processus
+interroge l'API pour une clé donnée pendant que les autres attendent son
+résultat.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import compression
+from barcodes import canonical_or_none, normalize
+from circuit_breaker import CircuitOpenError
+from http_validators import NOT_MODIFIED, Validators, unwrap
+
+
+class CacheEntry(NamedTuple):
+    """Entrée lue dans le cache"""
+    data: Dict
+    fetched_at: float
+    stale: bool
+    validators: Validators = Validators()
+
+
+class CacheMiss(NamedTuple):
+    """Échec récent d'une récupération (cache négatif)"""
+    kind: str
+    attempts: int
+    retry_at: float
+
+    def describe(self) -> str:
+        """Message utilisateur"""
+        reason = "non trouvé" if self.kind == MISS_NOT_FOUND else "indisponible (erreur réseau récente)"
+        return f"{reason}, nouvel essai après {time.strftime('%H:%M', time.localtime(self.retry_at))}"
+
+
+# Catégories du cache négatif
+MISS_NOT_FOUND = "not_found"
+MISS_ERROR = "error"
+
+
+class ProductCache:
+    """Cache SQLite des produits avec TTL, LRU et revalidation en arrière-plan"""
+
+    DEFAULT_PATH = "product_cache.db"
+    ENV_PATH = "PRODUCT_CACHE_PATH"
+
+    # Intervalle minimal (s) entre deux mises à jour de l'horodatage LRU
+    # d'une même entrée : évite une écriture disque à chaque lecture
+    TOUCH_INTERVAL = 60
+
+    # Attente (ms) d'un verrou tenu par un autre processus
+    BUSY_TIMEOUT = 5000
+
+    # Version du schéma (PRAGMA user_version) ; 1 : clés GTIN-14
+    SCHEMA_VERSION = 1
+
+    # Nombre de produits en cache à partir duquel un dictionnaire de
+    # compression est entraîné (puis les entrées existantes recompressées)
+    TRAIN_AFTER = 1000
+    RECOMPRESS_BATCH = 500
+
+    # Baux de requête : durée maximale d'un appel réseau, attente maximale
+    # du résultat d'un autre processus, intervalle de scrutation (s)
+    LEASE_TTL = 30
+    LEASE_WAIT = 35
+    LEASE_POLL = 0.05
+
+    # Cache négatif : (premier délai, délai maximal) en secondes avant une
+    # nouvelle tentative, doublé à chaque échec consécutif
+    MISS_SCHEDULES = {
+        MISS_NOT_FOUND: (3600, 7 * 24 * 3600),
+        MISS_ERROR: (30, 3600),
+    }
+
+    def __init__(self, db_path: Optional[str] = None, ttl: float = 24 * 3600,
+                 stale_ttl: float = 30 * 24 * 3600, max_entries: int = 50000,
+                 search_ttl: float = 3600):
+        """
+        Args:
+            db_path: Fichier SQLite du cache (défaut : PRODUCT_CACHE_PATH,
+                sinon product_cache.db)
+            ttl: Durée (s) pendant laquelle une entrée est considérée fraîche
+            stale_ttl: Durée (s) supplémentaire pendant laquelle une entrée
+                périmée est encore servie (puis revalidée)
+            max_entries: Nombre maximal de produits conservés
+            search_ttl: Durée de vie (s) d'un résultat de recherche
+        """
+        self.db_path = Path(db_path or os.environ.get(self.ENV_PATH, self.DEFAULT_PATH))
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.search_ttl = search_ttl
+
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._owner = f"{os.getpid()}:{id(self)}"
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._init_database()
+        # Estimation locale : d'autres processus écrivent aussi dans la base
+        self._count = self._conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+        self._codec = compression.load_codec(self._conn, self._lock)
+        self._training = False
+
+    def _init_database(self):
+        """Initialise la base du cache"""
+        self._conn.execute(f"PRAGMA busy_timeout={self.BUSY_TIMEOUT}")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS products (
+                barcode TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT
+            )
+        """)
+        # Migration : validateurs HTTP absents des caches antérieurs
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(products)")}
+        for column in ("etag", "last_modified"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE products ADD COLUMN {column} TEXT")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_products_accessed ON products(accessed_at)"
+        )
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS searches (
+                key TEXT PRIMARY KEY,
+                results TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_searches_fetched ON searches(fetched_at)"
+        )
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS misses (
+                barcode TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                retry_at REAL NOT NULL
+            )
+        """)
+        compression.init_dictionaries(self._conn)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS leases (
+                key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < 1:
+            self._migrate_canonical_keys()
+        self._conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        self._conn.commit()
+
+    def _migrate_canonical_keys(self):
+        """
+        v1 : entrées réindexées par GTIN-14
+
+        Les doublons d'un même produit (EAN-13 et UPC-A par exemple) sont
+        fusionnés, les codes invalides supprimés.
+        """
+        self._conn.create_function("gtin14", 1, canonical_or_none, deterministic=True)
+        for table in ("products", "misses"):
+            self._conn.execute(f"DELETE FROM {table} WHERE gtin14(barcode) IS NULL")
+            self._conn.execute(
+                f"UPDATE OR REPLACE {table} SET barcode = gtin14(barcode) "
+                f"WHERE barcode <> gtin14(barcode)"
+            )
+
+    def get(self, barcode: str) -> Optional[CacheEntry]:
+        """Lit un produit du cache (None si absent ou expiré)"""
+        barcode = normalize(barcode)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, fetched_at, accessed_at, etag, last_modified "
+                "FROM products WHERE barcode = ?",
+                (barcode,)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            data, fetched_at, accessed_at, etag, last_modified = row
+            age = now - fetched_at
+
+            if age > self.ttl + self.stale_ttl:
+                self._conn.execute("DELETE FROM products WHERE barcode = ?", (barcode,))
+                self._conn.commit()
+                self._count -= 1
+                return None
+
+            if now - accessed_at > self.TOUCH_INTERVAL:
+                self._conn.execute(
+                    "UPDATE products SET accessed_at = ? WHERE barcode = ?",
+                    (now, barcode)
+                )
+                self._conn.commit()
+
+        try:
+            data = self._codec.decode(data)
+        except ValueError:
+            # Entrée illisible (codec indisponible dans ce processus)
+            return None
+
+        return CacheEntry(data, fetched_at, age > self.ttl, Validators(etag, last_modified))
+
+    def is_fresh(self, barcode: str) -> bool:
+        """
+        Vrai si le produit est en cache et frais
+
+        Lecture seule : contrairement à get, ne met pas à jour l'horodatage
+        LRU (préchargement, qui ne doit pas protéger de l'éviction des
+        produits que personne n'a consultés).
+        """
+        barcode = normalize(barcode)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at FROM products WHERE barcode = ?", (barcode,)
+            ).fetchone()
+        return row is not None and time.time() - row[0] <= self.ttl
+
+    def put(self, barcode: str, data: Dict, validators: Optional[Validators] = None):
+        """Enregistre (ou remplace) un produit dans le cache"""
+        barcode = normalize(barcode)
+        now = time.time()
+        payload = self._codec.encode(data)
+        validators = validators or Validators()
+
+        with self._lock, self._conn:
+            exists = self._conn.execute(
+                "SELECT 1 FROM products WHERE barcode = ?", (barcode,)
+            ).fetchone()
+
+            self._conn.execute("""
+                INSERT OR REPLACE INTO products
+                    (barcode, data, fetched_at, accessed_at, etag, last_modified)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (barcode, payload, now, now, *validators))
+
+            self._conn.execute("DELETE FROM misses WHERE barcode = ?", (barcode,))
+
+            if not exists:
+                self._count += 1
+                if self._count > self.max_entries:
+                    self._evict()
+
+        if (compression.zstandard is not None and not self._codec.has_dictionary
+                and self._count >= self.TRAIN_AFTER and not self._training):
+            self._training = True
+            threading.Thread(target=self.train_dictionary, daemon=True).start()
+
+    def get_validators(self, barcode: str) -> Validators:
+        """Validateurs HTTP de l'entrée (vides si absente)"""
+        barcode = normalize(barcode)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified FROM products WHERE barcode = ?", (barcode,)
+            ).fetchone()
+        return Validators(*row) if row else Validators()
+
+    def refresh(self, barcode: str, validators: Optional[Validators] = None) -> Optional[Dict]:
+        """
+        Réponse 304 : l'entrée redevient fraîche sans être réécrite
+
+        Args:
+            validators: Validateurs renvoyés avec le 304 (remplacent les
+                anciens s'ils sont fournis)
+
+        Returns:
+            Données de l'entrée, None si elle a disparu entre-temps
+        """
+        barcode = normalize(barcode)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT data FROM products WHERE barcode = ?", (barcode,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            self._conn.execute("""
+                UPDATE products SET fetched_at = ?, accessed_at = ?,
+                    etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified)
+                WHERE barcode = ?
+            """, (now, now, *(validators or Validators()), barcode))
+            self._conn.execute("DELETE FROM misses WHERE barcode = ?", (barcode,))
+
+        try:
+            return self._codec.decode(row[0])
+        except ValueError:
+            return None
+
+    def train_dictionary(self) -> bool:
+        """
+        Entraîne un dictionnaire zstd sur un échantillon du cache, puis
+        recompresse les entrées existantes avec lui
+
+        Returns:
+            False si le module zstandard est absent ou l'échantillon trop petit
+        """
+        with self._lock:
+            payloads = [row[0] for row in self._conn.execute(
+                "SELECT data FROM products ORDER BY RANDOM() LIMIT ?",
+                (compression.MAX_TRAINING_SAMPLES,)
+            )]
+
+        dictionary = compression.train_dictionary(
+            compression.training_samples(payloads, self._codec)
+        )
+        if dictionary is None:
+            return False
+
+        with self._lock, self._conn:
+            dict_id = compression.save_dictionary(self._conn, dictionary)
+        self._codec.add_dictionary(dict_id, dictionary)
+
+        self.recompress()
+        return True
+
+    def recompress(self) -> int:
+        """
+        Réécrit avec le codec courant les entrées encodées autrement (JSON en
+        clair, zlib, autre dictionnaire)
+
+        Returns:
+            Nombre d'entrées réécrites
+        """
+        # Préfixe des entrées déjà au format courant (codec, et dictionnaire)
+        target = self._codec.encode({})
+        prefix = target[:5] if target[:1] == compression.CODEC_ZSTD_DICT else target[:1]
+        rewritten = 0
+        last = ""
+
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT barcode, data FROM products WHERE barcode > ? "
+                    "ORDER BY barcode LIMIT ?",
+                    (last, self.RECOMPRESS_BATCH)
+                ).fetchall()
+            if not rows:
+                return rewritten
+            last = rows[-1][0]
+
+            updates = []
+            for barcode, payload in rows:
+                if isinstance(payload, bytes) and payload.startswith(prefix):
+                    continue
+                try:
+                    updates.append((self._codec.encode(self._codec.decode(payload)),
+                                    barcode, payload))
+                except ValueError:
+                    continue
+
+            with self._lock, self._conn:
+                # Entrée modifiée entre-temps (data différent) : laissée telle quelle
+                self._conn.executemany(
+                    "UPDATE products SET data = ? WHERE barcode = ? AND data = ?", updates
+                )
+            rewritten += len(updates)
+
+    def _evict(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de max_entries"""
+        # Recomptage : le compteur local ignore les écritures des autres processus
+        self._count = self._conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        if self._count <= self.max_entries:
+            return
+
+        cursor = self._conn.execute("""
+            DELETE FROM products WHERE barcode IN (
+                SELECT barcode FROM products ORDER BY accessed_at LIMIT ?
+            )
+        """, (self._count - self.max_entries,))
+        self._count -= cursor.rowcount
+
+    def get_miss(self, barcode: str) -> Optional[CacheMiss]:
+        """Échec enregistré dont le délai de nouvelle tentative n'est pas écoulé"""
+        barcode = normalize(barcode)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT kind, attempts, retry_at FROM misses WHERE barcode = ?", (barcode,)
+            ).fetchone()
+
+        if row is None or row[2] <= time.time():
+            return None
+        return CacheMiss(*row)
+
+    def put_miss(self, barcode: str, kind: str):
+        """Enregistre un échec ; le délai double à chaque échec de même nature"""
+        barcode = normalize(barcode)
+        first_delay, max_delay = self.MISS_SCHEDULES[kind]
+
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT kind, attempts FROM misses WHERE barcode = ?", (barcode,)
+            ).fetchone()
+            attempts = row[1] + 1 if row and row[0] == kind else 1
+            delay = min(first_delay * 2 ** (attempts - 1), max_delay)
+
+            self._conn.execute("""
+                INSERT OR REPLACE INTO misses (barcode, kind, attempts, retry_at)
+                VALUES (?, ?, ?, ?)
+            """, (barcode, kind, attempts, time.time() + delay))
+
+    def load(self, barcode: str, fetch: Callable[[str, Validators], object],
+             wait: bool = True) -> Optional[Dict]:
+        """
+        Appel réseau coordonné entre processus, résultat enregistré en cache
+
+        Le processus qui obtient le bail appelle `fetch(barcode, validators)`
+        avec les validateurs de l'entrée en cache (vides s'il n'y en a pas) ;
+        fetch retourne les données (éventuellement Fetched avec leurs
+        validateurs), NOT_MODIFIED si l'entrée est toujours valide, ou None.
+        Les autres processus attendent que l'entrée apparaisse (ou que le
+        bail soit libéré). Aucun appel n'est fait tant qu'un échec récent est
+        enregistré : un produit inconnu (fetch retourne None) ou une erreur
+        (fetch lève une exception) sont mémorisés dans le cache négatif.
+
+        Args:
+            wait: False pour abandonner si un autre processus a déjà le bail
+        """
+        barcode = normalize(barcode)
+        received = {}
+
+        def read():
+            entry = self.get(barcode)
+            return entry.data if entry and not entry.stale else None
+
+        def fetch_recorded():
+            if self.get_miss(barcode) is not None:
+                return None
+            try:
+                result = fetch(barcode, self.get_validators(barcode))
+            except CircuitOpenError:
+                # Appel refusé localement : rien n'est su du produit
+                raise
+            except Exception:
+                self.put_miss(barcode, MISS_ERROR)
+                raise
+
+            if result is NOT_MODIFIED:
+                received["not_modified"] = True
+                return self.refresh(barcode)
+
+            data, received["validators"] = unwrap(result)
+            if data is None:
+                self.put_miss(barcode, MISS_NOT_FOUND)
+            return data
+
+        def store(data):
+            if not received.get("not_modified"):
+                self.put(barcode, data, received.get("validators"))
+
+        return self._coordinated(f"product:{barcode}", read, fetch_recorded, store, wait)
+
+    @staticmethod
+    def _search_key(query: str, page_size: int) -> str:
+        return f"search:{page_size}:{' '.join(query.lower().split())}"
+
+    def get_search(self, query: str, page_size: int) -> Optional[List[Dict]]:
+        """Résultats de recherche en cache (None si absents ou expirés)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results, fetched_at FROM searches WHERE key = ?",
+                (self._search_key(query, page_size),)
+            ).fetchone()
+
+        if row is None or time.time() - row[1] > self.search_ttl:
+            return None
+        try:
+            return self._codec.decode(row[0])
+        except ValueError:
+            return None
+
+    def put_search(self, query: str, page_size: int, results: List[Dict]):
+        """Enregistre les résultats d'une recherche (et purge les recherches expirées)"""
+        payload = self._codec.encode(results)
+        now = time.time()
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM searches WHERE fetched_at < ?", (now - self.search_ttl,)
+            )
+            self._conn.execute("""
+                INSERT OR REPLACE INTO searches (key, results, fetched_at)
+                VALUES (?, ?, ?)
+            """, (self._search_key(query, page_size), payload, now))
+
+    def load_search(self, query: str, page_size: int,
+                    fetch: Callable[[str, int], List[Dict]]) -> List[Dict]:
+        """Recherche servie par le cache, sinon coordonnée entre processus (voir load)"""
+        cached = self.get_search(query, page_size)
+        if cached is not None:
+            return cached
+
+        return self._coordinated(
+            self._search_key(query, page_size),
+            lambda: self.get_search(query, page_size),
+            lambda: fetch(query, page_size),
+            lambda results: self.put_search(query, page_size, results)
+        ) or []
+
+    def _coordinated(self, key: str, read: Callable, fetch: Callable,
+                     store: Callable, wait: bool = True):
+        """Exécute fetch sous bail ; les autres processus lisent le résultat stocké"""
+        if self._acquire_lease(key):
+            try:
+                value = fetch()
+                if value is not None:
+                    store(value)
+                return value
+            finally:
+                self._release_lease(key)
+
+        if not wait:
+            return None
+
+        deadline = time.time() + self.LEASE_WAIT
+        while time.time() < deadline:
+            time.sleep(self.LEASE_POLL)
+            value = read()
+            if value is not None:
+                return value
+            if not self._lease_active(key):
+                break
+
+        # Bail libéré ou expiré sans résultat (échec, produit inconnu, processus
+        # interrompu) : appel direct, dont le résultat est partagé
+        value = fetch()
+        if value is not None:
+            store(value)
+        return value
+
+    def _acquire_lease(self, key: str) -> bool:
+        """Prend le bail de la clé s'il est libre ou expiré (atomique)"""
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute("""
+                INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    owner = excluded.owner,
+                    expires_at = excluded.expires_at
+                WHERE leases.expires_at < ?
+            """, (key, self._owner, now + self.LEASE_TTL, now))
+            return cursor.rowcount == 1
+
+    def _release_lease(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM leases WHERE key = ? AND owner = ?", (key, self._owner)
+            )
+
+    def _lease_active(self, key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at FROM leases WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None and row[0] > time.time()
+
+    def revalidate(self, barcode: str, fetch: Callable[[str, Validators], object]):
+        """
+        Rafraîchit une entrée en arrière-plan (une seule fois par code-barre)
+
+        `fetch` suit le contrat de load (requête conditionnelle) ; en cas d'échec
+        l'entrée périmée reste servie jusqu'à son expiration. Si un autre
+        processus rafraîchit déjà l'entrée, rien n'est fait.
+        """
+        barcode = normalize(barcode)
+        with self._lock:
+            if barcode in self._refreshing:
+                return
+            self._refreshing.add(barcode)
+
+        def _refresh():
+            try:
+                self.load(barcode, fetch, wait=False)
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(barcode)
+
+        threading.Thread(target=_refresh, daemon=True).start()
+
+    def recent_barcodes(self, limit: int = 20) -> List[str]:
+        """Codes-barres consultés le plus récemment (index LRU)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT barcode FROM products ORDER BY accessed_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [barcode for (barcode,) in rows]
+
+    def iter_products(self) -> Iterator[Tuple[str, Dict]]:
+        """Parcourt les produits en cache (code-barre, données)"""
+        with self._lock:
+            rows = self._conn.execute("SELECT barcode, data FROM products").fetchall()
+
+        for barcode, data in rows:
+            try:
+                yield barcode, self._codec.decode(data)
+            except ValueError:
+                continue
+
+    def clear(self):
+        """Vide le cache"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM products")
+            self._conn.execute("DELETE FROM searches")
+            self._conn.execute("DELETE FROM misses")
+            self._count = 0
+
+    def close(self):
+        """Ferme la connexion SQLite"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,304 @@
+"""
+Miroir local OpenFoodFacts - Import de l'export complet
+
+Importe l'export OpenFoodFacts (JSONL ou CSV, compressé gzip ou non) dans
+une base SQLite indexée par code-barre. La lecture se fait ligne par ligne
+(mémoire constante) et seuls les champs utilisés par
+OpenFoodFactsAPI._parse_product sont conservés. Les produits sont indexés
+par leur clé canonique GTIN-14 (les codes invalides de l'export, codes
+internes de magasin par exemple, sont ignorés) et stockés
+compressés (zstd avec un dictionnaire entraîné sur le premier lot importé,
+voir compression.py).
+
+Exports disponibles sur https://world.openfoodfacts.org/data :
+- openfoodfacts-products.jsonl.gz
+- en.openfoodfacts.org.products.csv.gz (séparateur tabulation)
+
+UTILISATION:
+python product_mirror.py openfoodfacts-products.jsonl.gz
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+import compression
+from barcodes import canonical_or_none, to_ean
+from product_search import ProductSearchIndex
+
+
+# Nutriments (pour 100g) lus par _parse_product
+NUTRIMENT_FIELDS = (
+    "energy-kcal_100g",
+    "proteins_100g",
+    "carbohydrates_100g",
+    "fat_100g",
+    "fiber_100g",
+    "salt_100g",
+)
+
+
+class ProductMirror:
+    """Miroir local (SQLite) de la base OpenFoodFacts"""
+
+    DEFAULT_PATH = "openfoodfacts_mirror.db"
+    BATCH_SIZE = 5000
+
+    def __init__(self, db_path: str = DEFAULT_PATH):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._init_database()
+        self._codec = compression.load_codec(self._conn, self._lock)
+
+    def _init_database(self):
+        """Initialise la base du miroir"""
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS products (
+                barcode TEXT PRIMARY KEY,
+                data TEXT NOT NULL
+            ) WITHOUT ROWID
+        """)
+        compression.init_dictionaries(self._conn)
+        self._conn.commit()
+
+    def get(self, barcode: str) -> Optional[Dict]:
+        """Lit un produit du miroir (même format que la réponse API)"""
+        canonical = canonical_or_none(barcode)
+        if canonical is None:
+            return None
+
+        # Forme EAN : miroirs importés avant l'indexation GTIN-14
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM products WHERE barcode IN (?, ?)",
+                (canonical, to_ean(canonical))
+            ).fetchone()
+
+        return self._codec.decode(row[0]) if row else None
+
+    def count(self) -> int:
+        """Nombre de produits dans le miroir"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def iter_products(self) -> Iterator[Tuple[str, Dict]]:
+        """Parcourt tous les produits du miroir (code-barre, données)"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for barcode, data in conn.execute("SELECT barcode, data FROM products"):
+                yield barcode, self._codec.decode(data)
+        finally:
+            conn.close()
+
+    def import_dump(self, dump_path: str, batch_size: int = BATCH_SIZE,
+                    search_index: Optional[ProductSearchIndex] = None) -> int:
+        """
+        Importe un export OpenFoodFacts dans le miroir
+
+        Args:
+            dump_path: Fichier .jsonl / .csv, éventuellement .gz
+            batch_size: Nombre de produits insérés par transaction
+            search_index: Index de recherche locale alimenté au fil de l'import
+
+        Returns:
+            Nombre de produits importés
+        """
+        imported = 0
+        batch = []
+
+        # Verrou tenu le temps d'écrire un lot seulement : get() reste
+        # disponible pendant la lecture et la décompression de l'export
+        with self._lock:
+            self._conn.execute("PRAGMA synchronous=OFF")
+        try:
+            for barcode, data in iter_dump(dump_path):
+                canonical = canonical_or_none(barcode)
+                if canonical is None:
+                    continue
+                batch.append((canonical, data))
+
+                if len(batch) >= batch_size:
+                    imported += self._insert_batch(batch, search_index)
+                    batch = []
+
+            if batch:
+                imported += self._insert_batch(batch, search_index)
+        finally:
+            with self._lock:
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+
+        return imported
+
+    def _insert_batch(self, batch, search_index: Optional[ProductSearchIndex] = None) -> int:
+        """Insère un lot de produits en une seule transaction"""
+        if not self._codec.has_dictionary:
+            self._train_dictionary(batch)
+
+        rows = [(barcode, self._codec.encode(data)) for barcode, data in batch]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO products (barcode, data) VALUES (?, ?)", rows
+            )
+            self._conn.commit()
+
+        if search_index is not None:
+            search_index.add_many(batch)
+
+        return len(batch)
+
+    def _train_dictionary(self, batch):
+        """Dictionnaire de compression entraîné sur un lot"""
+        dictionary = compression.train_dictionary(
+            [compression.dumps(data) for _, data in batch[:compression.MAX_TRAINING_SAMPLES]]
+        )
+        if dictionary is not None:
+            with self._lock:
+                dict_id = compression.save_dictionary(self._conn, dictionary)
+            self._codec.add_dictionary(dict_id, dictionary)
+
+    def close(self):
+        """Ferme la connexion SQLite"""
+        with self._lock:
+            self._conn.close()
+
+
+# --- LECTURE DES EXPORTS ---
+
+def _open_dump(dump_path: str):
+    """Ouvre un export en texte, décompressé à la volée si .gz"""
+    if str(dump_path).endswith(".gz"):
+        return gzip.open(dump_path, "rt", encoding="utf-8", newline="")
+    return open(dump_path, "r", encoding="utf-8", newline="")
+
+
+def iter_dump(dump_path: str) -> Iterator[Tuple[str, Dict]]:
+    """Lit un export produit par produit (code-barre, données projetées)"""
+    name = str(dump_path)
+    if name.endswith(".gz"):
+        name = name[:-3]
+
+    if name.endswith((".csv", ".tsv")):
+        return _iter_csv(dump_path)
+    return _iter_jsonl(dump_path)
+
+
+def _iter_jsonl(dump_path: str) -> Iterator[Tuple[str, Dict]]:
+    """Lit un export JSONL (un produit JSON par ligne)"""
+    with _open_dump(dump_path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                product = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            barcode = str(product.get("code") or "").strip()
+            if barcode:
+                yield barcode, project_product(product)
+
+
+def _iter_csv(dump_path: str) -> Iterator[Tuple[str, Dict]]:
+    """Lit un export CSV OpenFoodFacts (séparateur tabulation)"""
+    # Certains champs (ingrédients) dépassent la limite par défaut du module csv
+    csv.field_size_limit(sys.maxsize)
+
+    with _open_dump(dump_path) as f:
+        reader = csv.DictReader(f, delimiter="\t", quoting=csv.QUOTE_NONE)
+
+        for row in reader:
+            barcode = (row.get("code") or "").strip()
+            if not barcode:
+                continue
+
+            nutriments = {}
+            for field in NUTRIMENT_FIELDS:
+                value = _to_float(row.get(field))
+                if value is not None:
+                    nutriments[field] = value
+
+            allergens = row.get("allergens_tags") or row.get("allergens") or ""
+
+            product = {
+                "product_name": row.get("product_name") or None,
+                "brands": row.get("brands") or None,
+                "nutrition_grades": row.get("nutriscore_grade") or row.get("nutrition_grades") or None,
+                "nova_group": _to_int(row.get("nova_group")),
+                "ecoscore_grade": row.get("ecoscore_grade") or None,
+                "nutriments": nutriments,
+                "ingredients_text": row.get("ingredients_text") or None,
+                "allergens_tags": [a.strip() for a in allergens.split(",") if a.strip()],
+            }
+            yield barcode, _drop_empty(product)
+
+
+def project_product(product: Dict) -> Dict:
+    """Ne conserve que les champs utilisés par _parse_product"""
+    nutriments = product.get("nutriments") or {}
+
+    return _drop_empty({
+        "product_name": product.get("product_name"),
+        "brands": product.get("brands"),
+        "nutrition_grades": product.get("nutrition_grades"),
+        "nova_group": _to_int(product.get("nova_group")),
+        "ecoscore_grade": product.get("ecoscore_grade"),
+        "nutriments": {k: nutriments[k] for k in NUTRIMENT_FIELDS if nutriments.get(k) is not None},
+        "ingredients_text": product.get("ingredients_text"),
+        "allergens_tags": product.get("allergens_tags") or [],
+    })
+
+
+def _drop_empty(product: Dict) -> Dict:
+    """Retire les champs absents pour que _parse_product applique ses valeurs par défaut"""
+    return {k: v for k, v in product.items() if v is not None}
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(float(value)) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importe un export OpenFoodFacts dans le miroir local")
+    parser.add_argument("dump", help="Export OpenFoodFacts (.jsonl, .csv, éventuellement .gz)")
+    parser.add_argument("--db", default=ProductMirror.DEFAULT_PATH, help="Base SQLite du miroir")
+    parser.add_argument("--batch-size", type=int, default=ProductMirror.BATCH_SIZE)
+    parser.add_argument("--search-db", default=ProductSearchIndex.DEFAULT_PATH,
+                        help="Index de recherche locale alimenté pendant l'import")
+    parser.add_argument("--no-search-index", action="store_true",
+                        help="Ne pas alimenter l'index de recherche locale")
+    args = parser.parse_args()
+
+    mirror = ProductMirror(args.db)
+    search_index = None if args.no_search_index else ProductSearchIndex(args.search_db)
+
+    print(f"📥 Import de {args.dump} dans {args.db}...")
+    imported = mirror.import_dump(args.dump, batch_size=args.batch_size, search_index=search_index)
+    print(f"✅ {imported} produits importés ({mirror.count()} dans le miroir)")
+
+    mirror.close()
+    if search_index is not None:
+        search_index.close()
+
+
+if __name__ == "__main__":
+    main()
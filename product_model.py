@@ -0,0 +1,312 @@
+"""
+Modèle de données produit compact
+
+Remplace la dataclass Product (un __dict__ par instance) par un
+enregistrement à __slots__ :
+- les valeurs nutritionnelles sont regroupées dans un tableau array('d') de
+  taille fixe (NaN pour une valeur non renseignée, exposée comme None)
+- les étiquettes d'allergènes et les marques sont internées : une même
+  chaîne (ou une même liste d'allergènes) n'existe qu'une fois en mémoire
+
+L'interface reste celle de la dataclass (mêmes arguments nommés, mêmes
+attributs, to_dict). La sérialisation binaire (to_bytes / from_bytes) est
+aussi utilisée par pickle, donc par st.cache_data.
+
+ProductView offre les mêmes attributs sur la réponse brute de l'API sans la
+convertir : chaque champ n'est lu qu'à l'accès (la liste d'ingrédients d'un
+produit jamais affiché n'est pas traitée).
+"""
+
+import math
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Ordre des valeurs dans le tableau de nutriments (pour 100g)
+NUTRIENT_FIELDS = ("energy_kcal", "proteins", "carbohydrates", "fat", "fiber", "salt")
+
+# Champs texte sérialisés, dans l'ordre
+TEXT_FIELDS = ("barcode", "name", "brands", "nutriscore", "ecoscore", "ingredients")
+
+NAN = float("nan")
+
+# Format binaire : version, groupe NOVA (-1 si absent), nutriments
+FORMAT_VERSION = 1
+_HEADER = struct.Struct(f"<Bh{len(NUTRIENT_FIELDS)}d")
+_TEXT_LENGTH = struct.Struct("<I")
+_TAG_LENGTH = struct.Struct("<H")
+_NONE_TEXT = 0xFFFFFFFF
+_NONE_TAGS = 0xFFFF
+
+# Clés des nutriments (pour 100g) dans la réponse de l'API
+API_NUTRIMENTS = {
+    "energy_kcal": "energy-kcal_100g",
+    "proteins": "proteins_100g",
+    "carbohydrates": "carbohydrates_100g",
+    "fat": "fat_100g",
+    "fiber": "fiber_100g",
+    "salt": "salt_100g",
+}
+
+# Champs conservés pour une ligne de liste de résultats de recherche
+SEARCH_RESULT_FIELDS = ("code", "product_name", "brands", "nutrition_grades")
+
+# Listes d'allergènes déjà rencontrées (partagées entre produits)
+_allergen_sets: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def intern_allergens(tags: Optional[Iterable[str]]) -> Optional[Tuple[str, ...]]:
+    """Tuple interné d'étiquettes d'allergènes (None conservé)"""
+    if tags is None:
+        return None
+    key = tuple(sys.intern(tag) for tag in tags)
+    return _allergen_sets.setdefault(key, key)
+
+
+def _as_float(value) -> float:
+    """Valeur numérique de l'API (NaN si absente ou non numérique)"""
+    if value is None:
+        return NAN
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+
+def _nutrient_property(index: int) -> property:
+    """Accès à une case du tableau de nutriments (None <-> NaN)"""
+
+    def getter(self) -> Optional[float]:
+        value = self._nutrients[index]
+        return None if math.isnan(value) else value
+
+    def setter(self, value: Optional[float]):
+        self._nutrients[index] = _as_float(value)
+
+    return property(getter, setter)
+
+
+class Product:
+    """Modèle de données produit"""
+
+    __slots__ = ("barcode", "name", "brands", "nutriscore", "nova_group",
+                 "ecoscore", "ingredients", "_allergens", "_nutrients")
+
+    def __init__(self, barcode: str, name: str, brands: str,
+                 nutriscore: Optional[str] = None, nova_group: Optional[int] = None,
+                 ecoscore: Optional[str] = None, energy_kcal: Optional[float] = None,
+                 proteins: Optional[float] = None, carbohydrates: Optional[float] = None,
+                 fat: Optional[float] = None, fiber: Optional[float] = None,
+                 salt: Optional[float] = None, ingredients: Optional[str] = None,
+                 allergens: Optional[List[str]] = None):
+        self.barcode = barcode
+        self.name = name
+        self.brands = sys.intern(brands) if brands else brands
+        self.nutriscore = nutriscore
+        self.nova_group = nova_group
+        self.ecoscore = ecoscore
+        self.ingredients = ingredients
+        self._allergens = intern_allergens(allergens)
+        self._nutrients = array("d", map(
+            _as_float, (energy_kcal, proteins, carbohydrates, fat, fiber, salt)
+        ))
+
+    energy_kcal = _nutrient_property(0)
+    proteins = _nutrient_property(1)
+    carbohydrates = _nutrient_property(2)
+    fat = _nutrient_property(3)
+    fiber = _nutrient_property(4)
+    salt = _nutrient_property(5)
+
+    @property
+    def allergens(self) -> Optional[Tuple[str, ...]]:
+        return self._allergens
+
+    @allergens.setter
+    def allergens(self, tags: Optional[Iterable[str]]):
+        self._allergens = intern_allergens(tags)
+
+    @property
+    def nutrients(self) -> array:
+        """Valeurs pour 100g dans l'ordre de NUTRIENT_FIELDS (NaN si absente)"""
+        return self._nutrients
+
+    def to_dict(self) -> Dict:
+        return {
+            "barcode": self.barcode,
+            "name": self.name,
+            "brands": self.brands,
+            "nutriscore": self.nutriscore,
+            "nova_group": self.nova_group,
+            "ecoscore": self.ecoscore,
+            **{name: getattr(self, name) for name in NUTRIENT_FIELDS},
+            "ingredients": self.ingredients,
+            "allergens": list(self._allergens) if self._allergens is not None else None,
+        }
+
+    def to_bytes(self) -> bytes:
+        """Sérialisation binaire compacte (voir from_bytes)"""
+        try:
+            nova = int(self.nova_group) if self.nova_group is not None else -1
+        except (TypeError, ValueError):
+            nova = -1
+
+        parts = [_HEADER.pack(FORMAT_VERSION, nova, *self._nutrients)]
+
+        for field in TEXT_FIELDS:
+            value = getattr(self, field)
+            if value is None:
+                parts.append(_TEXT_LENGTH.pack(_NONE_TEXT))
+            else:
+                encoded = value.encode("utf-8")
+                parts.append(_TEXT_LENGTH.pack(len(encoded)))
+                parts.append(encoded)
+
+        if self._allergens is None:
+            parts.append(_TAG_LENGTH.pack(_NONE_TAGS))
+        else:
+            parts.append(_TAG_LENGTH.pack(len(self._allergens)))
+            for tag in self._allergens:
+                encoded = tag.encode("utf-8")
+                parts.append(_TAG_LENGTH.pack(len(encoded)))
+                parts.append(encoded)
+
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "Product":
+        """Reconstruit un produit sérialisé par to_bytes"""
+        version, nova, *nutrients = _HEADER.unpack_from(payload)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Format de produit inconnu : {version}")
+        offset = _HEADER.size
+
+        texts = {}
+        for field in TEXT_FIELDS:
+            (length,) = _TEXT_LENGTH.unpack_from(payload, offset)
+            offset += _TEXT_LENGTH.size
+            if length == _NONE_TEXT:
+                texts[field] = None
+            else:
+                texts[field] = payload[offset:offset + length].decode("utf-8")
+                offset += length
+
+        (count,) = _TAG_LENGTH.unpack_from(payload, offset)
+        offset += _TAG_LENGTH.size
+        allergens = None
+        if count != _NONE_TAGS:
+            allergens = []
+            for _ in range(count):
+                (length,) = _TAG_LENGTH.unpack_from(payload, offset)
+                offset += _TAG_LENGTH.size
+                allergens.append(payload[offset:offset + length].decode("utf-8"))
+                offset += length
+
+        product = cls(
+            nova_group=nova if nova >= 0 else None,
+            allergens=allergens,
+            **texts
+        )
+        product._nutrients = array("d", nutrients)
+        return product
+
+    def __reduce__(self):
+        # pickle (et donc st.cache_data) passe par le format binaire
+        return (_from_bytes, (self.to_bytes(),))
+
+    def __eq__(self, other):
+        if not isinstance(other, Product):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ", ".join(f"{key}={value!r}" for key, value in self.to_dict().items())
+        return f"Product({fields})"
+
+
+def _from_bytes(payload: bytes) -> Product:
+    return Product.from_bytes(payload)
+
+
+def _view_nutrient(name: str) -> property:
+    """Nutriment lu dans la réponse brute au moment de l'accès"""
+    key = API_NUTRIMENTS[name]
+
+    def getter(self) -> Optional[float]:
+        value = _as_float(self._data.get("nutriments", {}).get(key))
+        return None if math.isnan(value) else value
+
+    return property(getter)
+
+
+class ProductView:
+    """Vue paresseuse en lecture seule sur la réponse produit de l'API"""
+
+    __slots__ = ("barcode", "_data")
+
+    def __init__(self, barcode: str, data: Dict):
+        self.barcode = barcode
+        self._data = data
+
+    @property
+    def name(self) -> str:
+        return self._data.get("product_name", "Inconnu")
+
+    @property
+    def brands(self) -> str:
+        return self._data.get("brands", "")
+
+    @property
+    def nutriscore(self) -> str:
+        return self._data.get("nutrition_grades", "").upper()
+
+    @property
+    def nova_group(self) -> Optional[int]:
+        return self._data.get("nova_group")
+
+    @property
+    def ecoscore(self) -> str:
+        return self._data.get("ecoscore_grade", "").upper()
+
+    @property
+    def ingredients(self) -> Optional[str]:
+        return self._data.get("ingredients_text")
+
+    @property
+    def allergens(self) -> Optional[Tuple[str, ...]]:
+        return intern_allergens(self._data.get("allergens_tags", []))
+
+    energy_kcal = _view_nutrient("energy_kcal")
+    proteins = _view_nutrient("proteins")
+    carbohydrates = _view_nutrient("carbohydrates")
+    fat = _view_nutrient("fat")
+    fiber = _view_nutrient("fiber")
+    salt = _view_nutrient("salt")
+
+    def to_product(self) -> Product:
+        """Convertit la vue en Product complet"""
+        return Product(
+            barcode=self.barcode,
+            name=self.name,
+            brands=self.brands,
+            nutriscore=self.nutriscore,
+            nova_group=self.nova_group,
+            ecoscore=self.ecoscore,
+            **{name: getattr(self, name) for name in NUTRIENT_FIELDS},
+            ingredients=self.ingredients,
+            allergens=self.allergens
+        )
+
+    def to_dict(self) -> Dict:
+        return self.to_product().to_dict()
+
+    def __repr__(self):
+        return f"ProductView(barcode={self.barcode!r}, name={self.name!r})"
+
+
+def slim_search_result(product: Dict) -> Dict:
+    """Réduit un résultat de recherche aux champs affichés dans une liste"""
+    return {field: product[field] for field in SEARCH_RESULT_FIELDS if field in product}
@@ -0,0 +1,138 @@
+"""
+Index de recherche locale des produits (SQLite FTS5)
+
+Recherche plein texte sur le nom et la marque des produits déjà connus
+localement (cache produits, miroir OpenFoodFacts, résultats de recherches
+précédentes), sans aller-retour vers cgi/search.pl.
+
+- Requêtes par préfixe : "nute" trouve "Nutella"
+- Insensible aux accents et à la casse : "creme" trouve "Crème"
+"""
+
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from barcodes import display
+
+
+class ProductSearchIndex:
+    """Index plein texte (FTS5) des produits par nom et marque"""
+
+    DEFAULT_PATH = "product_search.db"
+
+    def __init__(self, db_path: str = DEFAULT_PATH):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._init_database()
+
+    def _init_database(self):
+        """Initialise la table produits et son index FTS5 synchronisé par triggers"""
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS products (
+                code TEXT PRIMARY KEY,
+                product_name TEXT,
+                brands TEXT,
+                nutrition_grades TEXT
+            );
+
+            CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                product_name,
+                brands,
+                content='products',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            );
+
+            CREATE TRIGGER IF NOT EXISTS products_ai AFTER INSERT ON products BEGIN
+                INSERT INTO products_fts(rowid, product_name, brands)
+                VALUES (new.rowid, new.product_name, new.brands);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS products_ad AFTER DELETE ON products BEGIN
+                INSERT INTO products_fts(products_fts, rowid, product_name, brands)
+                VALUES ('delete', old.rowid, old.product_name, old.brands);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS products_au AFTER UPDATE ON products BEGIN
+                INSERT INTO products_fts(products_fts, rowid, product_name, brands)
+                VALUES ('delete', old.rowid, old.product_name, old.brands);
+                INSERT INTO products_fts(rowid, product_name, brands)
+                VALUES (new.rowid, new.product_name, new.brands);
+            END;
+        """)
+        self._conn.commit()
+
+    def add(self, code: str, data: Dict):
+        """Indexe un produit (données au format de l'API)"""
+        self.add_many([(code, data)])
+
+    def add_many(self, products: Iterable[Tuple[str, Dict]]) -> int:
+        """
+        Indexe plusieurs produits en une seule transaction
+
+        Les codes sont indexés sous leur forme EAN (celle des résultats de
+        l'API), quelle que soit la forme fournie (clé GTIN-14 du cache...)
+        """
+        rows = [
+            (display(code), data.get("product_name"), data.get("brands"), data.get("nutrition_grades"))
+            for code, data in products
+            if code and (data.get("product_name") or data.get("brands"))
+        ]
+
+        with self._lock:
+            self._conn.executemany("""
+                INSERT INTO products (code, product_name, brands, nutrition_grades)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(code) DO UPDATE SET
+                    product_name = excluded.product_name,
+                    brands = excluded.brands,
+                    nutrition_grades = excluded.nutrition_grades
+            """, rows)
+            self._conn.commit()
+
+        return len(rows)
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """
+        Recherche les produits dont le nom ou la marque contient tous les mots
+
+        Chaque mot est traité comme un préfixe. Les résultats ont le même
+        format que ceux de l'API (code, product_name, brands, nutrition_grades).
+        """
+        terms = re.findall(r"\w+", query)
+        if not terms:
+            return []
+
+        match = " ".join(f'"{term}"*' for term in terms)
+
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT p.code, p.product_name, p.brands, p.nutrition_grades
+                FROM products_fts
+                JOIN products p ON p.rowid = products_fts.rowid
+                WHERE products_fts MATCH ?
+                ORDER BY rank
+                LIMIT ?
+            """, (match, limit)).fetchall()
+
+        return [
+            {"code": code, "product_name": name or "", "brands": brands or "",
+             "nutrition_grades": grade or ""}
+            for code, name, brands, grade in rows
+        ]
+
+    def is_empty(self) -> bool:
+        """Indique si l'index ne contient aucun produit"""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM products LIMIT 1").fetchone() is None
+
+    def close(self):
+        """Ferme la connexion SQLite"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,263 @@
+"""
+Limiteur de débit client (seau à jetons par hôte)
+
+Les sessions requests ne réagissaient aux 429 qu'après coup, via le
+status_forcelist de Retry. Le limiteur espace les requêtes AVANT l'envoi :
+- un seau à jetons par hôte (débit soutenu `rate` en requêtes/s, rafale
+  `burst`), partagé entre tous les threads du processus
+- un 429 ou un 503 avec en-tête Retry-After suspend l'hôte pour tous les
+  threads jusqu'à l'échéance indiquée
+- les retries de urllib3 consomment aussi des jetons
+- statistiques par hôte : requêtes, requêtes retardées, temps d'attente,
+  réponses de limitation reçues
+
+RateLimitedAdapter branche le limiteur sur une session requests ; il est
+utilisé par OpenFoodFactsClient (applications CLI et Streamlit) et par
+ImageDownloader (web_scraper_advanced.py).
+
+UTILISATION:
+session.mount("https://", RateLimitedAdapter(shared_limiter(), max_retries=retry))
+"""
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Budget (requêtes/s, rafale) par hôte
+# OpenFoodFacts tolère 100 lectures produit par minute et par client
+OPENFOODFACTS_BUDGET = (100 / 60, 10)
+DEFAULT_BUDGETS: Dict[str, Tuple[float, int]] = {
+    "world.openfoodfacts.net": OPENFOODFACTS_BUDGET,
+    "world.openfoodfacts.org": OPENFOODFACTS_BUDGET,
+}
+# Hôtes sans budget explicite (images et pages scrapées)
+DEFAULT_BUDGET = (5.0, 10)
+
+# Statuts de limitation dont le Retry-After suspend l'hôte
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Délai (s) d'un en-tête Retry-After (secondes ou date HTTP), None si invalide"""
+    if not value:
+        return None
+    try:
+        return Retry.parse_retry_after(Retry(), value)
+    except Exception:
+        return None
+
+
+class TokenBucket:
+    """Seau à jetons ; un jeton par requête, le déficit se traduit en attente"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        # Instant à partir duquel le seau se remplit (futur si suspendu)
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def reserve(self, now: float) -> float:
+        """Prend un jeton et retourne l'attente (s) avant de pouvoir l'utiliser"""
+        self._refill(now)
+        self._tokens -= 1
+        wait = max(self._updated - now, 0.0)
+        if self._tokens < 0:
+            wait += -self._tokens / self.rate
+        return wait
+
+    def pause(self, until: float):
+        """Vide le seau et suspend son remplissage jusqu'à `until`"""
+        self._refill(min(until, time.monotonic()))
+        self._tokens = min(self._tokens, 0.0)
+        self._updated = max(self._updated, until)
+
+
+class _HostStats:
+    __slots__ = ("requests", "delayed", "waited", "max_wait", "throttled")
+
+    def __init__(self):
+        self.requests = 0
+        self.delayed = 0
+        self.waited = 0.0
+        self.max_wait = 0.0
+        self.throttled = 0
+
+
+class RateLimiter:
+    """Seaux à jetons par hôte, partagés entre threads"""
+
+    def __init__(self, budgets: Optional[Dict[str, Tuple[float, int]]] = None,
+                 default: Optional[Tuple[float, int]] = DEFAULT_BUDGET):
+        """
+        Args:
+            budgets: Budget (requêtes/s, rafale) par nom d'hôte
+            default: Budget des autres hôtes (None = pas de limite)
+        """
+        self.budgets = dict(DEFAULT_BUDGETS if budgets is None else budgets)
+        self.default = default
+
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._stats: Dict[str, _HostStats] = {}
+
+    def configure(self, host: str, budget: Optional[Tuple[float, int]]):
+        """Fixe le budget (requêtes/s, rafale) d'un hôte ; None = pas de limite"""
+        with self._lock:
+            self.budgets[host] = budget
+            self._buckets.pop(host, None)
+
+    def _bucket(self, host: str) -> Optional[TokenBucket]:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            budget = self.budgets.get(host, self.default)
+            if budget is None:
+                return None
+            bucket = self._buckets[host] = TokenBucket(*budget)
+        return bucket
+
+    def _host_stats(self, host: str) -> _HostStats:
+        stats = self._stats.get(host)
+        if stats is None:
+            stats = self._stats[host] = _HostStats()
+        return stats
+
+    def reserve(self, host: str) -> float:
+        """
+        Réserve un créneau pour une requête vers `host`
+
+        Returns:
+            Attente (s) à respecter avant l'envoi ; utile pour un appelant
+            asyncio, qui attend avec asyncio.sleep
+        """
+        with self._lock:
+            bucket = self._bucket(host)
+            wait = bucket.reserve(time.monotonic()) if bucket else 0.0
+
+            stats = self._host_stats(host)
+            stats.requests += 1
+            if wait > 0:
+                stats.delayed += 1
+                stats.waited += wait
+                stats.max_wait = max(stats.max_wait, wait)
+        return wait
+
+    def acquire(self, host: str) -> float:
+        """Attend le créneau d'une requête vers `host` ; retourne l'attente"""
+        wait = self.reserve(host)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def charge(self, host: str):
+        """Décompte une requête déjà espacée par ailleurs (retry de urllib3)"""
+        with self._lock:
+            bucket = self._bucket(host)
+            if bucket:
+                bucket.reserve(time.monotonic())
+            self._host_stats(host).requests += 1
+
+    def penalize(self, host: str, retry_after: Optional[float]):
+        """Réponse de limitation reçue : suspend l'hôte pendant `retry_after` s"""
+        with self._lock:
+            self._host_stats(host).throttled += 1
+            bucket = self._bucket(host)
+            if bucket and retry_after:
+                bucket.pause(time.monotonic() + retry_after)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Statistiques par hôte (temps d'attente en secondes)"""
+        with self._lock:
+            return {
+                host: {
+                    "requests": stats.requests,
+                    "delayed": stats.delayed,
+                    "waited": round(stats.waited, 3),
+                    "max_wait": round(stats.max_wait, 3),
+                    "throttled": stats.throttled,
+                }
+                for host, stats in self._stats.items()
+            }
+
+    def total_wait(self) -> float:
+        """Temps total (s) passé à attendre le limiteur, tous hôtes confondus"""
+        with self._lock:
+            return sum(stats.waited for stats in self._stats.values())
+
+
+_shared: Optional[RateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def shared_limiter() -> RateLimiter:
+    """Limiteur commun à toutes les sessions du processus"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = RateLimiter()
+        return _shared
+
+
+class _LimitedRetry(Retry):
+    """Retry dont les tentatives passent par le limiteur"""
+
+    def __init__(self, *args, limiter: Optional[RateLimiter] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limiter = limiter
+
+    def new(self, **kw):
+        kw.setdefault("limiter", self.limiter)
+        return super().new(**kw)
+
+    def increment(self, method=None, url=None, response=None, error=None,
+                  _pool=None, _stacktrace=None):
+        if self.limiter is not None and _pool is not None:
+            if response is not None and response.status in THROTTLE_STATUSES:
+                self.limiter.penalize(_pool.host, self.get_retry_after(response))
+            retry = super().increment(method, url, response, error, _pool, _stacktrace)
+            # La tentative suivante (espacée par urllib3) consomme un jeton
+            self.limiter.charge(_pool.host)
+            return retry
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter qui attend son créneau avant chaque envoi"""
+
+    def __init__(self, limiter: Optional[RateLimiter] = None, *args,
+                 acquire_on_send: bool = True, **kwargs):
+        """
+        Args:
+            limiter: Limiteur de débit (défaut : celui du processus)
+            acquire_on_send: False si l'appelant attend lui-même le créneau
+                de chaque requête avant l'envoi (OpenFoodFactsClient, pour
+                que l'attente reste hors du budget de latence) ; les
+                retries consomment toujours un jeton
+        """
+        super().__init__(*args, **kwargs)
+        self.limiter = limiter if limiter is not None else shared_limiter()
+        self.acquire_on_send = acquire_on_send
+        params = {key: value for key, value in vars(self.max_retries).items()
+                  if key != "limiter"}
+        self.max_retries = _LimitedRetry(limiter=self.limiter, **params)
+
+    def send(self, request, **kwargs):
+        host = urlparse(request.url).hostname
+        if self.acquire_on_send:
+            self.limiter.acquire(host)
+
+        response = super().send(request, **kwargs)
+
+        # Limitation non absorbée par les retries (retries épuisés ou désactivés)
+        if response.status_code in THROTTLE_STATUSES:
+            self.limiter.penalize(host, parse_retry_after(response.headers.get("Retry-After")))
+        return response
@@ -0,0 +1,160 @@
+"""
+Profils d'Apports Journaliers Recommandés (AJR)
+
+Table précalculée et immuable couvrant toutes les combinaisons
+tranche d'âge × sexe × niveau d'activité. Elle est construite une seule fois
+au démarrage. Une recherche d'AJR revient alors à une lecture de
+dictionnaire (O(1)), sans recalcul à chaque affichage.
+
+Source : moyennes des données ANSES (Agence nationale de sécurité
+sanitaire). Le niveau "modérée" correspond aux valeurs historiques de
+get_rdi.
+
+SURCHARGE SANS MODIFIER LE CODE:
+Un fichier JSON (chemin passé à load_profiles ou variable d'environnement
+RDI_PROFILES_PATH) peut remplacer ou compléter la table :
+
+{
+    "activity_factors": {"active": 1.2},
+    "extra": {"vitamin_d_ug": 15},
+    "profiles": {"Homme/<40/active": {"kcal": 3000}}
+}
+"""
+
+import json
+import os
+from itertools import product as cartesian
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+
+ENV_PATH = "RDI_PROFILES_PATH"
+
+SEXES = (None, "Homme", "Femme")
+AGE_BANDS = ("inconnu", "<40", "40-60", ">60")
+ACTIVITY_LEVELS = ("sédentaire", "modérée", "active")
+DEFAULT_ACTIVITY = "modérée"
+
+# Besoins énergétiques (kcal) pour une activité modérée
+BASE_KCAL = {
+    (None, "inconnu"): 2000.0, (None, "<40"): 2000.0,
+    (None, "40-60"): 2000.0, (None, ">60"): 2000.0,
+    ("Homme", "inconnu"): 2600.0, ("Homme", "<40"): 2700.0,
+    ("Homme", "40-60"): 2500.0, ("Homme", ">60"): 2200.0,
+    ("Femme", "inconnu"): 2100.0, ("Femme", "<40"): 2200.0,
+    ("Femme", "40-60"): 2000.0, ("Femme", ">60"): 1800.0,
+}
+
+# Multiplicateur des besoins énergétiques selon le niveau d'activité
+ACTIVITY_FACTORS = {
+    "sédentaire": 0.85,
+    "modérée": 1.0,
+    "active": 1.2,
+}
+
+# Micronutriments cibles par sexe (mg)
+MICRONUTRIENTS = {
+    None: {"calcium_mg": 950.0, "iron_mg": 11.0, "magnesium_mg": 380.0, "vitamin_c_mg": 110.0},
+    "Homme": {"calcium_mg": 950.0, "iron_mg": 11.0, "magnesium_mg": 420.0, "vitamin_c_mg": 110.0},
+    "Femme": {"calcium_mg": 950.0, "iron_mg": 16.0, "magnesium_mg": 360.0, "vitamin_c_mg": 110.0},
+}
+
+ProfileKey = Tuple[Optional[str], str, str]
+
+
+def age_band(age: Optional[int]) -> str:
+    """Tranche d'âge d'un utilisateur (0 ou None : non renseigné)"""
+    if not age:
+        return "inconnu"
+    if age < 40:
+        return "<40"
+    if age <= 60:
+        return "40-60"
+    return ">60"
+
+
+def build_profile(kcal: float, extra: Optional[Dict] = None) -> Dict:
+    """AJR dérivés des besoins énergétiques (répartition des macronutriments)"""
+    profile = {
+        'kcal': round(kcal, 0),
+        'proteins': round((kcal * 0.15) / 4, 1),  # 1g prot = 4 kcal
+        'fat': round((kcal * 0.375) / 9, 1),  # 1g lipide = 9 kcal
+        'carbs': round((kcal * 0.475) / 4, 1),  # 1g glucide = 4 kcal
+        'fiber': 30.0,
+        'salt': 5.0  # Limite max recommandée
+    }
+    profile.update(extra or {})
+    return profile
+
+
+class RDIProfiles:
+    """Table immuable des AJR indexée par (sexe, tranche d'âge, activité)"""
+
+    def __init__(self, table: Mapping[ProfileKey, Mapping]):
+        self._table = MappingProxyType({
+            key: MappingProxyType(dict(values)) for key, values in table.items()
+        })
+
+    @classmethod
+    def build(cls, activity_factors: Optional[Dict[str, float]] = None,
+              extra: Optional[Dict] = None,
+              overrides: Optional[Dict[ProfileKey, Dict]] = None) -> "RDIProfiles":
+        """
+        Précalcule toutes les combinaisons
+
+        Args:
+            activity_factors: Niveaux d'activité supplémentaires ou modifiés
+            extra: Cibles ajoutées à tous les profils
+            overrides: Valeurs imposées pour certains profils ; si "kcal" est
+                fourni, les macronutriments non précisés en sont dérivés
+        """
+        factors = {**ACTIVITY_FACTORS, **(activity_factors or {})}
+        overrides = overrides or {}
+        table = {}
+
+        for sex, band, activity in cartesian(SEXES, AGE_BANDS, factors):
+            key = (sex, band, activity)
+            override = overrides.get(key, {})
+            kcal = override.get("kcal", BASE_KCAL[sex, band] * factors[activity])
+
+            profile = build_profile(kcal, {**MICRONUTRIENTS[sex], **(extra or {})})
+            profile.update(override)
+            table[key] = profile
+
+        return cls(table)
+
+    def get(self, age: Optional[int], sex: Optional[str],
+            activity: str = DEFAULT_ACTIVITY) -> Mapping:
+        """AJR d'un profil (lecture seule)"""
+        return self._table[sex, age_band(age), activity]
+
+    @property
+    def activity_levels(self) -> Tuple[str, ...]:
+        """Niveaux d'activité disponibles"""
+        return tuple(dict.fromkeys(activity for _, _, activity in self._table))
+
+
+def load_profiles(path: Optional[str] = None) -> RDIProfiles:
+    """
+    Construit la table, avec la surcharge JSON éventuelle
+
+    Args:
+        path: Fichier JSON ; à défaut la variable RDI_PROFILES_PATH
+    """
+    path = path or os.environ.get(ENV_PATH)
+    if not path:
+        return RDIProfiles.build()
+
+    with open(Path(path), "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    overrides = {}
+    for name, values in config.get("profiles", {}).items():
+        sex, band, activity = name.split("/")
+        overrides[(None if sex in ("", "*", "None") else sex), band, activity] = values
+
+    return RDIProfiles.build(
+        activity_factors=config.get("activity_factors"),
+        extra=config.get("extra"),
+        overrides=overrides
+    )
@@ -0,0 +1,77 @@
+"""
+Regroupement des requêtes concurrentes identiques (single-flight)
+
+Lorsque plusieurs threads (ou coroutines) demandent la même clé au même
+moment - par exemple plusieurs sessions Streamlit qui scannent le même
+produit - un seul appel réel est effectué et tous les appelants reçoivent
+son résultat (ou son exception).
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    """Appel en cours partagé entre les demandeurs d'une même clé"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """Coalescence des appels concurrents identiques (threads)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Exécute fn(*args, **kwargs) une seule fois pour tous les appels
+        simultanés portant la même clé
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+
+class AsyncSingleFlight:
+    """Coalescence des appels concurrents identiques (coroutines)"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable], *args, **kwargs) -> Any:
+        """Attend le résultat partagé de fn(*args, **kwargs) pour cette clé"""
+        future = self._calls.get(key)
+
+        if future is None:
+            future = asyncio.ensure_future(fn(*args, **kwargs))
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+
+        # shield : l'annulation d'un appelant n'annule pas l'appel partagé
+        return await asyncio.shield(future)
@@ -0,0 +1,91 @@
+"""
+Connexions SQLite persistantes et réglées pour l'accès concurrent
+
+Chaque thread réutilise sa propre connexion (les connexions sqlite3 ne
+doivent pas être partagées entre threads), ouverte une seule fois avec :
+- journal WAL : lectures et écriture simultanées sans blocage mutuel
+- synchronous=NORMAL : pas de fsync à chaque commit en mode WAL
+- cache de pages et mmap agrandis
+- cache de requêtes préparées (cached_statements) : une même requête SQL
+  n'est compilée qu'une fois par connexion
+"""
+
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+
+class _PooledConnection(sqlite3.Connection):
+    """Connexion sqlite3 pouvant être référencée faiblement"""
+
+
+class SQLiteConnectionPool:
+    """Une connexion SQLite persistante par thread"""
+
+    PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,       # 16 Mo (valeur négative = Kio)
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,       # ms d'attente si la base est verrouillée
+        "foreign_keys": "ON",
+    }
+    CACHED_STATEMENTS = 256
+
+    def __init__(self, db_path: str, pragmas: Optional[Dict] = None):
+        self.db_path = Path(db_path)
+        self.pragmas = {**self.PRAGMAS, **(pragmas or {})}
+
+        self._local = threading.local()
+        # Références faibles : la connexion d'un thread terminé est libérée
+        self._connections = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        """Retourne la connexion du thread courant (ouverte au premier appel)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.add(conn)
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        """Ouvre et configure une nouvelle connexion"""
+        # check_same_thread=False uniquement pour permettre close() depuis
+        # un autre thread : chaque connexion n'est utilisée que par le sien
+        conn = sqlite3.connect(
+            self.db_path,
+            cached_statements=self.CACHED_STATEMENTS,
+            check_same_thread=False,
+            factory=_PooledConnection
+        )
+        conn.row_factory = sqlite3.Row
+
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Transaction sur la connexion du thread : commit, ou rollback si exception"""
+        conn = self.connection()
+        with conn:
+            yield conn
+
+    def close(self):
+        """Ferme toutes les connexions ouvertes"""
+        with self._lock:
+            connections = list(self._connections)
+            self._connections = weakref.WeakSet()
+
+        for conn in connections:
+            conn.close()
+
+        self._local = threading.local()
@@ -0,0 +1,159 @@
+"""
+Tests du client asynchrone contre un serveur OpenFoodFacts local (bouchon)
+
+pytest test_async_openfoodfacts.py
+"""
+
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from async_openfoodfacts import AsyncOpenFoodFactsAPI
+from conftest import NUTELLA, NUTELLA_DATA
+from openfoodfacts_common import PRODUCT_FIELDS
+from product_cache import MISS_ERROR, MISS_NOT_FOUND, ProductCache
+from product_model import ProductView
+from rate_limiter import RateLimiter
+
+
+def _client(stub, cache=None) -> AsyncOpenFoodFactsAPI:
+    # Limiteur sans budget : les tests ne doivent pas attendre
+    return AsyncOpenFoodFactsAPI(base_url=stub.base_url, cache=cache,
+                                 limiter=RateLimiter(budgets={}, default=None))
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_get_product_parses_response_and_fills_cache(stub, cache):
+    async def scenario():
+        async with _client(stub, cache) as api:
+            return await api.get_product(NUTELLA)
+
+    product = _run(scenario())
+
+    assert product.name == "Nutella"
+    assert product.energy_kcal == 539
+    assert product.barcode == NUTELLA
+    assert stub.requests == [f"/api/v2/product/{NUTELLA}"]
+    assert cache.get(NUTELLA).data == NUTELLA_DATA
+
+
+def test_get_product_served_from_cache(stub, cache):
+    cache.put(NUTELLA, NUTELLA_DATA)
+
+    async def scenario():
+        async with _client(stub, cache) as api:
+            return await api.get_product(NUTELLA)
+
+    assert _run(scenario()).name == "Nutella"
+    assert stub.requests == []
+
+
+def test_unknown_product_recorded_as_not_found(stub, cache):
+    async def scenario():
+        async with _client(stub, cache) as api:
+            return await api.get_product("96385074")
+
+    assert _run(scenario()) is None
+    assert cache.get_miss("96385074").kind == MISS_NOT_FOUND
+
+
+def test_invalid_barcode_makes_no_request(stub):
+    async def scenario():
+        async with _client(stub) as api:
+            return await api.get_product("12345")
+
+    assert _run(scenario()) is None
+    assert stub.requests == []
+
+
+def test_get_products_coalesces_equivalent_barcodes(stub):
+    async def scenario():
+        async with _client(stub) as api:
+            return await api.get_products([NUTELLA, "0" + NUTELLA, "12345"])
+
+    products, errors = _run(scenario())
+
+    assert [p.name if p else None for p in products] == ["Nutella", "Nutella", None]
+    assert list(errors) == ["12345"]
+    assert len(stub.requests) == 1
+
+
+def test_server_error_is_retried(stub):
+    stub.failures = [503]
+
+    async def scenario():
+        async with _client(stub) as api:
+            return await api.get_product(NUTELLA)
+
+    assert _run(scenario()).name == "Nutella"
+    assert len(stub.requests) == 2
+
+
+def test_legacy_not_found_response(stub, cache):
+    stub.not_found_status = 200
+
+    async def scenario():
+        async with _client(stub, cache) as api:
+            return await api.get_product("96385074")
+
+    assert _run(scenario()) is None
+    assert cache.get_miss("96385074").kind == MISS_NOT_FOUND
+
+
+def test_coalesced_lookups_record_one_miss(stub, cache):
+    async def scenario():
+        async with _client(stub, cache) as api:
+            return await asyncio.gather(*(api._fetch_product("96385074") for _ in range(5)))
+
+    assert _run(scenario()) == [None] * 5
+    assert len(stub.requests) == 1
+    assert cache.get_miss("96385074").attempts == 1
+
+
+def test_coalesced_errors_record_one_miss(stub, cache):
+    stub.failures = [400]
+
+    async def scenario():
+        async with _client(stub, cache) as api:
+            return await asyncio.gather(*(api._fetch_product(NUTELLA) for _ in range(5)),
+                                        return_exceptions=True)
+
+    results = _run(scenario())
+    assert all(isinstance(result, httpx.HTTPStatusError) for result in results)
+    miss = cache.get_miss(NUTELLA)
+    assert (miss.kind, miss.attempts) == (MISS_ERROR, 1)
+
+
+def test_stale_entry_revalidated_with_304(stub, tmp_path):
+    # ttl nul : l'entrée est périmée dès son écriture
+    cache = ProductCache(str(tmp_path / "stale.db"), ttl=0)
+
+    async def scenario():
+        async with _client(stub, cache) as api:
+            first = await api.get_product(NUTELLA)
+            second = await api.get_product(NUTELLA)
+            return first, second
+
+    first, second = _run(scenario())
+
+    assert first.name == second.name == "Nutella"
+    assert len(stub.requests) == 2
+    assert stub.conditional[0] is None
+    assert stub.conditional[1] == cache.get_validators(NUTELLA).etag
+    assert cache.get_miss(NUTELLA) is None
+    assert cache.get(NUTELLA).data == NUTELLA_DATA
+    cache.close()
+
+
+def test_product_request_is_projected(stub):
+    async def scenario():
+        async with _client(stub) as api:
+            return await api.get_product(NUTELLA)
+
+    assert isinstance(_run(scenario()), ProductView)
+    assert stub.fields == [PRODUCT_FIELDS]
@@ -0,0 +1,96 @@
+"""
+Tests du disjoncteur et du budget de latence
+
+pytest test_circuit_breaker.py
+"""
+
+import time
+
+import pytest
+
+import openfoodfacts_common
+from circuit_breaker import CircuitBreaker, CircuitOpenError, LatencyBudgetExceeded
+from conftest import NUTELLA, NUTELLA_DATA
+
+
+def _open(breaker: CircuitBreaker):
+    for _ in range(breaker.min_calls):
+        breaker.record(False, 0.1)
+
+
+def test_opens_on_error_rate():
+    breaker = CircuitBreaker(min_calls=4, error_threshold=0.5)
+    breaker.record(True, 0.1)
+    breaker.record(False, 0.1)
+    breaker.record(True, 0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record(False, 0.1)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_opens_on_p95_latency():
+    breaker = CircuitBreaker(min_calls=5, latency_threshold=1.0)
+    for latency in (0.1, 0.1, 0.1, 0.1):
+        breaker.record(True, latency)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record(True, 1.5)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()["p95_latency"] == 1.5
+
+
+def test_half_open_probe():
+    breaker = CircuitBreaker(min_calls=2, reset_timeout=0.05)
+    _open(breaker)
+    time.sleep(0.06)
+
+    # Un seul appel de test à la fois
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    # Échec : le circuit se rouvre
+    breaker.record(False, 0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # Succès : le circuit se referme
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record(True, 0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()["calls"] == 0
+
+
+def test_call_over_budget_counts_as_failure():
+    breaker = CircuitBreaker(min_calls=1)
+
+    with pytest.raises(LatencyBudgetExceeded):
+        breaker.call(time.sleep, 0.5, budget=0.05)
+
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_slow_call_threshold_below_budget():
+    breaker = openfoodfacts_common.circuit_breaker(openfoodfacts_common.LATENCY_BUDGET)
+
+    assert breaker.latency_threshold < openfoodfacts_common.LATENCY_BUDGET
+    # Appels lents mais dans le budget : le disjoncteur doit pouvoir s'ouvrir
+    for _ in range(breaker.min_calls):
+        breaker.record(True, 0.9 * openfoodfacts_common.LATENCY_BUDGET)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_open_circuit_serves_cache_without_network(api, cache, stub, capsys):
+    cache.put(NUTELLA, NUTELLA_DATA)
+    _open(api.breaker)
+
+    assert api.get_product(NUTELLA).name == "Nutella"
+    assert api.get_product("96385074") is None
+    assert "indisponible" in capsys.readouterr().out
+    assert stub.requests == []
@@ -0,0 +1,103 @@
+"""
+Tests de l'encodage compact des caches (zlib, zstd, dictionnaires)
+
+pytest test_compression.py
+"""
+
+import json
+import zlib
+
+import pytest
+
+import compression
+from barcodes import check_digit, normalize
+from compression import PayloadCodec
+from product_cache import ProductCache
+
+
+def _product(i: int) -> dict:
+    return {
+        "product_name": f"Produit {i}",
+        "brands": ("Ferrero", "Danone", "Lu", "Bonne Maman")[i % 4],
+        "nutrition_grades": "abcde"[i % 5],
+        "nova_group": 1 + i % 4,
+        "nutriments": {"energy-kcal_100g": 100 + i % 400, "proteins_100g": i % 30,
+                       "fat_100g": i % 50, "salt_100g": round(i % 20 / 10, 1)},
+        "ingredients_text": f"Farine de blé, sucre, huile de tournesol ({i % 17} %)",
+        "allergens_tags": ["en:gluten", "en:milk"][: i % 3],
+    }
+
+
+def _barcode(i: int) -> str:
+    code = f"{i:012d}"
+    return code + check_digit(code)
+
+
+def test_legacy_payloads_still_readable():
+    codec = PayloadCodec()
+    data = _product(1)
+
+    assert codec.decode(json.dumps(data)) == data
+    assert codec.decode(compression.CODEC_ZLIB + zlib.compress(compression.dumps(data))) == data
+    assert codec.decode(codec.encode(data)) == data
+
+
+def test_invalid_payloads_raise_value_error():
+    codec = PayloadCodec()
+
+    with pytest.raises(ValueError):
+        codec.decode(b"?{}")
+    with pytest.raises(ValueError):
+        codec.decode(compression.CODEC_ZLIB + b"pas du zlib")
+
+
+def test_dictionary_round_trip_and_shared_loading():
+    pytest.importorskip("zstandard")
+    samples = [compression.dumps(_product(i)) for i in range(compression.MIN_TRAINING_SAMPLES)]
+    dictionary = compression.train_dictionary(samples)
+    assert dictionary is not None
+
+    codec = PayloadCodec()
+    plain = codec.encode(_product(7))
+    codec.add_dictionary(1, dictionary)
+    payload = codec.encode(_product(7))
+
+    assert payload[:1] == compression.CODEC_ZSTD_DICT
+    assert len(payload) < len(plain)
+    # Autre processus : le dictionnaire est lu par identifiant à la demande
+    other = PayloadCodec(loader={1: dictionary}.get)
+    assert other.decode(payload) == _product(7)
+    with pytest.raises(ValueError):
+        PayloadCodec().decode(payload)
+
+
+def test_too_few_samples_no_dictionary():
+    assert compression.train_dictionary([compression.dumps(_product(0))]) is None
+
+
+def test_cache_train_dictionary_recompresses_entries(tmp_path):
+    pytest.importorskip("zstandard")
+    path = str(tmp_path / "cache.db")
+    cache = ProductCache(path)
+    for i in range(compression.MIN_TRAINING_SAMPLES):
+        cache.put(_barcode(i), _product(i))
+    # Entrées d'anciennes versions : JSON en clair et zlib
+    cache._conn.execute("UPDATE products SET data = ? WHERE barcode = ?",
+                        (json.dumps(_product(1)), normalize(_barcode(1))))
+    cache._conn.execute("UPDATE products SET data = ? WHERE barcode = ?",
+                        (compression.CODEC_ZLIB + zlib.compress(compression.dumps(_product(2))),
+                         normalize(_barcode(2))))
+    cache._conn.commit()
+
+    assert cache.train_dictionary()
+
+    codecs = {bytes(data)[:1] for (data,) in cache._conn.execute("SELECT data FROM products")}
+    assert codecs == {compression.CODEC_ZSTD_DICT}
+    assert cache.recompress() == 0
+    assert cache.get(_barcode(1)).data == _product(1)
+    cache.close()
+
+    # Nouvelle connexion : le dictionnaire est relu depuis la base
+    reopened = ProductCache(path)
+    assert reopened.get(_barcode(2)).data == _product(2)
+    reopened.close()
@@ -0,0 +1,66 @@
+"""
+Tests de l'export analytique du journal (Parquet, Arrow IPC)
+
+pytest test_consumption_export.py
+"""
+
+from datetime import date, datetime
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pytest.importorskip("pandas")
+
+from consumption_export import export_consumption, iter_record_batches, load_consumption
+from consumption_tracker import ConsumptionTracker
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "journal.db")
+    tracker = ConsumptionTracker(path)
+    tracker.add_consumptions([
+        {"barcode": "3017620422003", "product_name": "Nutella", "quantity": 30,
+         "timestamp": "2024-05-01T08:00:00", "energy_kcal": 539, "nutriscore": "e",
+         "nova_group": 4},
+        {"barcode": "3560070614202", "product_name": "Pomme", "quantity": 150,
+         "timestamp": "2024-05-02T12:30:00", "energy_kcal": 52},
+        {"barcode": "5449000000996", "timestamp": "2024-06-01T16:00:00"},
+    ])
+    tracker.close()
+    return path
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".arrow"])
+def test_export_round_trip(db_path, tmp_path, suffix):
+    output = str(tmp_path / f"journal{suffix}")
+
+    assert export_consumption(output, db_path=db_path, batch_size=2) == 3
+
+    df = load_consumption(output, arrow_dtypes=False)
+    assert list(df["barcode"]) == ["03017620422003", "03560070614202", "05449000000996"]
+    assert list(df["quantity"]) == [30.0, 150.0, 100.0]
+    assert df["timestamp"].iloc[1] == datetime(2024, 5, 2, 12, 30)
+    assert df["day"].iloc[2] == date(2024, 6, 1)
+    assert df["nutriscore"].iloc[0] == "e"
+    assert df["energy_kcal"].isna().tolist() == [False, False, True]
+    assert df["nova_group"].iloc[0] == 4
+    assert df["nova_group"].isna().tolist() == [False, True, True]
+
+
+def test_export_date_range_and_columns(db_path, tmp_path):
+    output = str(tmp_path / "mai.arrow")
+
+    assert export_consumption(output, db_path=db_path, start_date="2024-05-02",
+                              end_date="2024-05-31") == 1
+
+    df = load_consumption(output, columns=["product_name", "energy_kcal"])
+    assert list(df.columns) == ["product_name", "energy_kcal"]
+    assert df["product_name"].tolist() == ["Pomme"]
+
+
+def test_batches_have_fixed_size(db_path):
+    batches = list(iter_record_batches(db_path, batch_size=2))
+
+    assert [batch.num_rows for batch in batches] == [2, 1]
+    assert batches[0].schema.field("timestamp").type == pa.timestamp("us")
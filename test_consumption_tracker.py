@@ -0,0 +1,260 @@
+"""
+Tests du journal de consommation (import en masse, migrations, statistiques)
+
+pytest test_consumption_tracker.py
+"""
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from consumption_tracker import ConsumptionTracker, local_timestamp
+
+NUTELLA = "3017620422003"
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    tracker = ConsumptionTracker(str(tmp_path / "journal.db"))
+    yield tracker
+    tracker.close()
+
+
+def _rows(tracker, columns="barcode, timestamp, day"):
+    return [tuple(row) for row in tracker.pool.connection().execute(
+        f"SELECT {columns} FROM consumption ORDER BY id"
+    )]
+
+
+def test_import_converts_offsets_to_local_time(tracker):
+    aware = datetime(2024, 5, 1, 23, 30, tzinfo=timezone(timedelta(hours=-7)))
+    expected = aware.astimezone().replace(tzinfo=None)
+
+    tracker.add_consumptions([
+        {"barcode": NUTELLA, "timestamp": aware.isoformat(), "energy_kcal": 539},
+        {"barcode": NUTELLA, "timestamp": "2024-05-01T08:00:00", "energy_kcal": 539},
+    ])
+
+    assert _rows(tracker) == [
+        ("03017620422003", expected.isoformat(), expected.date().isoformat()),
+        ("03017620422003", "2024-05-01T08:00:00", "2024-05-01"),
+    ]
+    days = {summary["date"] for summary in tracker.get_daily_summaries("2024-01-01", "2024-12-31")}
+    assert days == {expected.date().isoformat(), "2024-05-01"}
+
+
+def test_migration_converts_existing_offsets(tmp_path):
+    path = str(tmp_path / "journal.db")
+    ConsumptionTracker(path).close()
+
+    aware = "2024-05-01T23:30:00-07:00"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "INSERT INTO consumption (barcode, quantity, timestamp, day, energy_kcal) "
+        "VALUES (?, 100, ?, '2024-05-01', 100)", (NUTELLA, aware)
+    )
+    conn.execute("PRAGMA user_version = 4")
+    conn.commit()
+    conn.close()
+
+    tracker = ConsumptionTracker(path)
+    expected = local_timestamp(aware)
+    assert _rows(tracker) == [(NUTELLA, expected, expected[:10])]
+    assert tracker.get_daily_summary(expected[:10])["total_kcal"] == 100
+    tracker.close()
+
+
+def test_import_keeps_invalid_barcodes(tracker):
+    imported = tracker.add_consumptions([
+        {"barcode": "3017620422003", "timestamp": "2024-05-01T08:00:00"},
+        {"barcode": " 12345 ", "timestamp": "2024-05-01T09:00:00"},
+    ])
+
+    assert imported == 2
+    assert [barcode for (barcode,) in _rows(tracker, "barcode")] == ["03017620422003", "12345"]
+
+
+def _stats_entries(tracker):
+    tracker.add_consumptions([
+        {"barcode": NUTELLA, "timestamp": "2024-05-01T08:00:00", "quantity": 30,
+         "energy_kcal": 539, "nutriscore": "e", "nova_group": 4},
+        {"barcode": NUTELLA, "timestamp": "2024-05-02T08:00:00", "quantity": 20,
+         "energy_kcal": 539, "nutriscore": "E", "nova_group": "4"},
+        {"barcode": "3560070614202", "timestamp": "2024-05-01T12:00:00", "quantity": 200,
+         "energy_kcal": 52, "nutriscore": "a", "nova_group": 1},
+        {"barcode": "5449000000996", "timestamp": "2024-05-01T13:00:00", "quantity": 330,
+         "energy_kcal": 42, "nutriscore": "", "nova_group": "sans objet"},
+        {"barcode": "3017620422003", "timestamp": "2024-06-01T08:00:00", "quantity": 100,
+         "energy_kcal": 539, "nutriscore": "e", "nova_group": 4},
+    ])
+
+
+def test_product_stats_orderings(tracker):
+    _stats_entries(tracker)
+
+    def ranking(order_by):
+        stats = tracker.get_product_stats("2024-05-01", "2024-05-31", order_by=order_by)
+        return [row["barcode"] for row in stats]
+
+    assert ranking("kcal") == ["03017620422003", "05449000000996", "03560070614202"]
+    assert ranking("frequency") == ["03017620422003", "05449000000996", "03560070614202"]
+    assert ranking("quantity") == ["05449000000996", "03560070614202", "03017620422003"]
+
+    nutella = tracker.get_product_stats("2024-05-01", "2024-05-31", limit=1)
+    assert nutella == [{
+        "barcode": "03017620422003", "product_name": None, "num_entries": 2,
+        "total_quantity": 50.0, "avg_quantity": 25.0, "total_kcal": 269.5,
+    }]
+
+    with pytest.raises(ValueError):
+        tracker.get_product_stats("2024-05-01", "2024-05-31", order_by="prix")
+
+
+def test_score_distribution_groups_missing_scores_last(tracker):
+    _stats_entries(tracker)
+    # Ligne antérieure au retrait des Nutri-Scores vides à l'enregistrement
+    with tracker.pool.transaction() as conn:
+        conn.execute(
+            "INSERT INTO consumption (barcode, quantity, timestamp, day, nutriscore, energy_kcal) "
+            "VALUES ('03560070614202', 100, '2024-05-03T08:00:00', '2024-05-03', '', 52)"
+        )
+
+    distribution = tracker.get_score_distribution("2024-05-01", "2024-05-31")
+
+    assert [(g["nutriscore"], g["num_entries"]) for g in distribution["nutriscore"]] == [
+        ("A", 1), ("E", 2), (None, 2)
+    ]
+    assert [(g["nova_group"], g["num_entries"]) for g in distribution["nova_group"]] == [
+        (1, 1), (4, 2), (None, 2)
+    ]
+    shares = [g["kcal_share"] for g in distribution["nutriscore"]]
+    assert sum(shares) == pytest.approx(100, abs=0.2)
+    assert distribution["nutriscore"][1]["total_kcal"] == 269.5
+
+
+def test_legacy_database_gets_indexed_day_column(tmp_path):
+    # Schéma des versions antérieures : pas de colonne day, user_version 0
+    path = str(tmp_path / "ancien.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE consumption (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, barcode TEXT NOT NULL, product_name TEXT,
+            quantity REAL DEFAULT 100, unit TEXT DEFAULT 'g', timestamp TEXT NOT NULL,
+            nutriscore TEXT, energy_kcal REAL, proteins REAL, carbohydrates REAL, fat REAL
+        )
+    """)
+    conn.execute("INSERT INTO consumption (barcode, timestamp, energy_kcal) "
+                 "VALUES (?, '2024-05-01T08:00:00', 539)", (NUTELLA,))
+    conn.commit()
+    conn.close()
+
+    tracker = ConsumptionTracker(path)
+    # Insertion par une ancienne version de l'application, sans day
+    with tracker.pool.transaction() as conn:
+        conn.execute("INSERT INTO consumption (barcode, timestamp, energy_kcal) "
+                     "VALUES (?, '2024-05-01T20:00:00', 100)", (NUTELLA,))
+
+    assert [row[0] for row in _rows(tracker, "day")] == ["2024-05-01", "2024-05-01"]
+    assert len(tracker.get_daily_entries("2024-05-01")) == 2
+    assert tracker.get_daily_summary("2024-05-01")["total_kcal"] == 639
+
+    plan = " ".join(row[3] for row in tracker.pool.connection().execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM consumption WHERE day = ? ORDER BY timestamp DESC",
+        ("2024-05-01",)
+    ))
+    assert "INDEX idx_consumption_day (day=?)" in plan
+    tracker.close()
+
+
+def _recomputed_totals(tracker):
+    return {row[0]: (round(row[1], 6), row[2]) for row in tracker.pool.connection().execute("""
+        SELECT day, COALESCE(SUM(energy_kcal * quantity / 100), 0), COUNT(*)
+        FROM consumption GROUP BY day
+    """)}
+
+
+def _materialized_totals(tracker):
+    return {row[0]: (round(row[1], 6), row[2]) for row in tracker.pool.connection().execute(
+        "SELECT day, total_kcal, num_products FROM daily_totals"
+    )}
+
+
+def test_daily_totals_follow_inserts_updates_and_deletes(tracker):
+    tracker.add_consumptions([
+        {"barcode": NUTELLA, "timestamp": "2024-05-01T08:00:00", "quantity": 30, "energy_kcal": 539},
+        {"barcode": NUTELLA, "timestamp": "2024-05-01T16:00:00", "quantity": 20, "energy_kcal": 539},
+        {"barcode": NUTELLA, "timestamp": "2024-05-02T08:00:00", "quantity": 15, "energy_kcal": 539},
+        {"barcode": NUTELLA, "timestamp": "2024-05-02T12:00:00"},  # énergie inconnue
+    ])
+    assert _materialized_totals(tracker) == _recomputed_totals(tracker)
+    assert tracker.get_daily_summary("2024-05-01")["total_kcal"] == 269.5
+
+    first, second, third, _ = [row[0] for row in _rows(tracker, "id")]
+    with tracker.pool.transaction() as conn:
+        conn.execute("UPDATE consumption SET quantity = 60 WHERE id = ?", (first,))
+        conn.execute("UPDATE consumption SET day = '2024-05-03', timestamp = '2024-05-03T08:00:00' "
+                     "WHERE id = ?", (third,))
+    assert _materialized_totals(tracker) == _recomputed_totals(tracker)
+
+    tracker.delete_consumption_entry(second)
+    tracker.delete_daily_summary("2024-05-03")
+    assert _materialized_totals(tracker) == _recomputed_totals(tracker)
+    assert set(_materialized_totals(tracker)) == {"2024-05-01", "2024-05-02"}
+    assert tracker.get_daily_summary("2024-05-03")["num_products"] == 0
+
+    # Rollback : les totaux suivent la transaction
+    with pytest.raises(RuntimeError):
+        with tracker.pool.transaction() as conn:
+            conn.execute("DELETE FROM consumption")
+            raise RuntimeError("abandon")
+    assert _materialized_totals(tracker) == _recomputed_totals(tracker)
+
+
+def test_history_pages_with_timestamp_ties(tracker):
+    yesterday = (datetime.now() - timedelta(days=1)).replace(hour=12, minute=0, second=0,
+                                                            microsecond=0)
+    breakfast = yesterday.replace(hour=8).isoformat()
+    tracker.add_consumptions(
+        [{"barcode": NUTELLA, "timestamp": yesterday.isoformat(), "energy_kcal": 100}] * 5
+        + [{"barcode": NUTELLA, "timestamp": breakfast, "energy_kcal": 100}] * 2
+        # Hors de la période demandée
+        + [{"barcode": NUTELLA, "timestamp": "2000-01-01T08:00:00"}]
+    )
+
+    pages, cursor = [], None
+    while True:
+        entries, cursor = tracker.get_history_page(days=7, limit=3, cursor=cursor)
+        pages.append([(entry["timestamp"], entry["id"]) for entry in entries])
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    keys = [key for page in pages for key in page]
+    assert keys == sorted(keys, reverse=True)
+    assert len(set(keys)) == 7
+    assert keys == [(entry["timestamp"], entry["id"]) for entry in tracker.get_history(days=7)]
+
+
+def test_history_grouped_server_side(tracker):
+    lunch = (datetime.now() - timedelta(days=1)).replace(hour=12, minute=30, second=0,
+                                                        microsecond=0)
+    tracker.add_consumptions([
+        {"barcode": NUTELLA, "timestamp": lunch.replace(hour=8).isoformat(),
+         "quantity": 20, "energy_kcal": 500},
+        {"barcode": NUTELLA, "timestamp": lunch.isoformat(), "quantity": 30, "energy_kcal": 500},
+        {"barcode": "3560070614202", "timestamp": lunch.isoformat(), "quantity": 200,
+         "energy_kcal": 50},
+    ])
+
+    by_day = tracker.get_history_grouped(days=7, group_by="day")
+    assert [(g["grp"], g["num_entries"], g["total_kcal"]) for g in by_day] == [
+        (lunch.date().isoformat(), 3, 350.0)
+    ]
+    by_meal = tracker.get_history_grouped(days=7, group_by="meal")
+    assert [(g["label"], g["num_entries"]) for g in by_meal] == [("Petit-déjeuner", 1), ("Déjeuner", 2)]
+    by_product = tracker.get_history_grouped(days=7, group_by="product", limit=1, offset=1)
+    assert [(g["grp"], g["total_quantity"]) for g in by_product] == [("03560070614202", 200.0)]
+
+    with pytest.raises(ValueError):
+        tracker.get_history_grouped(group_by="semaine")
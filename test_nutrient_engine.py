@@ -0,0 +1,63 @@
+"""
+Tests du moteur de calcul nutritionnel vectorisé
+
+pytest test_nutrient_engine.py
+"""
+
+import numpy as np
+import pytest
+
+import nutrient_engine
+from product_model import Product
+
+RDI = {"kcal": 2000, "proteins": 50, "carbs": 260, "fat": 70, "fiber": 0, "salt": 6}
+
+
+def _products():
+    return [
+        Product("3017620422003", "Nutella", "Ferrero", energy_kcal=539, proteins=6.3,
+                carbohydrates=57.5, fat=30.9, salt=0.107),  # fibres non renseignées
+        Product("3560070614202", "Pomme", "", energy_kcal=52, proteins=0.3,
+                carbohydrates=14, fat=0.2, fiber=2.4, salt=0),
+    ]
+
+
+def test_portions_scale_per_100g_values():
+    analysis = nutrient_engine.analyze(_products(), [30, 150])
+
+    np.testing.assert_allclose(analysis.portions[0, :4], [161.7, 1.89, 17.25, 9.27])
+    np.testing.assert_allclose(analysis.portions[1, :4], [78, 0.45, 21, 0.3])
+    np.testing.assert_allclose(analysis.per_100g[1], [52, 0.3, 14, 0.2, 2.4, 0])
+
+
+def test_missing_values_stay_nan_and_skip_totals():
+    analysis = nutrient_engine.analyze(_products(), [30, 150])
+    fiber = nutrient_engine.NUTRIENTS.index("fiber")
+
+    assert np.isnan(analysis.portions[0, fiber])
+    assert analysis.totals[fiber] == pytest.approx(3.6)
+    assert analysis.totals[0] == pytest.approx(239.7)
+    assert np.isnan(analysis.percent_rdi).all()
+
+
+def test_percent_rdi_ignores_zero_or_missing_targets():
+    analysis = nutrient_engine.analyze(_products(), [100, 100], RDI)
+    fiber = nutrient_engine.NUTRIENTS.index("fiber")
+
+    assert analysis.percent_rdi[0, 0] == pytest.approx(26.95)
+    assert analysis.total_percent_rdi[0] == pytest.approx((539 + 52) / 20)
+    assert np.isnan(analysis.total_percent_rdi[fiber])
+
+
+def test_matrix_from_journal_rows():
+    rows = [{"energy_kcal": 539, "proteins": None, "carbohydrates": "57.5"}]
+
+    matrix = nutrient_engine.nutrient_matrix(rows, ("energy_kcal", "proteins", "carbohydrates"))
+
+    assert matrix.shape == (1, 3)
+    assert matrix[0, 0] == 539 and np.isnan(matrix[0, 1]) and matrix[0, 2] == 57.5
+    assert nutrient_engine.nutrient_matrix([]).shape == (0, len(nutrient_engine.NUTRIENTS))
+
+
+def test_format_values():
+    assert nutrient_engine.format_values(np.array([1.25, np.nan]), "{:.1f} g") == ["1.2 g", "N/A"]
@@ -0,0 +1,44 @@
+"""
+Tests du client OpenFoodFacts de l'application contre un serveur local (bouchon)
+
+pytest test_nutrition_app.py
+"""
+
+from conftest import NUTELLA, NUTELLA_DATA
+from openfoodfacts_common import PRODUCT_FIELDS
+from product_cache import MISS_NOT_FOUND
+from product_model import ProductView
+
+
+def test_get_product(api, cache):
+    product = api.get_product(NUTELLA)
+
+    assert product.name == "Nutella"
+    assert cache.get(NUTELLA).data == NUTELLA_DATA
+
+
+def test_unknown_product_recorded_as_not_found(api, cache, stub, capsys):
+    assert api.get_product("96385074") is None
+    assert cache.get_miss("96385074").kind == MISS_NOT_FOUND
+    assert "non trouvé" in capsys.readouterr().out
+
+    # Cache négatif : aucun nouvel appel, échec signalé
+    assert api.get_product("96385074") is None
+    assert "nouvel essai après" in capsys.readouterr().out
+    assert len(stub.requests) == 1
+
+
+def test_get_products_reports_unknown_products(api, stub):
+    products, errors = api.get_products([NUTELLA, "96385074"])
+
+    assert products[0].name == "Nutella"
+    assert products[1] is None
+    assert errors == {"96385074": "❌ Produit 96385074 non trouvé dans la base OpenFoodFacts"}
+    assert len(stub.requests) == 2
+
+
+def test_product_request_is_projected(api, stub):
+    product = api.get_product(NUTELLA)
+
+    assert isinstance(product, ProductView)
+    assert stub.fields == [PRODUCT_FIELDS]
@@ -0,0 +1,46 @@
+"""
+Tests du préchargement des produits probables
+
+pytest test_prefetch.py
+"""
+
+import pytest
+
+from conftest import NUTELLA, NUTELLA_DATA
+from consumption_tracker import ConsumptionTracker
+from prefetch import ProductPrefetcher
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    tracker = ConsumptionTracker(str(tmp_path / "journal.db"))
+    yield tracker
+    tracker.close()
+
+
+def test_invalid_journal_barcodes_are_skipped(cache, tracker):
+    # Code interne conservé par l'import, puis produit valide
+    tracker.add_consumptions([{"barcode": "12345"}, {"barcode": NUTELLA}])
+    fetched = []
+
+    def fetch(barcode):
+        fetched.append(barcode)
+        cache.put(barcode, NUTELLA_DATA)
+        return NUTELLA_DATA
+
+    prefetcher = ProductPrefetcher(cache, fetch, tracker)
+
+    assert prefetcher.predict() == ["0" + NUTELLA]
+    assert prefetcher.warm_now() == 1
+    assert fetched == ["0" + NUTELLA]
+
+
+def test_prefetch_check_leaves_lru_order_alone(cache, tracker):
+    cache.put(NUTELLA, NUTELLA_DATA)
+    cache._conn.execute("UPDATE products SET accessed_at = 0")
+    cache._conn.commit()
+
+    prefetcher = ProductPrefetcher(cache, lambda barcode: None, tracker)
+
+    assert prefetcher.warm_now() == 0
+    assert cache._conn.execute("SELECT accessed_at FROM products").fetchone()[0] == 0
@@ -0,0 +1,41 @@
+"""
+Tests du cache produits partagé (baux, recherches, cache négatif)
+
+pytest test_product_cache.py
+"""
+
+import time
+
+from conftest import NUTELLA_DATA
+
+NUTELLA = "03017620422003"
+
+
+def test_expired_lease_result_is_stored(cache):
+    # Bail d'un autre processus, interrompu avant d'avoir écrit le produit
+    cache._conn.execute(
+        "INSERT INTO leases (key, owner, expires_at) VALUES (?, 'mort', ?)",
+        (f"product:{NUTELLA}", time.time() + 0.2)
+    )
+    cache._conn.commit()
+    calls = []
+
+    def fetch(barcode, validators):
+        calls.append(barcode)
+        return NUTELLA_DATA
+
+    assert cache.load(NUTELLA, fetch) == NUTELLA_DATA
+    assert cache.get(NUTELLA).data == NUTELLA_DATA
+    assert calls == [NUTELLA]
+
+
+def test_expired_searches_are_pruned(cache):
+    cache.search_ttl = 60
+    cache.put_search("nutella", 20, [{"code": NUTELLA}])
+    cache._conn.execute("UPDATE searches SET fetched_at = fetched_at - 120")
+    cache._conn.commit()
+
+    cache.put_search("pomme", 20, [])
+
+    keys = [key for (key,) in cache._conn.execute("SELECT key FROM searches")]
+    assert keys == [cache._search_key("pomme", 20)]
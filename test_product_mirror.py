@@ -0,0 +1,150 @@
+"""
+Tests de l'import du miroir local sur de petits exports synthétiques
+
+pytest test_product_mirror.py
+"""
+
+import gzip
+import json
+import threading
+
+import pytest
+
+import product_mirror
+from product_mirror import ProductMirror, iter_dump
+from product_search import ProductSearchIndex
+
+PRODUCTS = [
+    {
+        "code": "3017620422003",
+        "product_name": "Nutella",
+        "brands": "Ferrero",
+        "nutrition_grades": "e",
+        "nova_group": "4",
+        "nutriments": {"energy-kcal_100g": 539, "sugars_100g": 56.3},
+        "allergens_tags": ["en:milk", "en:nuts"],
+        "categories": "Pâtes à tartiner",  # champ non conservé
+    },
+    {"code": "012345678905", "product_name": "Peanut butter"},
+    {"code": "96385074", "product_name": "Pomme"},
+    {"code": "12345", "product_name": "Code interne de magasin"},
+    {"code": "3017620422004", "product_name": "Clé de contrôle incorrecte"},
+    {"product_name": "Sans code-barre"},
+]
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    mirror = ProductMirror(str(tmp_path / "mirror.db"))
+    yield mirror
+    mirror.close()
+
+
+def _write_jsonl_gz(path, products):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for product in products:
+            f.write(json.dumps(product) + "\n")
+        f.write("{ligne corrompue\n")
+
+
+def _write_csv(path, products):
+    header = ["code", "product_name", "brands", "nutriscore_grade", "nova_group",
+              "energy-kcal_100g", "allergens_tags"]
+    lines = ["\t".join(header)]
+    for product in products:
+        lines.append("\t".join([
+            product.get("code", ""),
+            product.get("product_name", ""),
+            product.get("brands", ""),
+            product.get("nutrition_grades", ""),
+            str(product.get("nova_group", "")),
+            str(product.get("nutriments", {}).get("energy-kcal_100g", "")),
+            ",".join(product.get("allergens_tags", [])),
+        ]))
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def test_import_jsonl_skips_invalid_codes(tmp_path, mirror):
+    dump = tmp_path / "products.jsonl.gz"
+    _write_jsonl_gz(dump, PRODUCTS)
+
+    assert mirror.import_dump(str(dump), batch_size=2) == 3
+    assert mirror.count() == 3
+    assert mirror.get("12345") is None
+
+
+def test_import_projects_api_fields(tmp_path, mirror):
+    dump = tmp_path / "products.jsonl.gz"
+    _write_jsonl_gz(dump, PRODUCTS)
+    mirror.import_dump(str(dump))
+
+    assert mirror.get("3017620422003") == {
+        "product_name": "Nutella",
+        "brands": "Ferrero",
+        "nutrition_grades": "e",
+        "nova_group": 4,
+        "nutriments": {"energy-kcal_100g": 539},
+        "allergens_tags": ["en:milk", "en:nuts"],
+    }
+
+
+def test_lookup_accepts_any_barcode_form(tmp_path, mirror):
+    dump = tmp_path / "products.jsonl.gz"
+    _write_jsonl_gz(dump, PRODUCTS)
+    mirror.import_dump(str(dump))
+
+    for barcode in ("012345678905", "0 12345 67890 5", "00012345678905"):
+        assert mirror.get(barcode)["product_name"] == "Peanut butter"
+    assert mirror.get("96385074")["product_name"] == "Pomme"
+
+
+def test_import_csv(tmp_path, mirror):
+    dump = tmp_path / "products.csv"
+    _write_csv(dump, PRODUCTS)
+
+    assert mirror.import_dump(str(dump)) == 3
+    nutella = mirror.get("3017620422003")
+    assert nutella["nova_group"] == 4
+    assert nutella["nutriments"] == {"energy-kcal_100g": 539.0}
+    assert nutella["allergens_tags"] == ["en:milk", "en:nuts"]
+
+
+def test_import_feeds_search_index(tmp_path, mirror):
+    dump = tmp_path / "products.jsonl.gz"
+    _write_jsonl_gz(dump, PRODUCTS)
+    search_index = ProductSearchIndex(str(tmp_path / "search.db"))
+
+    mirror.import_dump(str(dump), search_index=search_index)
+
+    results = search_index.search("nutella", 10)
+    search_index.close()
+    assert [result["code"] for result in results] == ["3017620422003"]
+
+
+def test_iter_dump_skips_rows_without_code(tmp_path):
+    dump = tmp_path / "products.jsonl"
+    dump.write_text("\n".join(json.dumps(p) for p in PRODUCTS) + "\n{corrompu\n", encoding="utf-8")
+
+    codes = [barcode for barcode, _ in iter_dump(str(dump))]
+    assert codes == [p["code"] for p in PRODUCTS if "code" in p]
+
+
+def test_lookups_answered_during_import(tmp_path, mirror, monkeypatch):
+    dump = tmp_path / "products.jsonl.gz"
+    _write_jsonl_gz(dump, PRODUCTS)
+    lookups = []
+
+    def iter_dump_with_lookup(path):
+        # Lecture de l'export en cours, après l'écriture du premier lot
+        for index, item in enumerate(iter_dump(path)):
+            if index == 2:
+                reader = threading.Thread(
+                    target=lambda: lookups.append(mirror.get("3017620422003")))
+                reader.start()
+                reader.join(timeout=2)
+            yield item
+
+    monkeypatch.setattr(product_mirror, "iter_dump", iter_dump_with_lookup)
+
+    assert mirror.import_dump(str(dump), batch_size=1) == 3
+    assert [product["product_name"] for product in lookups] == ["Nutella"]
@@ -0,0 +1,118 @@
+"""
+Tests du modèle produit compact et de la vue paresseuse
+
+pytest test_product_model.py
+"""
+
+import math
+import pickle
+
+from conftest import NUTELLA, NUTELLA_DATA
+from product_model import Product, ProductView, slim_search_result
+
+
+def _product(**overrides) -> Product:
+    fields = dict(barcode=NUTELLA, name="Nutella", brands="Ferrero",
+                  nutriscore="E", nova_group=4, ecoscore="D",
+                  energy_kcal=539, proteins=6.3, carbohydrates=57.5, fat=30.9,
+                  fiber=None, salt=0.107, ingredients="Sucre, huile de palme",
+                  allergens=["en:milk", "en:nuts"])
+    fields.update(overrides)
+    return Product(**fields)
+
+
+def test_missing_nutrient_exposed_as_none():
+    product = _product(fiber=None, salt="n/a")
+
+    assert product.fiber is None
+    assert product.salt is None
+    assert math.isnan(product.nutrients[4])
+
+    product.fiber = 3.5
+    assert product.fiber == 3.5
+
+
+def test_allergens_interned():
+    first = _product(allergens=["en:milk", "en:nuts"])
+    second = _product(allergens=["en:milk", "en:nuts"])
+
+    assert first.allergens == ("en:milk", "en:nuts")
+    assert first.allergens is second.allergens
+
+
+def test_bytes_round_trip():
+    product = _product()
+
+    assert Product.from_bytes(product.to_bytes()) == product
+
+
+def test_bytes_round_trip_with_missing_values():
+    product = Product(barcode=NUTELLA, name="Nutella", brands="",
+                      nova_group=None, allergens=None)
+    restored = Product.from_bytes(product.to_bytes())
+
+    assert restored == product
+    assert restored.nova_group is None
+    assert restored.allergens is None
+    assert restored.nutriscore is None
+    assert restored.energy_kcal is None
+
+
+def test_bytes_round_trip_with_empty_allergens():
+    restored = Product.from_bytes(_product(allergens=[]).to_bytes())
+
+    assert restored.allergens == ()
+
+
+def test_pickle_round_trip():
+    product = _product(name="Pâte à tartiner")
+
+    restored = pickle.loads(pickle.dumps(product))
+
+    assert restored == product
+    assert restored.name == "Pâte à tartiner"
+
+
+def test_view_reads_raw_response():
+    data = dict(NUTELLA_DATA, nova_group=4, allergens_tags=["en:milk"],
+                ingredients_text="Sucre")
+    view = ProductView(NUTELLA, data)
+
+    assert view.name == "Nutella"
+    assert view.nutriscore == "E"
+    assert view.energy_kcal == 539
+    assert view.proteins is None
+    assert view.allergens == ("en:milk",)
+
+    # La vue suit la réponse brute : rien n'est copié à la construction
+    data["product_name"] = "Nutella B-ready"
+    assert view.name == "Nutella B-ready"
+
+
+def test_view_to_product():
+    view = ProductView(NUTELLA, NUTELLA_DATA)
+
+    product = view.to_product()
+
+    assert isinstance(product, Product)
+    assert product.to_dict() == view.to_dict()
+    assert product.barcode == NUTELLA
+    assert product.energy_kcal == 539
+    assert product.ecoscore == ""
+
+
+def test_view_defaults_for_empty_response():
+    view = ProductView("96385074", {})
+
+    assert view.name == "Inconnu"
+    assert view.brands == ""
+    assert view.nova_group is None
+    assert view.allergens == ()
+
+
+def test_slim_search_result():
+    raw = {"code": NUTELLA, "product_name": "Nutella", "brands": "Ferrero",
+           "ingredients_text": "Sucre", "nutriments": {"energy-kcal_100g": 539}}
+
+    assert slim_search_result(raw) == {"code": NUTELLA, "product_name": "Nutella",
+                                       "brands": "Ferrero"}
@@ -0,0 +1,57 @@
+"""
+Tests de l'index de recherche locale (FTS5)
+
+pytest test_product_search.py
+"""
+
+import pytest
+
+from product_search import ProductSearchIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = ProductSearchIndex(str(tmp_path / "search.db"))
+    index.add_many([
+        ("3017620422003", {"product_name": "Nutella", "brands": "Ferrero", "nutrition_grades": "e"}),
+        ("3017620425035", {"product_name": "Biscuits fourrés au Nutella et céréales complètes",
+                           "brands": "Ferrero"}),
+        ("3270160890606", {"product_name": "Crème dessert chocolat", "brands": "Danette"}),
+        ("00000000000017", {"product_name": None, "brands": None}),  # rien à indexer
+    ])
+    yield index
+    index.close()
+
+
+def _codes(results):
+    return [result["code"] for result in results]
+
+
+def test_prefix_and_accent_insensitive_queries(index):
+    assert _codes(index.search("nute")) == ["3017620422003", "3017620425035"]
+    assert _codes(index.search("CREME choc")) == ["3270160890606"]
+    assert _codes(index.search("ferrero biscuit")) == ["3017620425035"]
+    assert index.search("nutella danette") == []
+    assert index.search("  -- ") == []
+
+
+def test_ranking_prefers_closest_match(index):
+    # Nom court entièrement constitué du terme avant un nom long qui le contient
+    assert _codes(index.search("nutella"))[0] == "3017620422003"
+    assert _codes(index.search("nutella", limit=1)) == ["3017620422003"]
+
+
+def test_results_use_api_format(index):
+    assert index.search("danette") == [{
+        "code": "3270160890606", "product_name": "Crème dessert chocolat",
+        "brands": "Danette", "nutrition_grades": "",
+    }]
+
+
+def test_update_replaces_indexed_terms(index):
+    # Clé GTIN-14 du cache : indexée sous sa forme EAN
+    index.add("03270160890606", {"product_name": "Liégeois vanille", "brands": "Danette"})
+
+    assert index.search("chocolat") == []
+    assert _codes(index.search("liegeois")) == ["3270160890606"]
+    assert not index.is_empty()
@@ -0,0 +1,135 @@
+"""
+Tests du limiteur de débit et de son intégration aux clients OpenFoodFacts
+
+pytest test_rate_limiter.py
+"""
+
+import asyncio
+import time
+from email.utils import formatdate
+from urllib.parse import urlparse
+
+import pytest
+import requests
+from urllib3.util.retry import Retry
+
+from conftest import NUTELLA
+from nutrition_app_python_final import OpenFoodFactsAPI
+from product_search import ProductSearchIndex
+from rate_limiter import RateLimitedAdapter, RateLimiter, TokenBucket, parse_retry_after
+
+# Une requête par seconde, sans rafale : la deuxième attend ~1 s
+SLOW_BUDGET = (1.0, 1)
+LATENCY_BUDGET = 0.5
+
+
+def _slow_limiter(stub) -> RateLimiter:
+    return RateLimiter(budgets={urlparse(stub.base_url).hostname: SLOW_BUDGET}, default=None)
+
+
+def test_bucket_burst_then_refill():
+    bucket = TokenBucket(rate=2.0, burst=2)
+    now = time.monotonic()
+
+    assert bucket.reserve(now) == 0
+    assert bucket.reserve(now) == 0
+    assert bucket.reserve(now) == pytest.approx(0.5)
+    # Une seconde plus tard : deux jetons regagnés, dont un déjà dû
+    assert bucket.reserve(now + 1.0) == 0
+
+
+def test_bucket_pause():
+    bucket = TokenBucket(rate=10.0, burst=5)
+    now = time.monotonic()
+
+    bucket.pause(now + 1.0)
+
+    # Seau vidé et suspendu : attente de la fin de pause, plus un jeton
+    assert bucket.reserve(now) == pytest.approx(1.1)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("bientôt") is None
+    assert 55 < parse_retry_after(formatdate(time.time() + 60, usegmt=True)) <= 60
+
+
+def test_penalize_suspends_host():
+    limiter = RateLimiter(budgets={"api": (10.0, 5)}, default=None)
+
+    limiter.penalize("api", 2.0)
+
+    assert 2.0 < limiter.reserve("api") <= 2.1
+    assert limiter.reserve("ailleurs") == 0  # hôte sans limite
+    stats = limiter.stats()
+    assert stats["api"] == {"requests": 1, "delayed": 1, "waited": pytest.approx(2.1, abs=0.01),
+                            "max_wait": pytest.approx(2.1, abs=0.01), "throttled": 1}
+    assert stats["ailleurs"]["delayed"] == 0
+    assert limiter.total_wait() == pytest.approx(2.1, abs=0.01)
+
+
+def test_adapter_counts_retries_and_throttling(stub):
+    limiter = RateLimiter(budgets={}, default=None)
+    session = requests.Session()
+    retry = Retry(total=1, status_forcelist=[429], backoff_factor=0)
+    session.mount("http://", RateLimitedAdapter(limiter, max_retries=retry))
+    stub.failures = [429]
+
+    response = session.get(f"{stub.base_url}/product/{NUTELLA}")
+
+    assert response.status_code == 200
+    stats = limiter.stats()[urlparse(stub.base_url).hostname]
+    # Requête initiale + retry, chacun décompté une fois
+    assert (stats["requests"], stats["throttled"]) == (2, 1)
+    assert len(stub.requests) == 2
+
+
+def test_adapter_penalizes_unabsorbed_throttling(stub):
+    limiter = RateLimiter(budgets={}, default=None)
+    session = requests.Session()
+    session.mount("http://", RateLimitedAdapter(limiter))
+    stub.failures = [429]
+
+    assert session.get(f"{stub.base_url}/product/{NUTELLA}").status_code == 429
+    assert limiter.stats()[urlparse(stub.base_url).hostname]["throttled"] == 1
+
+
+def test_token_wait_outside_latency_budget(stub, cache, tmp_path):
+    search_index = ProductSearchIndex(str(tmp_path / "search.db"))
+    api = OpenFoodFactsAPI(cache=cache, search_index=search_index,
+                           latency_budget=LATENCY_BUDGET, limiter=_slow_limiter(stub))
+    api.BASE_URL = stub.base_url
+
+    assert api.get_product(NUTELLA).name == "Nutella"
+    assert api.get_product("96385074") is None  # attend son jeton, puis 404
+
+    stats = api.breaker.stats()
+    assert (stats["calls"], stats["error_rate"]) == (2, 0.0)
+    assert stats["p95_latency"] < LATENCY_BUDGET
+    assert api.limiter.total_wait() > LATENCY_BUDGET
+    # Un seul jeton par requête (pas de second passage dans l'adaptateur)
+    assert api.limiter.stats()[urlparse(stub.base_url).hostname]["requests"] == 2
+
+    api.executor.shutdown()
+    search_index.close()
+
+
+def test_async_token_wait_outside_latency_budget(stub, cache):
+    pytest.importorskip("httpx")
+    from async_openfoodfacts import AsyncOpenFoodFactsAPI
+
+    async def scenario():
+        async with AsyncOpenFoodFactsAPI(base_url=stub.base_url, cache=cache,
+                                         latency_budget=LATENCY_BUDGET,
+                                         limiter=_slow_limiter(stub)) as api:
+            first = await api.get_product(NUTELLA)
+            second = await api.get_product("96385074")
+            return api, first, second
+
+    api, first, second = asyncio.run(scenario())
+
+    assert (first.name, second) == ("Nutella", None)
+    stats = api.breaker.stats()
+    assert (stats["calls"], stats["error_rate"]) == (2, 0.0)
+    assert stats["p95_latency"] < LATENCY_BUDGET
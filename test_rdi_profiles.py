@@ -0,0 +1,58 @@
+"""
+Tests de la table précalculée des AJR
+
+pytest test_rdi_profiles.py
+"""
+
+import json
+
+import pytest
+
+from rdi_profiles import ACTIVITY_LEVELS, RDIProfiles, age_band, load_profiles
+
+
+@pytest.fixture(scope="module")
+def profiles():
+    return RDIProfiles.build()
+
+
+def test_historical_values_for_moderate_activity(profiles):
+    assert dict(profiles.get(None, None)) == {
+        "kcal": 2000.0, "proteins": 75.0, "fat": 83.3, "carbs": 237.5, "fiber": 30.0,
+        "salt": 5.0, "calcium_mg": 950.0, "iron_mg": 11.0, "magnesium_mg": 380.0,
+        "vitamin_c_mg": 110.0,
+    }
+    assert profiles.get(35, "Homme")["kcal"] == 2700
+    assert profiles.get(70, "Femme")["kcal"] == 1800
+    assert profiles.get(50, "Femme", "active")["kcal"] == 2400
+
+
+@pytest.mark.parametrize("age, band", [(None, "inconnu"), (0, "inconnu"), (39, "<40"),
+                                       (40, "40-60"), (60, "40-60"), (61, ">60")])
+def test_age_bands(age, band):
+    assert age_band(age) == band
+
+
+def test_profiles_are_shared_and_read_only(profiles):
+    assert profiles.get(30, "Homme") is profiles.get(35, "Homme")
+    assert profiles.activity_levels == ACTIVITY_LEVELS
+    with pytest.raises(TypeError):
+        profiles.get(30, "Homme")["kcal"] = 0
+
+
+def test_json_override(tmp_path, monkeypatch):
+    path = tmp_path / "ajr.json"
+    path.write_text(json.dumps({
+        "activity_factors": {"intense": 1.5},
+        "extra": {"vitamin_d_ug": 15},
+        "profiles": {"Homme/<40/active": {"kcal": 3000}, "*/inconnu/modérée": {"salt": 6.0}},
+    }), encoding="utf-8")
+    monkeypatch.setenv("RDI_PROFILES_PATH", str(path))
+
+    profiles = load_profiles()
+
+    active = profiles.get(30, "Homme", "active")
+    assert (active["kcal"], active["proteins"], active["vitamin_d_ug"]) == (3000, 112.5, 15)
+    assert profiles.get(None, None)["salt"] == 6.0
+    assert profiles.get(None, "Femme", "intense")["kcal"] == 2100 * 1.5
+    assert profiles.activity_levels == ACTIVITY_LEVELS + ("intense",)
@@ -1,7 +1,17 @@
 """
 Script de test rapide pour vérifier que le scraper fonctionne
+
+python test_scraper.py
 """
 
+import sys
+
+if "pytest" in sys.modules:
+    # Collecté par pytest : script manuel, pas un test automatisable
+    import pytest
+    pytest.skip("script manuel : nécessite Chrome, selenium et un accès Internet "
+                "(python test_scraper.py)", allow_module_level=True)
+
 from web_scraper_advanced import AdvancedWebScraper
 
 print("🧪 Test du Web Scraper Avancé")
@@ -0,0 +1,103 @@
+"""
+Tests du regroupement des requêtes concurrentes (single-flight)
+
+pytest test_singleflight.py
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    def fetch(key):
+        calls.append(key)
+        time.sleep(0.1)
+        return {"key": key}
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: flight.do("a", fetch, "a"), range(8)))
+
+    assert calls == ["a"]
+    assert all(result is results[0] for result in results)
+
+
+def test_error_shared_then_key_released():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait()
+        raise ValueError("panne")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("a", failing)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=call)
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert len(errors) == 2 and errors[0] is errors[1]
+    # Clé libérée : un nouvel appel est exécuté
+    assert flight.do("a", lambda: 42) == 42
+
+
+def test_distinct_keys_run_separately():
+    flight = SingleFlight()
+    assert [flight.do(key, str.upper, key) for key in ("a", "b")] == ["A", "B"]
+
+
+def test_async_calls_share_one_execution():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def fetch(key):
+        calls.append(key)
+        await asyncio.sleep(0.05)
+        return key.upper()
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do(key, fetch, key) for key in "aab" * 3))
+
+    assert asyncio.run(scenario()) == list("AAB" * 3)
+    assert sorted(calls) == ["a", "b"]
+
+
+def test_async_cancelled_caller_does_not_cancel_shared_call():
+    flight = AsyncSingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def scenario():
+        impatient = asyncio.ensure_future(flight.do("a", fetch))
+        patient = asyncio.ensure_future(flight.do("a", fetch))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await impatient
+        return await patient
+
+    assert asyncio.run(scenario()) == "ok"
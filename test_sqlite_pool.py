@@ -0,0 +1,74 @@
+"""
+Tests du pool de connexions SQLite (une connexion persistante par thread)
+
+pytest test_sqlite_pool.py
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from sqlite_pool import SQLiteConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = SQLiteConnectionPool(str(tmp_path / "pool.db"))
+    yield pool
+    pool.close()
+
+
+def test_connection_reused_within_thread(pool):
+    assert pool.connection() is pool.connection()
+
+
+def test_one_connection_per_thread(pool):
+    connections = []
+    thread = threading.Thread(target=lambda: connections.append(pool.connection()))
+    thread.start()
+    thread.join()
+
+    assert connections[0] is not pool.connection()
+
+
+def test_pragmas_applied(tmp_path):
+    pool = SQLiteConnectionPool(str(tmp_path / "pool.db"), pragmas={"cache_size": -2000})
+    conn = pool.connection()
+
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA cache_size").fetchone()[0] == -2000
+    assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    assert isinstance(conn.execute("SELECT 1 AS one").fetchone(), sqlite3.Row)
+    pool.close()
+
+
+def test_transaction_commits_or_rolls_back(pool):
+    with pool.transaction() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.execute("INSERT INTO t VALUES (1)")
+
+    with pytest.raises(RuntimeError):
+        with pool.transaction() as conn:
+            conn.execute("INSERT INTO t VALUES (2)")
+            raise RuntimeError("abandon")
+
+    # Écritures visibles depuis la connexion d'un autre thread
+    rows = []
+    thread = threading.Thread(
+        target=lambda: rows.extend(pool.connection().execute("SELECT x FROM t").fetchall())
+    )
+    thread.start()
+    thread.join()
+    assert [row[0] for row in rows] == [1]
+
+
+def test_close_releases_all_connections(pool):
+    conn = pool.connection()
+    pool.close()
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    # Nouvelle connexion ouverte à la demande
+    assert pool.connection() is not conn
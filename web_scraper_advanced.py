@@ -36,7 +36,6 @@ from bs4 import BeautifulSoup
 
 # Requests pour téléchargement images
 import requests
-from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 # Export Word
@@ -47,6 +46,11 @@ from docx.enum.text import WD_ALIGN_PARAGRAPH
 # Progress bar
 from tqdm import tqdm
 
+# Limiteur de débit et requêtes conditionnelles partagés avec le client OpenFoodFacts
+from compression import ACCEPT_ENCODING
+from http_validators import NOT_MODIFIED_STATUS, Validators
+from rate_limiter import RateLimitedAdapter, RateLimiter, shared_limiter
+
 
 # ==================== CONFIGURATION ====================
 
@@ -74,6 +78,10 @@ class ScraperConfig:
     RETRY_DELAY = 2  # Secondes
     BACKOFF_FACTOR = 2
 
+    # Budgets de téléchargement par hôte : {"cdn.exemple.com": (requêtes/s, rafale)}
+    # Les autres hôtes suivent le budget par défaut du limiteur (5 req/s)
+    RATE_BUDGETS = {}
+
     # Dossiers de sortie
     OUTPUT_DIR = "scraped_content"
     IMAGES_DIR = "images"
@@ -557,16 +565,21 @@ class ContentExtractor:
 class ImageDownloader:
     """Gestionnaire de téléchargement d'images"""
 
-    def __init__(self, output_dir: str, logger: logging.Logger):
+    # Fichier compagnon conservant l'URL et les validateurs HTTP d'une image
+    VALIDATORS_SUFFIX = ".http.json"
+
+    def __init__(self, output_dir: str, logger: logging.Logger,
+                 limiter: Optional[RateLimiter] = None):
         self.output_dir = output_dir
         self.logger = logger
+        self.limiter = limiter or shared_limiter()
         self.session = self._create_session()
 
         # Créer le dossier si nécessaire
         os.makedirs(output_dir, exist_ok=True)
 
     def _create_session(self) -> requests.Session:
-        """Crée une session requests avec retry"""
+        """Crée une session requests avec retry et limiteur de débit par hôte"""
         session = requests.Session()
 
         retry_strategy = Retry(
@@ -574,12 +587,13 @@ class ImageDownloader:
             backoff_factor=1,
             status_forcelist=[429, 500, 502, 503, 504]
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        adapter = RateLimitedAdapter(self.limiter, max_retries=retry_strategy)
         session.mount("http://", adapter)
         session.mount("https://", adapter)
 
         session.headers.update({
-            'User-Agent': random.choice(ScraperConfig.USER_AGENTS)
+            'User-Agent': random.choice(ScraperConfig.USER_AGENTS),
+            'Accept-Encoding': ACCEPT_ENCODING
         })
 
         return session
@@ -590,6 +604,7 @@ class ImageDownloader:
 
         # Limiter le nombre d'images
         images_to_download = images[:max_images]
+        waited_before = self.limiter.total_wait()
 
         self.logger.info(f"Téléchargement de {len(images_to_download)} images...")
 
@@ -622,6 +637,10 @@ class ImageDownloader:
                 continue
 
         self.logger.info(f"✓ {len(saved_images)} image(s) téléchargée(s)")
+
+        waited = self.limiter.total_wait() - waited_before
+        if waited > 0:
+            self.logger.info(f"Limiteur de débit : {waited:.1f}s d'attente")
         return saved_images
 
     def _save_data_uri(self, data_uri: str, output_path: str) -> bool:
@@ -640,20 +659,62 @@ class ImageDownloader:
             return False
 
     def _download_http_image(self, url: str, output_path: str, timeout: int = 10) -> bool:
-        """Télécharge une image depuis une URL HTTP"""
+        """
+        Télécharge une image depuis une URL HTTP
+
+        Si l'image a déjà été téléchargée depuis la même URL, la requête est
+        conditionnelle (If-None-Match / If-Modified-Since) : sur un 304 le
+        fichier existant est conservé et sa date de modification rafraîchie.
+        """
         try:
-            response = self.session.get(url, stream=True, timeout=timeout)
+            validators = self._load_validators(url, output_path)
+            response = self.session.get(url, stream=True, timeout=timeout,
+                                        headers=validators.request_headers())
+
+            if response.status_code == NOT_MODIFIED_STATUS:
+                response.close()
+                os.utime(output_path)
+                return True
+
             response.raise_for_status()
 
             with open(output_path, 'wb') as f:
                 for chunk in response.iter_content(chunk_size=8192):
                     f.write(chunk)
 
+            self._save_validators(url, output_path, Validators.from_headers(response.headers))
             return True
         except Exception as e:
             self.logger.warning(f"Erreur téléchargement HTTP: {e}")
             return False
 
+    def _load_validators(self, url: str, output_path: str) -> Validators:
+        """Validateurs du précédent téléchargement de cette URL vers ce fichier"""
+        sidecar = output_path + self.VALIDATORS_SUFFIX
+        if not (os.path.exists(output_path) and os.path.exists(sidecar)):
+            return Validators()
+
+        try:
+            with open(sidecar, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return Validators()
+
+        if saved.get('url') != url:
+            return Validators()
+        return Validators(saved.get('etag'), saved.get('last_modified'))
+
+    def _save_validators(self, url: str, output_path: str, validators: Validators):
+        """Enregistre (ou supprime) le fichier compagnon d'une image"""
+        sidecar = output_path + self.VALIDATORS_SUFFIX
+        if validators.empty:
+            if os.path.exists(sidecar):
+                os.remove(sidecar)
+            return
+
+        with open(sidecar, 'w', encoding='utf-8') as f:
+            json.dump({'url': url, **validators._asdict()}, f)
+
     def _get_extension_from_data_uri(self, data_uri: str) -> str:
         """Extrait l'extension depuis une Data URI"""
         try:
@@ -885,6 +946,11 @@ class AdvancedWebScraper:
         self.markdown_exporter = MarkdownExporter(self.logger)
         self.word_exporter = WordExporter(self.logger)
 
+        # Limiteur partagé par tous les scrapes du processus
+        self.limiter = shared_limiter()
+        for host, budget in self.config.RATE_BUDGETS.items():
+            self.limiter.configure(host, budget)
+
         # Créer les dossiers de sortie
         os.makedirs(self.config.OUTPUT_DIR, exist_ok=True)
         images_dir = os.path.join(self.config.OUTPUT_DIR, self.config.IMAGES_DIR)
@@ -938,7 +1004,7 @@ class AdvancedWebScraper:
             # 7. Télécharger les images
             if download_images and content.get('images'):
                 images_dir = os.path.join(self.config.OUTPUT_DIR, self.config.IMAGES_DIR)
-                downloader = ImageDownloader(images_dir, self.logger)
+                downloader = ImageDownloader(images_dir, self.logger, self.limiter)
                 saved_images = downloader.download_images(content['images'])
                 content['images'] = saved_images
 